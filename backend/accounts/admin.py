@@ -1,6 +1,19 @@
+from collections import defaultdict
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.utils.functional import cached_property
+
+from .blobs import release_blob
+from .lifecycle import close_fundraisers
+from .metrics import donations_received
+from .models import DataExport, Donation, Fundraiser, FundraiserDocument, FundraiserPayout, Notification, RecurringDonation
+from .notifications import notify_donations
+from .rollups import add_collected, record_donations
+from .sketches import add_supporters
 
 User = get_user_model()
 
@@ -16,3 +29,224 @@ class UserAdmin(BaseUserAdmin):
     fieldsets = BaseUserAdmin.fieldsets + (
         ("Profile Info", {"fields": ("phone", "cnic", "avatar")}),
     )
+
+
+# ----------------------------
+# Donations / fundraisers
+# ----------------------------
+# These tables are large: no exact COUNT(*) per page view, related rows
+# joined in the list query, raw-id inputs instead of <select>s of every
+# user/fundraiser, and actions that run as set-based updates.
+# Fields with bookkeeping behind them (rollups, collected totals, sketches,
+# chain cache, blob refs) are read-only here; change them through the actions
+# or the API.
+
+ACTION_CHUNK = 1000
+
+
+def _reltuples(table):
+    """Planner row estimate; a partitioned table is the sum of its partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COALESCE(SUM(c.reltuples), 0) FROM pg_class c
+            WHERE c.oid = %s::regclass AND c.relkind <> 'p'
+               OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+            """,
+            [table, table],
+        )
+        return max(int(cursor.fetchone()[0]), 0)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Unfiltered changelists on Postgres take the count from pg_class.reltuples
+    once the table is big enough for the estimate to matter; filtered ones
+    count at most MAX_EXACT_COUNT rows.
+    """
+    ESTIMATE_ABOVE = 100_000
+    MAX_EXACT_COUNT = 10_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if connection.vendor == "postgresql" and not qs.query.has_filters():
+            estimate = _reltuples(qs.model._meta.db_table)
+            if estimate >= self.ESTIMATE_ABOVE:
+                return estimate
+            return qs.order_by().count()
+        return qs.order_by().values("pk")[:self.MAX_EXACT_COUNT].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+def _chunks(queryset):
+    ids = list(queryset.order_by().values_list("pk", flat=True))
+    for i in range(0, len(ids), ACTION_CHUNK):
+        yield ids[i:i + ACTION_CHUNK]
+
+
+@admin.register(Donation)
+class DonationAdmin(LargeTableAdmin):
+    list_display = ("id", "fundraiser", "donor", "donor_name", "amount", "tip_amount", "status", "payment_method", "created_at")
+    list_select_related = ("fundraiser", "donor")
+    list_filter = ("status",)
+    search_fields = ("=id", "=donor__username", "=fundraiser__id")
+    readonly_fields = (
+        "recipient", "fundraiser", "donor", "amount", "tip_amount", "status",
+        "frequency_label", "payment_method", "created_at",
+    )
+    ordering = ("-id",)
+    actions = ["mark_received"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Mark selected donations as received")
+    def mark_received(self, request, queryset):
+        marked = 0
+        for ids in _chunks(queryset.filter(status=Donation.STATUS_PENDING)):
+            with transaction.atomic():
+                rows = list(
+                    Donation.objects
+                    .select_for_update()
+                    .filter(id__in=ids, status=Donation.STATUS_PENDING)
+                    .only("id", "fundraiser_id", "recipient_id", "donor_id", "amount", "tip_amount",
+                          "frequency_label", "payment_method", "created_at",
+                          "donor_name", "is_anonymous", "message")
+                )
+                if not rows:
+                    continue
+                Donation.objects.filter(id__in=[d.id for d in rows]).update(status=Donation.STATUS_RECEIVED)
+                for d in rows:
+                    d.status = Donation.STATUS_RECEIVED
+
+                # same bookkeeping as a donation created as received
+                record_donations(rows)
+                add_collected(rows)
+                notify_donations(rows)
+                donors = defaultdict(list)
+                for d in rows:
+                    if d.fundraiser_id:
+                        donors[d.fundraiser_id].append(d.donor_id)
+                for fundraiser_id, donor_ids in donors.items():
+                    add_supporters(fundraiser_id, donor_ids)
+                transaction.on_commit(lambda rows=rows: donations_received(rows))
+            marked += len(rows)
+        self.message_user(request, f"{marked} donation(s) marked as received.")
+
+
+class FundraiserDocumentInline(admin.TabularInline):
+    model = FundraiserDocument
+    # uploads go through the API (shared blobs, accounts.blobs)
+    fields = ("name", "file", "uploaded_at")
+    readonly_fields = ("name", "file", "uploaded_at")
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Fundraiser)
+class FundraiserAdmin(LargeTableAdmin):
+    list_display = ("id", "title", "owner", "status", "category", "target_amount", "supporters_count", "deadline", "created_at")
+    list_select_related = ("owner",)
+    list_filter = ("status",)
+    search_fields = ("=id", "=owner__username")
+    exclude = ("supporters_sketch",)
+    readonly_fields = (
+        "owner", "status", "published_at", "collected_amount", "linked_fundraiser", "image",
+        "description_excerpt", "supporters_count", "next_payout_at",
+    )
+    ordering = ("-id",)
+    inlines = [FundraiserDocumentInline]
+    actions = ["close_selected"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # would cascade to donations and leak the cover/document blob refs
+        return False
+
+    @admin.action(description="Close selected fundraisers")
+    def close_selected(self, request, queryset):
+        closed = 0
+        for ids in _chunks(queryset.filter(status=Fundraiser.STATUS_ACTIVE)):
+            with transaction.atomic():
+                closed += close_fundraisers(ids)
+        self.message_user(request, f"{closed} fundraiser(s) closed.")
+
+
+@admin.register(FundraiserPayout)
+class FundraiserPayoutAdmin(LargeTableAdmin):
+    list_display = ("id", "fundraiser", "method", "is_enabled")
+    list_select_related = ("fundraiser",)
+    list_filter = ("method",)
+    search_fields = ("=fundraiser__id",)
+    raw_id_fields = ("fundraiser",)
+    ordering = ("-id",)
+
+
+@admin.register(FundraiserDocument)
+class FundraiserDocumentAdmin(LargeTableAdmin):
+    list_display = ("id", "fundraiser", "name", "uploaded_at")
+    list_select_related = ("fundraiser",)
+    search_fields = ("=fundraiser__id",)
+    readonly_fields = ("fundraiser", "file", "uploaded_at")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            obj.delete()
+            release_blob(obj.file.name)
+
+    def delete_queryset(self, request, queryset):
+        for ids in _chunks(queryset):
+            with transaction.atomic():
+                names = list(FundraiserDocument.objects.filter(id__in=ids).values_list("file", flat=True))
+                FundraiserDocument.objects.filter(id__in=ids).delete()
+                for name in names:
+                    release_blob(name)
+
+
+@admin.register(RecurringDonation)
+class RecurringDonationAdmin(LargeTableAdmin):
+    list_display = ("id", "donor", "fundraiser", "amount", "frequency", "status", "next_run_at", "runs_count")
+    list_select_related = ("donor", "fundraiser")
+    list_filter = ("status", "frequency")
+    search_fields = ("=fundraiser__id", "=donor__id")
+    raw_id_fields = ("donor", "fundraiser")
+    ordering = ("-id",)
+
+
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdmin):
+    list_display = ("id", "user", "channel", "kind", "event_count", "status", "attempts", "next_attempt_at")
+    list_select_related = ("user",)
+    list_filter = ("status", "channel", "kind")
+    search_fields = ("=user__id", "=fundraiser__id")
+    raw_id_fields = ("user", "fundraiser")
+    readonly_fields = ("last_error",)
+    ordering = ("-id",)
+
+
+@admin.register(DataExport)
+class DataExportAdmin(LargeTableAdmin):
+    list_display = ("id", "user", "reason", "status", "size", "attempts", "created_at", "expires_at")
+    list_select_related = ("user",)
+    list_filter = ("status", "reason")
+    search_fields = ("=user__id",)
+    raw_id_fields = ("user",)
+    readonly_fields = ("file", "size", "rows", "last_error", "started_at", "finished_at")
+    ordering = ("-id",)
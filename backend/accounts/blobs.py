@@ -0,0 +1,173 @@
+"""
+Content-addressed storage for uploaded documents and cover images.
+
+Uploads are hashed while Django receives them (HashingMemoryFileUploadHandler /
+HashingTemporaryFileUploadHandler in FILE_UPLOAD_HANDLERS set `file.sha256`),
+so a duplicate is recognised without reading the file again and is never
+sent to R2 a second time. Every distinct content is one StoredBlob stored
+at blobs/<sha[:2]>/<sha><ext>; Fundraiser.image / FundraiserDocument.file
+hold that name and StoredBlob.ref_count counts them.
+
+store_blob() / share_blobs() take references, release_blob() drops one. A blob that
+reaches zero stays until gc_orphaned_media purges it after the grace period,
+so a re-upload in between simply takes it back. stored_blob() wraps
+store_blob() for callers that write the row pointing at it afterwards: the
+reference is dropped again if that write fails.
+"""
+import hashlib
+import os
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import StoredBlob
+
+BLOB_DIR = "blobs"
+HASH_CHUNK = 64 * 1024
+
+
+class _HashingMixin:
+    def new_file(self, *args, **kwargs):
+        self._sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        out = super().receive_data_chunk(raw_data, start)
+        if out is None:  # this handler kept the chunk
+            self._sha256.update(raw_data)
+        return out
+
+    def file_complete(self, file_size):
+        f = super().file_complete(file_size)
+        if f is not None:
+            f.sha256 = self._sha256.hexdigest()
+        return f
+
+
+class HashingMemoryFileUploadHandler(_HashingMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(_HashingMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def file_sha256(f):
+    """Digest set by the upload handlers, or one pass over the file."""
+    digest = getattr(f, "sha256", None)
+    if digest:
+        return digest
+    h = hashlib.sha256()
+    for chunk in f.chunks(HASH_CHUNK):
+        h.update(chunk)
+    f.seek(0)
+    return h.hexdigest()
+
+
+def blob_path(sha, filename):
+    ext = os.path.splitext(filename or "")[1].lower()[:10]
+    return f"{BLOB_DIR}/{sha[:2]}/{sha}{ext}"
+
+
+def _take(sha):
+    return (
+        StoredBlob.objects
+        .filter(sha256=sha)
+        .update(ref_count=F("ref_count") + 1, updated_at=timezone.now())
+    )
+
+
+def store_blob(f):
+    """
+    Take a reference on the blob holding `f`'s content, uploading it only if
+    it is new. Returns the storage name to put in the file field.
+    """
+    sha = file_sha256(f)
+    with transaction.atomic():
+        blob = StoredBlob.objects.select_for_update().filter(sha256=sha).only("file").first()
+        if blob is not None:
+            _take(sha)
+            return blob.file.name
+
+    name = default_storage.save(blob_path(sha, f.name), f)
+    try:
+        with transaction.atomic():
+            StoredBlob.objects.create(
+                sha256=sha,
+                file=name,
+                size=f.size or 0,
+                content_type=getattr(f, "content_type", "") or "",
+                ref_count=1,
+            )
+        return name
+    except IntegrityError:
+        # same content uploaded concurrently: use theirs
+        if name != blob_path(sha, f.name):
+            default_storage.delete(name)
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().get(sha256=sha)
+            _take(sha)
+        return blob.file.name
+
+
+@contextmanager
+def stored_blob(f):
+    """
+    store_blob(f), then run the block that saves the name; if the block
+    raises, the reference is released. The upload itself stays outside any
+    transaction.
+    """
+    name = store_blob(f)
+    try:
+        yield name
+    except BaseException:
+        release_blob(name)
+        raise
+
+
+def share_blobs(names):
+    """
+    Take one more reference per occurrence in `names` (e.g. a cloned
+    fundraiser). Names outside blobs/ are plain shared objects that
+    gc_orphaned_media keeps while any row points at them.
+    """
+    counts = Counter(n for n in names if (n or "").startswith(f"{BLOB_DIR}/"))
+    for name, n in counts.items():
+        StoredBlob.objects.filter(file=name).update(
+            ref_count=F("ref_count") + n, updated_at=timezone.now()
+        )
+
+
+def release_blob(name):
+    """Drop one reference. Names outside blobs/ (older uploads) are left to gc_orphaned_media."""
+    if not (name or "").startswith(f"{BLOB_DIR}/"):
+        return
+    StoredBlob.objects.filter(file=name, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, updated_at=timezone.now()
+    )
+
+
+def purge_unreferenced(before, dry_run=False, storage=default_storage):
+    """
+    Delete blobs with no references since `before`: the object first, then the
+    row, under the row lock, so a concurrent store_blob() either takes the
+    blob back before this or uploads it again after. Returns (count, bytes).
+    """
+    count = size = 0
+    candidates = StoredBlob.objects.filter(ref_count=0, updated_at__lt=before).values_list("id", flat=True)
+    for blob_id in list(candidates):
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(id=blob_id, ref_count=0).first()
+            if blob is None:
+                continue
+            if not dry_run:
+                storage.delete(blob.file.name)
+                blob.delete()
+        count += 1
+        size += blob.size
+    return count, size
@@ -0,0 +1,160 @@
+"""
+Helpers on top of the shared cache tier (see CACHES in config/settings.py).
+
+- make_key / versioned_key: namespaced keys ("pwreset:<id>", "featured:v3:12")
+- bump_namespace: invalidate every versioned key of a namespace in O(1)
+- set_value / get_value (+ _many): transparent zlib compression for big values
+- get_or_compute: cached computation with stampede protection
+"""
+import math
+import pickle
+import random
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import cache_lookups
+
+_ZLIB_MARKER = "__zlib__"
+
+
+# ----------------------------
+# Keys / namespaces
+# ----------------------------
+
+def make_key(namespace, *parts):
+    return ":".join([namespace, *[str(p) for p in parts]])
+
+
+def _version_key(namespace):
+    return make_key("nsver", namespace)
+
+
+def namespace_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # never expire the version counter, otherwise old keys come back to life
+        cache.add(_version_key(namespace), 1, None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def bump_namespace(namespace):
+    """Invalidate all versioned keys in `namespace` (old entries just expire)."""
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.add(_version_key(namespace), 2, None)
+        return cache.get(_version_key(namespace), 2)
+
+
+def versioned_key(namespace, *parts, version=None):
+    """Pass `version` (namespace_version()) when building many keys, to read it once."""
+    if version is None:
+        version = namespace_version(namespace)
+    return make_key(namespace, f"v{version}", *parts)
+
+
+# ----------------------------
+# Compressed values
+# ----------------------------
+
+def _pack(value):
+    raw = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    if len(raw) < settings.CACHE_COMPRESS_MIN_BYTES:
+        return value
+    return (_ZLIB_MARKER, zlib.compress(raw, 6))
+
+
+def _unpack(stored):
+    if isinstance(stored, tuple) and len(stored) == 2 and stored[0] == _ZLIB_MARKER:
+        return pickle.loads(zlib.decompress(stored[1]))
+    return stored
+
+
+def set_value(key, value, timeout=None):
+    if timeout is None:
+        cache.set(key, _pack(value))
+    else:
+        cache.set(key, _pack(value), timeout)
+
+
+def get_value(key, default=None):
+    stored = cache.get(key)
+    cache_lookups(stored is not None, stored is None)
+    if stored is None:
+        return default
+    return _unpack(stored)
+
+
+def set_many_values(mapping, timeout=None):
+    packed = {k: _pack(v) for k, v in mapping.items()}
+    if timeout is None:
+        cache.set_many(packed)
+    else:
+        cache.set_many(packed, timeout)
+
+
+def get_many_values(keys):
+    found = cache.get_many(keys)
+    cache_lookups(len(found), len(keys) - len(found))
+    return {k: _unpack(v) for k, v in found.items()}
+
+
+# ----------------------------
+# Stampede protection
+# ----------------------------
+
+def _lock_key(key):
+    return make_key("lock", key)
+
+
+def get_or_compute(key, compute, timeout, beta=1.0, lock_timeout=10, wait=2.0):
+    """
+    Return the cached value for `key`, computing it with `compute()` on a miss.
+
+    Two protections against a thundering herd when a hot key expires:
+      * probabilistic early recompute (XFetch): a reader may refresh the entry
+        shortly before it expires, with a probability that grows as the expiry
+        approaches and with how long `compute` took last time;
+      * a short cache lock on a hard miss, so only one worker computes while the
+        others wait briefly for its result.
+    """
+    entry = get_value(key)
+    now = time.time()
+
+    if entry is not None:
+        value, expires_at, cost = entry
+        early = now - cost * beta * math.log(random.random() or 1e-12)
+        if early < expires_at:
+            return value
+        # refresh early, but only one worker does it; the rest keep the old value
+        if not cache.add(_lock_key(key), 1, lock_timeout):
+            return value
+        return _compute_and_store(key, compute, timeout)
+
+    if cache.add(_lock_key(key), 1, lock_timeout):
+        return _compute_and_store(key, compute, timeout)
+
+    # somebody else is computing: poll for their result, then give up and compute
+    deadline = now + wait
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = get_value(key)
+        if entry is not None:
+            return entry[0]
+    return _compute_and_store(key, compute, timeout, release=False)
+
+
+def _compute_and_store(key, compute, timeout, release=True):
+    started = time.time()
+    try:
+        value = compute()
+        cost = time.time() - started
+        set_value(key, (value, time.time() + timeout, cost), timeout)
+        return value
+    finally:
+        if release:
+            cache.delete(_lock_key(key))
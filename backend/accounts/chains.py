@@ -0,0 +1,153 @@
+"""
+Linked-fundraiser chains.
+
+Fundraiser.linked_fundraiser points at the campaign a fundraiser continues,
+so the links form trees: the root is the first campaign, children are the
+campaigns that continued it. Walks up (to the root) and down (the whole
+tree) are each one recursive CTE; the visited path is carried along so a
+cycle in old data stops the walk instead of looping, and new links that
+would close one are refused (would_cycle).
+
+Chain totals (raised, distinct supporters, duration) are cached per root
+and dropped with invalidate_chains() whenever a link changes.
+"""
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from .cache import get_or_compute, make_key
+from .models import Donation, Fundraiser
+from .sketches import merge_sketches
+
+MAX_DEPTH = 100
+CHAIN_TIMEOUT = 300
+
+_TABLE = Fundraiser._meta.db_table
+
+_UP_SQL = """
+    WITH RECURSIVE up(id, parent_id, depth, path) AS (
+        SELECT id, linked_fundraiser_id, 0, ',' || id || ','
+        FROM {table} WHERE id = %s
+        UNION ALL
+        SELECT f.id, f.linked_fundraiser_id, up.depth + 1, up.path || f.id || ','
+        FROM {table} f JOIN up ON f.id = up.parent_id
+        WHERE up.path NOT LIKE '%%,' || f.id || ',%%' AND up.depth < %s
+    )
+    SELECT id, parent_id, depth FROM up ORDER BY depth
+"""
+
+_DOWN_SQL = """
+    WITH RECURSIVE down(id, parent_id, depth, path) AS (
+        SELECT id, linked_fundraiser_id, 0, ',' || id || ','
+        FROM {table} WHERE id = %s
+        UNION ALL
+        SELECT f.id, f.linked_fundraiser_id, down.depth + 1, down.path || f.id || ','
+        FROM {table} f JOIN down ON f.linked_fundraiser_id = down.id
+        WHERE down.path NOT LIKE '%%,' || f.id || ',%%' AND down.depth < %s
+    )
+    SELECT id, parent_id, depth FROM down ORDER BY depth, id
+"""
+
+
+def _walk(sql, fundraiser_id):
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(table=connection.ops.quote_name(_TABLE)), [fundraiser_id, MAX_DEPTH])
+        return cursor.fetchall()
+
+
+def ancestors(fundraiser_id):
+    """[fundraiser_id, its previous campaign, ..., root] ids."""
+    return [row[0] for row in _walk(_UP_SQL, fundraiser_id)]
+
+
+def chain_root(fundraiser_id):
+    path = ancestors(fundraiser_id)
+    return path[-1] if path else None
+
+
+def chain_tree(root_id):
+    """[(id, parent_id, depth)] of the root and every campaign continuing it."""
+    return _walk(_DOWN_SQL, root_id)
+
+
+def would_cycle(fundraiser_id, linked_id):
+    """True if linking fundraiser -> linked makes fundraiser its own ancestor."""
+    return fundraiser_id in ancestors(linked_id)
+
+
+def _key(root_id):
+    return make_key("chain", root_id)
+
+
+def invalidate_chains(*root_ids):
+    cache.delete_many([_key(r) for r in set(root_ids) if r])
+
+
+def _end_of_day(d):
+    dt = datetime.combine(d, time(23, 59, 59))
+    return timezone.make_aware(dt, timezone.get_current_timezone()) if timezone.is_naive(dt) else dt
+
+
+def _compute_chain(root_id):
+    tree = chain_tree(root_id)
+    ids = [row[0] for row in tree]
+
+    fundraisers = {
+        f["id"]: f
+        for f in Fundraiser.objects.filter(id__in=ids).values(
+            "id", "title", "status", "created_at", "published_at", "deadline",
+            "supporters_count", "supporters_sketch",
+        )
+    }
+    raised = dict(
+        Donation.objects
+        .filter(fundraiser_id__in=ids, status=Donation.STATUS_RECEIVED)
+        .values("fundraiser_id")
+        .annotate(total=Sum("amount"))
+        .values_list("fundraiser_id", "total")
+    )
+
+    members = []
+    for fid, parent_id, depth in tree:
+        f = fundraisers[fid]
+        members.append({
+            "id": fid,
+            "linked_fundraiser_id": parent_id,
+            "depth": depth,
+            "title": f["title"],
+            "status": f["status"],
+            "raised": str(raised.get(fid) or Decimal("0.00")),
+            "supporters": f["supporters_count"],
+            "started_at": f["published_at"] or f["created_at"],
+            "deadline": f["deadline"],
+        })
+
+    started = min((m["started_at"] for m in members), default=None)
+    deadlines = [m["deadline"] for m in members if m["deadline"]]
+    ended = _end_of_day(max(deadlines)) if deadlines else None
+
+    return {
+        "root_id": root_id,
+        "members": members,
+        "totals": {
+            "fundraisers": len(members),
+            "raised": str(sum(raised.values(), Decimal("0.00"))),
+            # distinct donors across the chain, not the sum of per-campaign counts
+            "supporters": merge_sketches(f["supporters_sketch"] for f in fundraisers.values()).estimate(),
+            "started_at": started,
+            "ended_at": ended,
+            "duration_days": (ended - started).days if started and ended and ended > started else 0,
+        },
+    }
+
+
+def chain_summary(fundraiser_id):
+    """The whole chain `fundraiser_id` belongs to, with totals; cached per root."""
+    root_id = chain_root(fundraiser_id)
+    if root_id is None:
+        return None
+    return get_or_compute(_key(root_id), lambda: _compute_chain(root_id), CHAIN_TIMEOUT)
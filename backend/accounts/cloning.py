@@ -0,0 +1,57 @@
+"""
+Server-side fundraiser cloning for follow-up campaigns.
+
+clone_fundraiser() copies the fundraiser as a new draft linked to the
+source, with its payout methods and documents, in one transaction. Files are
+not copied: the clone points at the same storage objects and takes blob
+references (accounts.blobs), so no bytes are read or written.
+"""
+from django.db import models, transaction
+
+from .blobs import share_blobs
+from .chains import chain_root, invalidate_chains
+from .models import Fundraiser, FundraiserDocument, FundraiserPayout
+
+# per-campaign state the clone starts fresh with; the owner picks a new deadline
+RESET_FIELDS = {
+    "id", "status", "published_at", "created_at", "linked_fundraiser", "deadline",
+    "collected_amount", "supporters_sketch", "supporters_count", "next_payout_at",
+}
+
+
+def _values(obj, skip):
+    out = {}
+    for f in type(obj)._meta.concrete_fields:
+        if f.name in skip:
+            continue
+        value = getattr(obj, f.attname)
+        if isinstance(f, models.FileField):
+            value = value.name or None  # the name only; never re-save the file
+        out[f.attname] = value
+    return out
+
+
+def clone_fundraiser(source):
+    """New draft continuing `source` (same owner). Returns the clone."""
+    with transaction.atomic():
+        clone = Fundraiser(
+            **_values(source, RESET_FIELDS),
+            status=Fundraiser.STATUS_DRAFT,
+            linked_fundraiser=source,
+        )
+        clone.save()
+
+        FundraiserPayout.objects.bulk_create([
+            FundraiserPayout(**_values(p, {"id", "fundraiser"}), fundraiser=clone)
+            for p in FundraiserPayout.objects.filter(fundraiser=source)
+        ])
+
+        docs = list(FundraiserDocument.objects.filter(fundraiser=source).order_by("uploaded_at", "id"))
+        FundraiserDocument.objects.bulk_create([
+            FundraiserDocument(fundraiser=clone, file=d.file.name, name=d.name) for d in docs
+        ])
+
+        share_blobs([clone.image.name if clone.image else "", *[d.file.name for d in docs]])
+
+    invalidate_chains(chain_root(source.id))
+    return clone
@@ -0,0 +1,307 @@
+"""
+Personal data export (DataExport): one ZIP per request with
+
+  profile.json               the user row (no password)
+  settings.json              account, notification and payout preferences
+  fundraisers.ndjson         fundraisers the user owns, one JSON object per line
+  donations_made.csv         donations the user gave
+  donations_received.csv     donations to the user's fundraisers
+  recurring_donations.csv    the user's recurring donations
+  documents.csv              stored files (avatar, covers, fundraiser documents,
+                             receipts/statements) by storage path
+  manifest.json              what was exported and the row count of each file
+
+Requests only queue a DataExport row. `manage.py run_data_exports` claims
+them one at a time with FOR UPDATE SKIP LOCKED (several workers may run),
+builds the ZIP and uploads it. Memory stays flat however long the history:
+every table is read with .iterator() and written row by row into a
+deflated ZIP member inside a temp file on disk, and the finished file is
+handed to the storage as a file object (multipart upload on R2).
+
+When the export is ready the user gets an email with a signed download link
+(make_link / load_link). The link does not need a login, so it also works
+after the account is closed. Exports are deleted after EXPORT_KEEP_DAYS.
+"""
+import csv
+import io
+import json
+import logging
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.utils import timezone
+
+from .models import (
+    AccountSetting, DataExport, Donation, DonorDocument, Fundraiser, FundraiserDocument,
+    Notification, NotificationPreference, PayoutPreference, RecurringDonation, User,
+)
+from .receipts import receipt_number
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+MAX_ATTEMPTS = 3
+LINK_SALT = "accounts.exports"
+
+PROFILE_FIELDS = [
+    "id", "username", "first_name", "last_name", "email", "phone", "cnic",
+    "date_joined", "last_login", "is_active", "avatar",
+]
+FUNDRAISER_SKIP = {"supporters_sketch", "description_excerpt"}
+DONATIONS_MADE_COLUMNS = [
+    "id", "created_at", "fundraiser_id", "fundraiser__title", "amount", "tip_amount", "frequency_label",
+    "status", "payment_method", "card_number_last4", "is_anonymous", "donor_name", "message",
+]
+DONATIONS_RECEIVED_COLUMNS = [
+    "id", "created_at", "fundraiser_id", "fundraiser__title", "donor_display", "amount", "status", "message",
+]
+RECURRING_COLUMNS = [
+    "id", "fundraiser_id", "fundraiser__title", "frequency", "status", "amount", "tip_amount",
+    "payment_method", "started_at", "next_run_at", "last_run_at", "runs_count",
+]
+DOCUMENT_COLUMNS = ["kind", "id", "fundraiser_id", "name", "path", "created_at"]
+
+
+def _rest(model, skip=()):
+    """Column names of `model` without the id/user keys (and `skip`)."""
+    return [f.attname for f in model._meta.concrete_fields if f.name not in {"id", "user", *skip}]
+
+
+def _json_member(zf, name, obj):
+    with zf.open(name, "w") as raw:
+        raw.write(json.dumps(obj, cls=DjangoJSONEncoder, indent=2).encode())
+
+
+def _ndjson_member(zf, name, rows):
+    n = 0
+    with io.TextIOWrapper(zf.open(name, "w", force_zip64=True), encoding="utf-8") as out:
+        for row in rows:
+            out.write(json.dumps(row, cls=DjangoJSONEncoder))
+            out.write("\n")
+            n += 1
+    return n
+
+
+def _csv_member(zf, name, columns, rows):
+    n = 0
+    with io.TextIOWrapper(zf.open(name, "w", force_zip64=True), encoding="utf-8", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow([c.replace("__", "_") for c in columns])
+        for row in rows:
+            writer.writerow(row)
+            n += 1
+    return n
+
+
+def _one(model, user, fields):
+    return model.objects.filter(user=user).values(*fields).first()
+
+
+def _documents(user):
+    if user.avatar:
+        yield ("avatar", user.id, "", "", user.avatar.name, "")
+    owned = Fundraiser.objects.filter(owner=user)
+    covers = owned.exclude(image="").exclude(image__isnull=True).order_by("id").values_list("id", "title", "image", "created_at")
+    for fid, title, image, created in covers.iterator(chunk_size=CHUNK_SIZE):
+        yield ("fundraiser_cover", fid, fid, title, image, created)
+    docs = (
+        FundraiserDocument.objects.filter(fundraiser__owner=user)
+        .order_by("id").values_list("id", "fundraiser_id", "name", "file", "uploaded_at")
+    )
+    for did, fid, name, path, uploaded in docs.iterator(chunk_size=CHUNK_SIZE):
+        yield ("fundraiser_document", did, fid, name, path, uploaded)
+    receipts = (
+        DonorDocument.objects.filter(donor=user)
+        .order_by("id").values_list("kind", "id", "year", "donation_id", "file", "generated_at")
+    )
+    for kind, did, year, donation_id, path, generated in receipts.iterator(chunk_size=CHUNK_SIZE):
+        name = f"Statement {year}" if kind == DonorDocument.KIND_STATEMENT else f"Receipt {receipt_number(donation_id)}"
+        yield (kind, did, "", name, path, generated)
+
+
+def write_export(user, fileobj):
+    """Write the ZIP for `user` into the binary file object; returns {member: rows}."""
+    since = user.date_joined  # nothing predates the account; lets Postgres skip older donation partitions
+    rows = {}
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        _json_member(zf, "profile.json", User.objects.filter(id=user.id).values(*PROFILE_FIELDS).first())
+        _json_member(zf, "settings.json", {
+            "account": _one(AccountSetting, user, _rest(AccountSetting)),
+            "notifications": _one(NotificationPreference, user, _rest(NotificationPreference)),
+            "payout": _one(PayoutPreference, user, _rest(PayoutPreference)),
+        })
+
+        fundraisers = (
+            Fundraiser.objects.filter(owner=user).order_by("id")
+            .values(*_rest(Fundraiser, FUNDRAISER_SKIP))
+        )
+        rows["fundraisers.ndjson"] = _ndjson_member(
+            zf, "fundraisers.ndjson", fundraisers.iterator(chunk_size=CHUNK_SIZE),
+        )
+
+        made = (
+            Donation.objects.filter(donor=user, created_at__gte=since)
+            .order_by("created_at", "id").values_list(*DONATIONS_MADE_COLUMNS)
+        )
+        rows["donations_made.csv"] = _csv_member(
+            zf, "donations_made.csv", DONATIONS_MADE_COLUMNS, made.iterator(chunk_size=CHUNK_SIZE),
+        )
+
+        received = (
+            Donation.objects.filter(recipient=user, created_at__gte=since)
+            .annotate(donor_display=Case(
+                When(is_anonymous=True, then=Value("Anonymous")),
+                default=F("donor_name"),
+                output_field=CharField(),
+            ))
+            .order_by("created_at", "id").values_list(*DONATIONS_RECEIVED_COLUMNS)
+        )
+        rows["donations_received.csv"] = _csv_member(
+            zf, "donations_received.csv", DONATIONS_RECEIVED_COLUMNS, received.iterator(chunk_size=CHUNK_SIZE),
+        )
+
+        recurring = RecurringDonation.objects.filter(donor=user).order_by("id").values_list(*RECURRING_COLUMNS)
+        rows["recurring_donations.csv"] = _csv_member(
+            zf, "recurring_donations.csv", RECURRING_COLUMNS, recurring.iterator(chunk_size=CHUNK_SIZE),
+        )
+
+        rows["documents.csv"] = _csv_member(zf, "documents.csv", DOCUMENT_COLUMNS, _documents(user))
+
+        _json_member(zf, "manifest.json", {
+            "user_id": user.id,
+            "generated_at": timezone.now(),
+            "files": rows,
+            "note": "documents.csv lists stored files by path; they are not copied into this archive.",
+        })
+    return rows
+
+
+# ----------------------------
+# Queue
+# ----------------------------
+
+def request_export(user, reason=DataExport.REASON_REQUEST):
+    """The user's queued/running export, or a new one."""
+    with transaction.atomic():
+        User.objects.select_for_update().filter(id=user.id).first()  # one queued export per user
+        job = (
+            DataExport.objects
+            .filter(user=user, status__in=[DataExport.STATUS_PENDING, DataExport.STATUS_RUNNING])
+            .order_by("-id").first()
+        )
+        if job is None:
+            job = DataExport.objects.create(user=user, reason=reason)
+    return job
+
+
+def make_link(job):
+    token = signing.dumps(job.id, salt=LINK_SALT)
+    return f"{settings.EXPORT_LINK_BASE_URL.rstrip('/')}/api/auth/exports/{token}/download/"
+
+
+def load_link(token):
+    """The ready, unexpired export a download token points at, or None."""
+    try:
+        export_id = signing.loads(token, salt=LINK_SALT, max_age=settings.EXPORT_KEEP_DAYS * 86400)
+    except signing.BadSignature:
+        return None
+    return DataExport.objects.filter(
+        id=export_id, status=DataExport.STATUS_READY, expires_at__gt=timezone.now(),
+    ).first()
+
+
+def _claim(now):
+    lease = timedelta(seconds=settings.EXPORT_LEASE)
+    with transaction.atomic():
+        job = (
+            DataExport.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=DataExport.STATUS_PENDING)
+                | Q(status=DataExport.STATUS_RUNNING, started_at__lt=now - lease)
+            )
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = DataExport.STATUS_RUNNING
+        job.started_at = now
+        job.attempts += 1
+        job.save(update_fields=["status", "started_at", "attempts"])
+    return job
+
+
+def build(job):
+    user = User.objects.get(id=job.user_id)
+    with tempfile.TemporaryFile() as tmp:
+        rows = write_export(user, tmp)
+        size = tmp.tell()
+        tmp.seek(0)
+        stamp = timezone.now().strftime("%Y%m%d")
+        name = default_storage.save(f"exports/miraj-data-{user.id}-{stamp}.zip", File(tmp))
+
+    now = timezone.now()
+    with transaction.atomic():
+        job.file.name = name
+        job.size = size
+        job.rows = rows
+        job.status = DataExport.STATUS_READY
+        job.finished_at = now
+        job.expires_at = now + timedelta(days=settings.EXPORT_KEEP_DAYS)
+        job.last_error = ""
+        job.save()
+        if user.email:
+            Notification.objects.create(
+                user=user, channel=Notification.CHANNEL_EMAIL, kind=Notification.KIND_DATA_EXPORT,
+                destination=user.email, next_attempt_at=now,
+                data={"url": make_link(job), "expires_at": job.expires_at.isoformat()},
+            )
+    return job
+
+
+def run_pending(limit=None, log=logger.info):
+    """Build queued exports until none are left (or `limit` were attempted)."""
+    stats = {"ready": 0, "failed": 0, "retried": 0}
+    while limit is None or sum(stats.values()) < limit:
+        job = _claim(timezone.now())
+        if job is None:
+            break
+        try:
+            build(job)
+            stats["ready"] += 1
+            log(f"export {job.id} (user {job.user_id}): {job.size} bytes, {job.rows}")
+        except Exception as exc:
+            job.last_error = str(exc) or exc.__class__.__name__
+            if job.attempts >= MAX_ATTEMPTS:
+                job.status = DataExport.STATUS_FAILED
+                stats["failed"] += 1
+            else:
+                job.status = DataExport.STATUS_PENDING
+                stats["retried"] += 1
+            job.save(update_fields=["status", "last_error"])
+            log(f"export {job.id} (user {job.user_id}) failed: {job.last_error}")
+    return stats
+
+
+def purge_expired(now=None):
+    """Delete expired exports and their files, and failed jobs as old."""
+    now = now or timezone.now()
+    expired = DataExport.objects.filter(
+        Q(status=DataExport.STATUS_READY, expires_at__lt=now)
+        | Q(status=DataExport.STATUS_FAILED, created_at__lt=now - timedelta(days=settings.EXPORT_KEEP_DAYS))
+    )
+    deleted = 0
+    for job in expired.only("id", "file").iterator(chunk_size=CHUNK_SIZE):
+        if job.file:
+            default_storage.delete(job.file.name)
+        deleted += DataExport.objects.filter(id=job.id).delete()[0]
+    return deleted
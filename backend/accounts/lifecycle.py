@@ -0,0 +1,62 @@
+"""
+Fundraiser status transitions shared by the API and scheduled jobs.
+
+close_fundraisers() is the one way a fundraiser goes active -> closed, so the
+close endpoint and the expiry job always invalidate the same things:
+  * the public listing caches (versioned PUBLIC_NAMESPACE keys),
+  * the payout schedule: a closed fundraiser is settled on the next payout run
+    instead of waiting out the rest of its reimbursement period (or never, if
+    it had no schedule yet),
+  * recurring donations to it end (accounts.recurring),
+  * its donors are notified (accounts.notifications).
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .cache import bump_namespace
+from .metrics import FUNDRAISERS_CLOSED
+from .models import Fundraiser, NotificationEvent, RecurringDonation
+from .notifications import notify_fundraisers
+
+PUBLIC_NAMESPACE = "public_fundraisers"
+
+
+def invalidate_public_listings():
+    transaction.on_commit(lambda: bump_namespace(PUBLIC_NAMESPACE))
+
+
+@transaction.atomic
+def close_fundraisers(ids, now=None):
+    """Close the given active fundraisers with one UPDATE. Returns rows changed."""
+    now = now or timezone.now()
+    # fundraiser rows before their subscriptions, in id order (the donate view's
+    # order too); the recurring scheduler skips fundraisers locked here
+    closing = list(
+        Fundraiser.objects
+        .select_for_update()
+        .filter(id__in=ids, status=Fundraiser.STATUS_ACTIVE)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    closed = (
+        Fundraiser.objects
+        .filter(id__in=closing, status=Fundraiser.STATUS_ACTIVE)
+        .update(
+            status=Fundraiser.STATUS_CLOSED,
+            # settle on the next payout run, also if it was never scheduled
+            next_payout_at=Case(
+                When(next_payout_at__lte=now, then=F("next_payout_at")),
+                default=Value(now),
+            ),
+        )
+    )
+    if closed:
+        RecurringDonation.objects.filter(
+            fundraiser_id__in=closing,
+            status__in=[RecurringDonation.STATUS_ACTIVE, RecurringDonation.STATUS_UNCONFIRMED],
+        ).update(status=RecurringDonation.STATUS_ENDED)
+        notify_fundraisers(NotificationEvent.KIND_FUNDRAISER_CLOSED, closing)
+        invalidate_public_listings()
+        transaction.on_commit(lambda: FUNDRAISERS_CLOSED.inc(closed))
+    return closed
@@ -0,0 +1,88 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from accounts import throttling
+from accounts.cache import make_key
+from accounts.throttling import ScopedIPThrottle
+
+
+class _FixedRateThrottle(ScopedIPThrottle):
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.rate = rate
+
+    def get_rate(self, view):
+        return self.scope, self.rate
+
+
+class _View:
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of accounts.throttling against the configured cache. "
+        "Each run uses its own throttle scope and deletes only its own counters afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000)
+        parser.add_argument("--clients", type=int, default=500, help="distinct client IPs to rotate through")
+
+    def handle(self, *args, **opts):
+        n = opts["iterations"]
+        factory = RequestFactory()
+        requests = [
+            factory.get("/", REMOTE_ADDR=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}")
+            for i in range(opts["clients"])
+        ]
+        view = _View()
+
+        self.stdout.write(f"cache backend: {settings.CACHES['default']['BACKEND']}")
+        self.stdout.write(f"iterations: {n}, clients: {len(requests)}")
+
+        def cleanup(scope, rate, started, finished):
+            _, period = throttling.parse_rate(rate)
+            windows = range(int(started // period) - 1, int(finished // period) + 1)
+            cache.delete_many([
+                make_key("rl", f"{scope}:{r.META['REMOTE_ADDR']}", w) for r in requests for w in windows
+            ])
+            for r in requests:
+                throttling._local_blocks.pop(f"{scope}:{r.META['REMOTE_ADDR']}", None)
+
+        def run(label, rate=None, reset_local=False):
+            # a fresh scope per run: no counters from an earlier run, nothing else in the cache touched
+            scope = f"bench-{uuid.uuid4().hex[:12]}"
+            throttle = _FixedRateThrottle(scope, rate) if rate else None
+            allowed = 0
+            wall = time.time()
+            started = time.perf_counter()
+            try:
+                for i in range(n):
+                    if reset_local:
+                        throttling._local_blocks.clear()
+                    if throttle is None or throttle.allow_request(requests[i % len(requests)], view):
+                        allowed += 1
+                elapsed = time.perf_counter() - started
+            finally:
+                if rate:
+                    cleanup(scope, rate, wall, time.time())
+            self.stdout.write(
+                f"{label:<34} {n / elapsed:>12,.0f} req/s  {elapsed / n * 1e6:>8.2f} us/req  allowed={allowed}"
+            )
+            return elapsed / n
+
+        base = run("baseline (no throttle)")
+        allow = run("allowed (under limit)", "1000000/min")
+        deny_local = run("denied (in-process pre-check)", "1/min")
+        deny_cache = run("denied (shared cache only)", "1/min", reset_local=True)
+
+        self.stdout.write("")
+        self.stdout.write(f"overhead per allowed request: {(allow - base) * 1e6:.2f} us")
+        self.stdout.write(f"overhead per denied request:  {(deny_local - base) * 1e6:.2f} us "
+                          f"(vs {(deny_cache - base) * 1e6:.2f} us without the pre-check)")
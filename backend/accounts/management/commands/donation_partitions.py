@@ -0,0 +1,58 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain the monthly donation partitions (Postgres): create upcoming months "
+        "and, with --archive-after, snapshot old months to gzip CSVs in the default storage "
+        "(optionally moving them to a cold --tablespace). Archived months stay attached."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=3)
+        parser.add_argument(
+            "--archive-after", type=int, metavar="MONTHS",
+            help="archive partitions that ended more than MONTHS months ago",
+        )
+        parser.add_argument("--tablespace", default="", help="move archived partitions to this tablespace")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        if not partitions.is_partitioned():
+            raise CommandError("The donation table is not partitioned on this database (Postgres only).")
+
+        today = date.today()
+        existing = partitions.list_partitions()
+        self.stdout.write(
+            f"partitions: {len(existing)}"
+            + (f" ({existing[0][1]:%Y-%m} .. {existing[-1][1]:%Y-%m})" if existing else "")
+        )
+
+        if opts["dry_run"]:
+            have = {m for _, m in existing}
+            current = partitions.month_start(today)
+            missing = [
+                partitions.add_months(current, i) for i in range(opts["months_ahead"] + 1)
+                if partitions.add_months(current, i) not in have
+            ]
+            self.stdout.write(f"would create: {[f'{m:%Y-%m}' for m in missing]}")
+        else:
+            for name in partitions.ensure_partitions(opts["months_ahead"], today):
+                self.stdout.write(f"created {name}")
+
+        if opts["archive_after"] is None:
+            return
+
+        cutoff = partitions.add_months(partitions.month_start(today), -opts["archive_after"])
+        for name, month in partitions.archivable(cutoff):
+            if opts["dry_run"]:
+                self.stdout.write(f"would archive {name}")
+                continue
+            path, rows = partitions.archive_partition(name, month, opts["tablespace"])
+            self.stdout.write(f"archived {name}: {rows} rows" + (f" -> {path}" if path else " (snapshot exists)"))
+
+        self.stdout.write(self.style.SUCCESS("Done."))
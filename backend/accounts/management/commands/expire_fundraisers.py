@@ -0,0 +1,66 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.cache import make_key, set_value
+from accounts.lifecycle import close_fundraisers
+from accounts.models import Fundraiser
+
+STATS_KEY = make_key("jobs", "expire_fundraisers")
+
+
+class Command(BaseCommand):
+    help = (
+        "Close active fundraisers whose deadline has passed, one UPDATE per chunk "
+        "over the (status, deadline) index. Run it from cron, e.g. hourly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="date (YYYY-MM-DD) to treat as today")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="only count overdue fundraisers")
+
+    def handle(self, *args, **opts):
+        today = timezone.localdate()
+        if opts["as_of"]:
+            try:
+                today = date.fromisoformat(opts["as_of"])
+            except ValueError:
+                raise CommandError("--as-of must be YYYY-MM-DD")
+
+        # deadline day itself still counts as open (daysLeft: 0)
+        overdue = Fundraiser.objects.filter(status=Fundraiser.STATUS_ACTIVE, deadline__lt=today)
+
+        if opts["dry_run"]:
+            self.stdout.write(f"overdue fundraisers: {overdue.count()}")
+            return
+
+        started = time.monotonic()
+        closed = batches = 0
+        last_id = 0
+        while True:
+            ids = list(
+                overdue.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:opts["batch_size"]]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            closed += close_fundraisers(ids)
+            batches += 1
+
+        stats = {
+            "finished_at": timezone.now().isoformat(),
+            "as_of": today.isoformat(),
+            "closed": closed,
+            "batches": batches,
+            "duration_ms": int((time.monotonic() - started) * 1000),
+        }
+        set_value(STATS_KEY, stats, None)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {closed} fundraisers in {batches} batches ({stats['duration_ms']} ms)."
+        ))
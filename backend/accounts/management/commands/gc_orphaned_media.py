@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.blobs import BLOB_DIR, purge_unreferenced
+from accounts.media import PAGE_SIZE, delete_objects, list_objects
+from accounts import orphans
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete storage objects under the upload directories (avatars, cover images, "
+        "documents, payout exports) that no database row references."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="only report the orphans")
+        parser.add_argument(
+            "--min-age-hours", type=float, default=24,
+            help="skip objects newer than this (uploads whose row is not committed yet)",
+        )
+        parser.add_argument("--prefix", action="append", help="only scan this upload directory (repeatable)")
+        parser.add_argument("--batch-size", type=int, default=PAGE_SIZE, help=f"keys per delete request (max {PAGE_SIZE})")
+        parser.add_argument("--local-root", help="run against a local directory instead of the default storage")
+
+    def handle(self, *args, **opts):
+        if not 1 <= opts["batch_size"] <= PAGE_SIZE:
+            raise CommandError(f"--batch-size must be between 1 and {PAGE_SIZE}")
+
+        storage = FileSystemStorage(location=opts["local_root"]) if opts["local_root"] else default_storage
+        known = orphans.reference_prefixes()
+        prefixes = opts["prefix"] or known
+        unknown = set(prefixes) - set(known)
+        if unknown:
+            raise CommandError(f"not an upload directory: {', '.join(sorted(unknown))}")
+
+        cutoff = timezone.now() - timedelta(hours=opts["min_age_hours"])
+
+        # blobs nothing has pointed at since the cutoff; their objects go with the rows
+        purged = purged_bytes = 0
+        if BLOB_DIR + "/" in prefixes:
+            purged, purged_bytes = purge_unreferenced(cutoff, dry_run=opts["dry_run"], storage=storage)
+
+        orphans.create_listing_table()
+        try:
+            listed = skipped = 0
+            for prefix in prefixes:
+                for page in list_objects(prefix, storage):
+                    rows = [(name, size) for name, size, modified in page if modified < cutoff]
+                    skipped += len(page) - len(rows)
+                    listed += len(rows)
+                    if rows:
+                        orphans.add_listed(rows)
+
+            found = deleted = freed = 0
+            failed = []
+            for page in orphans.orphan_pages(opts["batch_size"]):
+                found += len(page)
+                if opts["dry_run"]:
+                    for name, size in page:
+                        self.stdout.write(f"orphan: {name} ({size} bytes)")
+                    freed += sum(size for _, size in page)
+                    continue
+                ok, bad = delete_objects([name for name, _ in page], storage)
+                deleted += ok
+                failed += bad
+                bad = set(bad)
+                freed += sum(size for name, size in page if name not in bad)
+        finally:
+            orphans.drop_listing_table()
+
+        summary = f"unreferenced blobs {purged} ({purged_bytes} bytes), listed {listed}, too new {skipped}, orphans {found}"
+        if opts["dry_run"]:
+            self.stdout.write(f"[dry-run] {summary}, {freed} bytes would be freed")
+            return
+        for name in failed:
+            self.stderr.write(f"could not delete: {name}")
+        self.stdout.write(self.style.SUCCESS(f"{summary}, deleted {deleted} ({freed} bytes)"))
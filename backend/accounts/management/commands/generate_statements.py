@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.receipts import regenerate_year
+
+
+class Command(BaseCommand):
+    help = (
+        "Build every donor's annual donation statement for a year from one streamed, "
+        "donor-ordered query, rendering and uploading in parallel threads. Statements "
+        "whose donations have not changed are skipped unless --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="calendar year (default: last year)")
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--force", action="store_true", help="re-render unchanged statements too")
+
+    def handle(self, *args, **opts):
+        year = opts["year"] or timezone.localdate().year - 1
+        if not 2000 <= year <= timezone.localdate().year:
+            raise CommandError("--year is out of range")
+        if opts["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        started = time.monotonic()
+        stats = regenerate_year(year, workers=opts["workers"], force=opts["force"], log=self.stdout.write)
+        elapsed = int((time.monotonic() - started) * 1000)
+
+        self.stdout.write(
+            f"{year}: {stats['donors']} donors, {stats['written']} written, "
+            f"{stats['skipped']} unchanged, {stats['failed']} failed ({elapsed} ms)"
+        )
+        if stats["failed"]:
+            raise CommandError(f"{stats['failed']} statements failed; re-run to retry them")
+        self.stdout.write(self.style.SUCCESS("Statements generated."))
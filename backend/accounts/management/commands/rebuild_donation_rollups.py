@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Lower, Trim, TruncDay, TruncHour
+
+from accounts.models import Donation, DonationRollup
+from accounts.rollups import RECURRING_LABELS
+
+TRUNC = {
+    DonationRollup.GRANULARITY_HOUR: TruncHour,
+    DonationRollup.GRANULARITY_DAY: TruncDay,
+}
+
+
+class Command(BaseCommand):
+    help = "Recompute DonationRollup rows from Donation with set-based aggregation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fundraiser", type=int, help="only rebuild this fundraiser")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        batch_size = opts["batch_size"]
+
+        donations = Donation.objects.filter(status=Donation.STATUS_RECEIVED, fundraiser__isnull=False)
+        rollups = DonationRollup.objects.all()
+        if opts["fundraiser"]:
+            donations = donations.filter(fundraiser_id=opts["fundraiser"])
+            rollups = rollups.filter(fundraiser_id=opts["fundraiser"])
+
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            created = 0
+
+            for granularity, trunc in TRUNC.items():
+                grouped = (
+                    donations
+                    .annotate(bucket=trunc("created_at"), frequency=Lower(Trim("frequency_label")))
+                    .values("fundraiser_id", "recipient_id", "bucket", "payment_method")
+                    .annotate(
+                        n=Count("id"),
+                        recurring=Count("id", filter=Q(frequency__in=RECURRING_LABELS)),
+                        amount=Sum("amount"),
+                        tips=Sum("tip_amount"),
+                    )
+                    .order_by()
+                )
+
+                batch = []
+                for row in grouped.iterator(chunk_size=batch_size):
+                    batch.append(DonationRollup(
+                        fundraiser_id=row["fundraiser_id"],
+                        recipient_id=row["recipient_id"],
+                        granularity=granularity,
+                        bucket_start=row["bucket"],
+                        payment_method=row["payment_method"] or "",
+                        donations_count=row["n"],
+                        recurring_count=row["recurring"],
+                        amount_total=row["amount"] or 0,
+                        tip_total=row["tips"] or 0,
+                    ))
+                    if len(batch) >= batch_size:
+                        DonationRollup.objects.bulk_create(batch)
+                        created += len(batch)
+                        batch = []
+                if batch:
+                    DonationRollup.objects.bulk_create(batch)
+                    created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rollups rebuilt: deleted={deleted} created={created}"))
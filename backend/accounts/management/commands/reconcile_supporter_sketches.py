@@ -0,0 +1,108 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from accounts.models import Donation, Fundraiser
+from accounts.sketches import HyperLogLog, STD_ERROR, merge_sketches
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Fundraiser.supporters_count (HyperLogLog) with exact COUNT(DISTINCT donor) "
+        "and report the error. --rebuild recomputes every sketch from Donation first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="rebuild all sketches from donations")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        chunk = opts["chunk_size"]
+        if opts["rebuild"]:
+            self._rebuild(chunk)
+
+        checked = 0
+        errors = []
+        worst = (0.0, None)
+        last_id = 0
+        while True:
+            batch = list(
+                Fundraiser.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "supporters_count")[:chunk]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            exact = dict(
+                self._received()
+                .filter(fundraiser_id__in=[fid for fid, _ in batch])
+                .values("fundraiser_id")
+                .annotate(n=Count("donor_id", distinct=True))
+                .values_list("fundraiser_id", "n")
+            )
+            for fid, estimate in batch:
+                n = exact.get(fid, 0)
+                err = abs(estimate - n) / n if n else float(estimate > 0)
+                errors.append(err)
+                if err > worst[0]:
+                    worst = (err, fid)
+                checked += 1
+
+        # one merged check: union of all sketches vs. distinct donors overall
+        union = merge_sketches(
+            Fundraiser.objects.exclude(supporters_sketch=b"").values_list("supporters_sketch", flat=True).iterator()
+        ).estimate()
+        union_exact = self._received().aggregate(n=Count("donor_id", distinct=True))["n"]
+
+        bound = 3 * STD_ERROR
+        outside = sum(1 for e in errors if e > bound)
+        mean = sum(errors) / len(errors) if errors else 0.0
+        self.stdout.write(f"fundraisers checked: {checked}")
+        self.stdout.write(f"mean relative error: {mean:.4f} (std error of the sketch {STD_ERROR:.4f})")
+        self.stdout.write(f"worst: {worst[0]:.4f} (fundraiser {worst[1]})")
+        self.stdout.write(f"outside 3 sigma ({bound:.4f}): {outside}")
+        self.stdout.write(f"merged all fundraisers: estimate={union} exact={union_exact}")
+        if outside:
+            self.stdout.write(self.style.WARNING("Some sketches exceed the expected error; run with --rebuild."))
+        else:
+            self.stdout.write(self.style.SUCCESS("All sketches within bounds."))
+
+    def _received(self):
+        return Donation.objects.filter(
+            status=Donation.STATUS_RECEIVED, fundraiser__isnull=False, donor__isnull=False
+        )
+
+    def _rebuild(self, chunk):
+        Fundraiser.objects.update(supporters_sketch=b"", supporters_count=0)
+        pending = []
+
+        def save(fundraiser_id, sketch):
+            pending.append(Fundraiser(
+                id=fundraiser_id,
+                supporters_sketch=sketch.to_bytes(),
+                supporters_count=sketch.estimate(),
+            ))
+            if len(pending) >= chunk:
+                Fundraiser.objects.bulk_update(pending, ["supporters_sketch", "supporters_count"])
+                pending.clear()
+
+        # one streamed pass ordered by fundraiser; only one sketch in memory at a time
+        rows = (
+            self._received()
+            .order_by("fundraiser_id")
+            .values_list("fundraiser_id", "donor_id")
+            .iterator(chunk_size=5000)
+        )
+        current_id, sketch = None, None
+        for fundraiser_id, donor_id in rows:
+            if fundraiser_id != current_id:
+                if current_id is not None:
+                    save(current_id, sketch)
+                current_id, sketch = fundraiser_id, HyperLogLog()
+            sketch.add(donor_id)
+        if current_id is not None:
+            save(current_id, sketch)
+        if pending:
+            Fundraiser.objects.bulk_update(pending, ["supporters_sketch", "supporters_count"])
+        self.stdout.write("Sketches rebuilt.")
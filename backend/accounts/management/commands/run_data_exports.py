@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.cache import make_key, set_value
+from accounts.exports import purge_expired, run_pending
+
+STATS_KEY = make_key("jobs", "run_data_exports")
+
+
+class Command(BaseCommand):
+    help = (
+        "Build queued personal data exports (ZIP, streamed through a temp file) and upload "
+        "them, then delete expired ones. Jobs are claimed with FOR UPDATE SKIP LOCKED, so "
+        "several may run at once. Run it from cron, or with --loop as a long-running worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="keep running, polling every --interval seconds")
+        parser.add_argument("--interval", type=float, default=10.0)
+        parser.add_argument("--limit", type=int, default=None, help="stop after this many jobs per pass")
+
+    def handle(self, *args, **opts):
+        while True:
+            started = time.monotonic()
+            stats = run_pending(opts["limit"], log=self.stdout.write)
+            stats["purged"] = purge_expired()
+            if any(stats.values()):
+                self.stdout.write(
+                    f"exports ready: {stats['ready']}, retried: {stats['retried']}, "
+                    f"failed: {stats['failed']}, expired removed: {stats['purged']}"
+                )
+                set_value(STATS_KEY, {
+                    **stats,
+                    "finished_at": timezone.now().isoformat(),
+                    "duration_ms": int((time.monotonic() - started) * 1000),
+                }, None)
+
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.reimbursements import run_payouts
+
+
+class Command(BaseCommand):
+    help = (
+        "Settle fundraisers whose reimbursement cycle is due: write ledger entries "
+        "into per-method payout batches and export each batch as CSV. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="ISO datetime to treat as now (default: now)")
+        parser.add_argument("--run-key", help="batch key (default: the as-of date)")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="report what would be paid, write nothing")
+
+    def handle(self, *args, **opts):
+        now = timezone.now()
+        if opts["as_of"]:
+            now = parse_datetime(opts["as_of"])
+            if now is None:
+                raise CommandError("--as-of must be an ISO datetime")
+            if timezone.is_naive(now):
+                now = timezone.make_aware(now)
+        run_key = opts["run_key"] or timezone.localtime(now).date().isoformat()
+
+        stats = run_payouts(
+            now,
+            run_key,
+            chunk_size=opts["chunk_size"],
+            dry_run=opts["dry_run"],
+            log=self.stdout.write,
+        )
+
+        self.stdout.write(f"scheduled: {stats['scheduled']}")
+        self.stdout.write(f"due fundraisers: {stats['due']}")
+        self.stdout.write(f"ledger entries: {stats['entries']} totalling {stats['amount']}")
+        if stats["no_method"]:
+            self.stdout.write(self.style.WARNING(f"owed but no enabled payout method: {stats['no_method']}"))
+        for method, count, total in stats.get("batches", []):
+            self.stdout.write(f"  batch {run_key}/{method}: {count} entries, {total}")
+        self.stdout.write(self.style.SUCCESS("Dry run finished." if opts["dry_run"] else "Payout run finished."))
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import Notification
+from accounts.notifications import deliver, fan_out, purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan queued notification events out to their recipients (honouring their "
+        "notification preferences) and deliver due emails/SMS in batches, with retries. "
+        "Run it from cron, or with --loop as a long-running worker; several may run at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="keep running, polling every --interval seconds")
+        parser.add_argument("--interval", type=float, default=5.0)
+        parser.add_argument("--event-batch", type=int, default=500)
+        parser.add_argument("--send-batch", type=int, default=100)
+
+    def handle(self, *args, **opts):
+        last_purge = 0.0
+        while True:
+            events = sent = 0
+            while n := fan_out(opts["event_batch"]):
+                events += n
+            for channel, _ in Notification.CHANNEL_CHOICES:
+                while n := deliver(channel, opts["send_batch"]):
+                    sent += n
+            if events or sent:
+                self.stdout.write(f"events: {events}, notifications attempted: {sent}")
+
+            if time.monotonic() - last_purge > 3600:
+                purged = purge(timezone.now() - timedelta(days=settings.NOTIFY_KEEP_DAYS))
+                if purged:
+                    self.stdout.write(f"purged {purged} old events/notifications")
+                last_purge = time.monotonic()
+
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
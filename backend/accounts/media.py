@@ -0,0 +1,125 @@
+"""
+Storage URL helpers, plus bucket listing/deletion for maintenance jobs.
+
+On R2 (config/settings.py STORAGES) every url() is a freshly presigned URL,
+an HMAC computed per call, so list responses collect their file names and
+sign each distinct name once with signed_urls(). Signed URLs expire, so list
+payloads cache the names and sign on the way out. cached_signed_url() is for
+single documents fetched again and again (receipts): the URL is kept for half
+its lifetime, so a cached one always has at least that much left.
+
+list_objects() / delete_objects() work on the S3 (R2) storage with paged
+ListObjectsV2 and multi-object DeleteObjects, and on FileSystemStorage as a
+local stand-in.
+"""
+import datetime
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .cache import get_value, make_key, set_value
+from .metrics import STORAGE_SIGN_LATENCY
+
+# DeleteObjects and ListObjectsV2 both cap at 1000 keys per call
+PAGE_SIZE = 1000
+
+
+def signed_url(name):
+    if not name:
+        return ""
+    started = time.perf_counter()
+    try:
+        return default_storage.url(name)
+    except Exception:
+        return ""
+    finally:
+        STORAGE_SIGN_LATENCY.observe(time.perf_counter() - started)
+
+
+def cached_signed_url(name):
+    if not name:
+        return ""
+    key = make_key("signed_url", name)
+    url = get_value(key)
+    if url is None:
+        url = signed_url(name)
+        if url:
+            set_value(key, url, max(settings.AWS_QUERYSTRING_EXPIRE // 2, 1))
+    return url
+
+
+def signed_urls(names):
+    """{name: url} for every distinct non-empty name."""
+    return {name: signed_url(name) for name in set(names) if name}
+
+
+def _is_s3(storage):
+    return hasattr(storage, "bucket_name") and hasattr(storage, "connection")
+
+
+def _s3_key(storage, name):
+    location = (storage.location or "").strip("/")
+    return f"{location}/{name}" if location else name
+
+
+def _s3_pages(storage, prefix):
+    location = (storage.location or "").strip("/")
+    strip = len(location) + 1 if location else 0
+    paginator = storage.connection.meta.client.get_paginator("list_objects_v2")
+    pages = paginator.paginate(
+        Bucket=storage.bucket_name,
+        Prefix=_s3_key(storage, prefix),
+        PaginationConfig={"PageSize": PAGE_SIZE},
+    )
+    for page in pages:
+        yield [(o["Key"][strip:], o["Size"], o["LastModified"]) for o in page.get("Contents", [])]
+
+
+def _local_pages(storage, prefix):
+    root = storage.path("")
+    top = os.path.join(root, prefix)
+    page = []
+    for dirpath, dirnames, filenames in os.walk(top):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            st = os.stat(path)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            modified = datetime.datetime.fromtimestamp(st.st_mtime, tz=datetime.timezone.utc)
+            page.append((name, st.st_size, modified))
+            if len(page) >= PAGE_SIZE:
+                yield page
+                page = []
+    if page:
+        yield page
+
+
+def list_objects(prefix, storage=default_storage):
+    """Pages of [(name, size, last_modified)] under `prefix`, one listing call per page."""
+    if _is_s3(storage):
+        return _s3_pages(storage, prefix)
+    return _local_pages(storage, prefix)
+
+
+def delete_objects(names, storage=default_storage):
+    """Delete up to PAGE_SIZE names per request. Returns (deleted, failed names)."""
+    names = list(names)
+    failed = []
+    if _is_s3(storage):
+        client = storage.connection.meta.client
+        for i in range(0, len(names), PAGE_SIZE):
+            chunk = names[i:i + PAGE_SIZE]
+            resp = client.delete_objects(
+                Bucket=storage.bucket_name,
+                Delete={"Objects": [{"Key": _s3_key(storage, n)} for n in chunk], "Quiet": True},
+            )
+            failed += [e["Key"] for e in resp.get("Errors", [])]
+    else:
+        for name in names:
+            try:
+                storage.delete(name)
+            except OSError:
+                failed.append(name)
+    return len(names) - len(failed), failed
@@ -0,0 +1,130 @@
+"""
+Prometheus metrics, served at /metrics (staff users or METRICS_TOKEN).
+
+Counters and histograms are updated in-process. Under gunicorn, point
+PROMETHEUS_MULTIPROC_DIR at an empty directory shared by the workers (clear it
+on every deploy): prometheus_client then keeps each worker's values in mmap'd
+files there and a scrape merges all of them, whichever worker serves it.
+Without it (runserver, tests) the default in-process registry is used.
+
+Rates come from counters on the Prometheus side, e.g. donations per minute
+is rate(donations_total[1m]) * 60. Gauges that are cheap to read from the
+database (active fundraisers) are computed at scrape time rather than
+tracked per worker.
+"""
+import os
+import time
+
+from django.db import connection
+from django.db.models import Count
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per request",
+    ["route"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL queries per request",
+    ["route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+DONATIONS = Counter("donations", "Donations received", ["payment_method"])
+DONATION_AMOUNT = Counter("donation_amount", "Amount of donations received (PKR)")
+FUNDRAISERS_PUBLISHED = Counter("fundraisers_published", "Fundraisers published")
+FUNDRAISERS_CLOSED = Counter("fundraisers_closed", "Fundraisers closed (owner or deadline)")
+
+NOTIFICATIONS = Counter("notifications", "Notification deliveries (accounts.notifications)", ["channel", "result"])
+
+CACHE_LOOKUPS = Counter("cache_lookups", "Shared cache lookups through accounts.cache", ["result"])
+STORAGE_SIGN_LATENCY = Histogram(
+    "storage_sign_duration_seconds", "Time to build one signed storage URL",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+
+
+def donations_received(donations):
+    for d in donations:
+        DONATIONS.labels(d.payment_method or "unknown").inc()
+        DONATION_AMOUNT.inc(float(d.amount or 0))
+
+
+def cache_lookups(hits, misses):
+    if hits:
+        CACHE_LOOKUPS.labels("hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels("miss").inc(misses)
+
+
+class _QueryTimer:
+    __slots__ = ("seconds", "count")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Latency and SQL time per resolved route (the URL pattern, not the path)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        timer = _QueryTimer()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+        REQUEST_DB_TIME.labels(route).observe(timer.seconds)
+        REQUEST_DB_QUERIES.labels(route).observe(timer.count)
+        return response
+
+
+class BusinessCollector:
+    """Gauges read from the database when scraped."""
+
+    def collect(self):
+        from .models import Fundraiser
+
+        by_status = GaugeMetricFamily("fundraisers", "Fundraisers by status", labels=["status"])
+        counts = dict(
+            Fundraiser.objects.order_by().values("status").annotate(n=Count("id")).values_list("status", "n")
+        )
+        for status, _ in Fundraiser.STATUS_CHOICES:
+            by_status.add_metric([status], counts.get(status, 0))
+        yield by_status
+
+
+_business = CollectorRegistry(auto_describe=False)
+_business.register(BusinessCollector())
+
+
+def render():
+    """(body, content type) for a scrape."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_business), CONTENT_TYPE_LATEST
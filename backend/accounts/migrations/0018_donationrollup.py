@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_donation_card_expiry_donation_card_holder_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('payment_method', models.CharField(blank=True, default='', max_length=30)),
+                ('donations_count', models.PositiveIntegerField(default=0)),
+                ('recurring_count', models.PositiveIntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tip_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fundraiser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donation_rollups', to='accounts.fundraiser')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donation_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recipient', 'granularity', 'bucket_start'], name='rollup_recipient_range')],
+                'constraints': [models.UniqueConstraint(fields=('fundraiser', 'granularity', 'bucket_start', 'payment_method'), name='uniq_donation_rollup_bucket')],
+            },
+        ),
+    ]
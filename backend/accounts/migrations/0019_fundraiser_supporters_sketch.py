@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_donationrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fundraiser',
+            name='supporters_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fundraiser',
+            name='supporters_sketch',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
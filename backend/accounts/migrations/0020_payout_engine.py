@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_closed(apps, schema_editor):
+    """Fundraisers closed before the payout engine settle once, on its first run."""
+    Fundraiser = apps.get_model("accounts", "Fundraiser")
+    Fundraiser.objects.filter(status="closed").update(next_payout_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_fundraiser_supporters_sketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fundraiser',
+            name='next_payout_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PayoutBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_key', models.CharField(max_length=40)),
+                ('method', models.CharField(choices=[('bank', 'Bank Account'), ('nayapay', 'NayaPay'), ('sadapay', 'SadaPay'), ('jazzcash', 'JazzCash'), ('easypaisa', 'EasyPaisa'), ('raast', 'Raast')], max_length=20)),
+                ('entries_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('export_file', models.FileField(blank=True, null=True, upload_to='payout_batches/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('run_key', 'method')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PayoutLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('bank', 'Bank Account'), ('nayapay', 'NayaPay'), ('sadapay', 'SadaPay'), ('jazzcash', 'JazzCash'), ('easypaisa', 'EasyPaisa'), ('raast', 'Raast')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('period_end', models.DateTimeField()),
+                ('bank_account_title', models.CharField(blank=True, default='', max_length=120)),
+                ('bank_account_number', models.CharField(blank=True, default='', max_length=60)),
+                ('bank_iban', models.CharField(blank=True, default='', max_length=50)),
+                ('bank_raast_id', models.CharField(blank=True, default='', max_length=80)),
+                ('phone_number', models.CharField(blank=True, default='', max_length=30)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='accounts.payoutbatch')),
+                ('fundraiser', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='payout_entries', to='accounts.fundraiser')),
+            ],
+            options={
+                'unique_together': {('fundraiser', 'period_end')},
+            },
+        ),
+        migrations.RunPython(schedule_closed, migrations.RunPython.noop),
+    ]
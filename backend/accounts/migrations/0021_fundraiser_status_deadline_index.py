@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_payout_engine'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(fields=['status', 'deadline'], name='fundraiser_status_deadline'),
+        ),
+    ]
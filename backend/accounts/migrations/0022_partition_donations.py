@@ -0,0 +1,151 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:10
+
+from datetime import date
+
+from django.db import migrations
+
+TABLE = "accounts_donation"
+OLD = "accounts_donation_unpartitioned"
+
+# months of partitions created ahead of today; `donation_partitions` keeps this topped up
+MONTHS_AHEAD = 3
+
+
+def _add_months(d, n):
+    m = d.year * 12 + d.month - 1 + n
+    return date(m // 12, m % 12 + 1, 1)
+
+
+def _rename_owned(cursor, table, suffix):
+    """Rename the PK constraint and indexes of `table` so the new table can reuse the names."""
+    cursor.execute(
+        """
+        SELECT ic.relname, con.conname IS NOT NULL
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid AND con.contype = 'p'
+        WHERE i.indrelid = %s::regclass
+        """,
+        [table],
+    )
+    renamed = []
+    for name, is_pk in cursor.fetchall():
+        new = (name + suffix)[:63]
+        if is_pk:
+            cursor.execute(f'ALTER TABLE "{table}" RENAME CONSTRAINT "{name}" TO "{new}"')
+        else:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{new}"')
+        renamed.append((name, new, is_pk))
+    return renamed
+
+
+def _copy_indexes_and_fks(cursor, src, dst, renamed, suffix):
+    # secondary indexes, under their original names
+    for name, new, is_pk in renamed:
+        if is_pk:
+            continue
+        cursor.execute("SELECT pg_get_indexdef(%s::regclass)", [new])
+        indexdef = cursor.fetchone()[0]
+        head, _, tail = indexdef.partition(" ON ")
+        head = head.replace(f'"{new}"', f'"{name}"').replace(f" {new}", f" {name}")
+        tail = tail.replace(f"{src} ", f"{dst} ", 1)
+        cursor.execute(f"{head} ON {tail}")
+
+    # foreign keys out of the table
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [src],
+    )
+    for name, definition in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE "{src}" RENAME CONSTRAINT "{name}" TO "{(name + suffix)[:63]}"')
+        cursor.execute(f'ALTER TABLE "{dst}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def _move_sequence(cursor, src, dst):
+    cursor.execute("SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'", [src])
+    identity = cursor.fetchone()[0]
+    if identity:
+        # the new table got its own identity sequence (INCLUDING IDENTITY): continue from max(id)
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE((SELECT max(id) FROM \"{dst}\"), 0) + 1, false)",
+            [dst],
+        )
+    else:
+        # serial: the default still points at the old sequence, hand its ownership over
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [src])
+        seq = cursor.fetchone()[0]
+        if seq:
+            cursor.execute(f'ALTER SEQUENCE {seq} OWNED BY "{dst}".id')
+
+
+def partition_donations(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD}"')
+        renamed = _rename_owned(cursor, OLD, "_unpart")
+
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{OLD}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+            f"INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE (created_at)"
+        )
+        # a partitioned table's PK must contain the partition key
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, created_at)')
+        _copy_indexes_and_fks(cursor, OLD, TABLE, renamed, "_unpart")
+
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'SELECT min(created_at) FROM "{OLD}"')
+        oldest = cursor.fetchone()[0]
+        today = date.today()
+        month = date((oldest or today).year, (oldest or today).month, 1)
+        last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+        while month <= last:
+            nxt = _add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [month.isoformat(), nxt.isoformat()],
+            )
+            month = nxt
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD}"')
+        _move_sequence(cursor, OLD, TABLE)
+        cursor.execute(f'DROP TABLE "{OLD}"')
+
+
+def unpartition_donations(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        if cursor.fetchone() is None:
+            return
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD}"')
+        renamed = _rename_owned(cursor, OLD, "_part")
+
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{OLD}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+            f"INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id)')
+        _copy_indexes_and_fks(cursor, OLD, TABLE, renamed, "_part")
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD}"')
+        _move_sequence(cursor, OLD, TABLE)
+        # drops the partitions with it
+        cursor.execute(f'DROP TABLE "{OLD}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_fundraiser_status_deadline_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_donations, unpartition_donations),
+    ]
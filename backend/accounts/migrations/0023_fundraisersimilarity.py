@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_partition_donations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FundraiserSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now_add=True)),
+                ('fundraiser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_links', to='accounts.fundraiser')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='accounts.fundraiser')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fundraiser', 'rank'), name='uniq_similarity_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:05
+
+import html
+import re
+
+from django.db import migrations, models
+
+# accounts.models.make_excerpt as of this migration, kept here so later
+# changes to it (or to the models module) don't alter this backfill
+EXCERPT_LENGTH = 160
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    text = " ".join(html.unescape(_TAGS.sub(" ", text or "")).split())
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    if " " in cut[length // 2:]:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:-") + "…"
+
+
+def backfill_excerpts(apps, schema_editor):
+    Fundraiser = apps.get_model("accounts", "Fundraiser")
+    batch = []
+    for f in Fundraiser.objects.only("id", "description").iterator(chunk_size=1000):
+        f.description_excerpt = make_excerpt(f.description)
+        batch.append(f)
+        if len(batch) >= 1000:
+            Fundraiser.objects.bulk_update(batch, ["description_excerpt"])
+            batch = []
+    if batch:
+        Fundraiser.objects.bulk_update(batch, ["description_excerpt"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_fundraisersimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fundraiser',
+            name='description_excerpt',
+            field=models.CharField(blank=True, default='', max_length=160),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
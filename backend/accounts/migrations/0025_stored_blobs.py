@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:12
+
+from django.db import migrations, models
+
+
+def backfill_document_names(apps, schema_editor):
+    FundraiserDocument = apps.get_model("accounts", "FundraiserDocument")
+    batch = []
+    for doc in FundraiserDocument.objects.only("id", "file").iterator(chunk_size=1000):
+        doc.name = (doc.file.name or "").split("/")[-1][:255]
+        batch.append(doc)
+        if len(batch) >= 1000:
+            FundraiserDocument.objects.bulk_update(batch, ["name"])
+            batch = []
+    if batch:
+        FundraiserDocument.objects.bulk_update(batch, ["name"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0024_fundraiser_description_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fundraiserdocument',
+            name='name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to='blobs/')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='blob_refcount_updated')],
+            },
+        ),
+        migrations.RunPython(backfill_document_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:23
+
+import calendar
+from datetime import timedelta
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# frozen copies of accounts.recurring helpers as of this migration
+FREQUENCIES = ["monthly", "quarterly", "weekly", "yearly"]
+PERIOD_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+COPIED_FIELDS = [
+    "amount", "tip_amount", "donor_name", "is_anonymous", "payment_method",
+    "payer_phone", "card_holder_name", "card_number_last4", "card_expiry",
+]
+
+
+def _run_at(started_at, frequency, cycle):
+    if frequency == "weekly":
+        return started_at + timedelta(weeks=cycle)
+    m = started_at.month - 1 + PERIOD_MONTHS[frequency] * cycle
+    year, month = started_at.year + m // 12, m % 12 + 1
+    day = min(started_at.day, calendar.monthrange(year, month)[1])
+    return started_at.replace(year=year, month=month, day=day)
+
+
+def _next_cycle(started_at, frequency, now):
+    cycle = 1
+    due = _run_at(started_at, frequency, cycle)
+    while due <= now:
+        cycle += 1
+        due = _run_at(started_at, frequency, cycle)
+    return cycle, due
+
+
+def backfill_subscriptions(apps, schema_editor):
+    """
+    One subscription per (donor, active fundraiser) from the donor's latest
+    donation with a recurring frequency_label. Until now that label charged
+    nothing (the checkout preselects "monthly"), so these rows are created
+    "unconfirmed": nothing is charged until the donor confirms them.
+    """
+    Donation = apps.get_model("accounts", "Donation")
+    RecurringDonation = apps.get_model("accounts", "RecurringDonation")
+    now = timezone.now()
+
+    latest = (
+        Donation.objects
+        .filter(
+            status="received", donor__isnull=False, fundraiser__status="active",
+            frequency_label__in=FREQUENCIES,
+        )
+        .order_by()
+        .values("donor_id", "fundraiser_id")
+        .annotate(last_id=Max("id"))
+        .values("last_id")
+    )
+    batch = []
+    for d in Donation.objects.filter(id__in=Subquery(latest)).iterator(chunk_size=1000):
+        cycle, due = _next_cycle(d.created_at, d.frequency_label, now)
+        batch.append(RecurringDonation(
+            donor_id=d.donor_id,
+            fundraiser_id=d.fundraiser_id,
+            source_donation_id=d.id,
+            frequency=d.frequency_label,
+            status="unconfirmed",
+            started_at=d.created_at,
+            cycle=cycle,
+            next_run_at=due,
+            **{name: getattr(d, name) for name in COPIED_FIELDS},
+        ))
+        if len(batch) >= 1000:
+            RecurringDonation.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        RecurringDonation.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def recompute_collected(apps, schema_editor):
+    """collected_amount was never maintained; from now on accounts.rollups.add_collected keeps it."""
+    Donation = apps.get_model("accounts", "Donation")
+    Fundraiser = apps.get_model("accounts", "Fundraiser")
+    received = (
+        Donation.objects
+        .filter(fundraiser=OuterRef("pk"), status="received")
+        .order_by()
+        .values("fundraiser")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    Fundraiser.objects.update(
+        collected_amount=Coalesce(
+            Subquery(received, output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+            Value(Decimal("0.00"), output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0026_donation_status_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringDonation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_donation_id', models.BigIntegerField(blank=True, null=True)),
+                ('frequency', models.CharField(choices=[('weekly', 'Weekly'), ('monthly', 'Monthly'), ('quarterly', 'Quarterly'), ('yearly', 'Yearly')], max_length=20)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('cancelled', 'Cancelled'), ('ended', 'Ended'), ('unconfirmed', 'Awaiting confirmation')], default='active', max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('tip_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('donor_name', models.CharField(blank=True, default='', max_length=120)),
+                ('is_anonymous', models.BooleanField(default=False)),
+                ('payment_method', models.CharField(blank=True, default='', max_length=30)),
+                ('payer_phone', models.CharField(blank=True, default='', max_length=30)),
+                ('card_holder_name', models.CharField(blank=True, default='', max_length=120)),
+                ('card_number_last4', models.CharField(blank=True, default='', max_length=4)),
+                ('card_expiry', models.CharField(blank=True, default='', max_length=10)),
+                ('started_at', models.DateTimeField()),
+                ('cycle', models.PositiveIntegerField(default=1)),
+                ('next_run_at', models.DateTimeField()),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('runs_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('donor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_donations', to=settings.AUTH_USER_MODEL)),
+                ('fundraiser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_donations', to='accounts.fundraiser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_run_at'], name='recurring_status_next_run')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('donor', 'fundraiser'), name='uniq_active_recurring_donation')],
+            },
+        ),
+        migrations.RunPython(backfill_subscriptions, migrations.RunPython.noop),
+        migrations.RunPython(recompute_collected, migrations.RunPython.noop),
+    ]
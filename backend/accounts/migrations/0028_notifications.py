@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0027_recurringdonation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS')], max_length=10)),
+                ('kind', models.CharField(choices=[('donation_received', 'Donation received'), ('donor_message', 'Message from donor'), ('donation_confirmation', 'Donation confirmation'), ('fundraiser_update', 'Fundraiser update'), ('connected_fundraiser', 'Connected fundraiser')], max_length=30)),
+                ('destination', models.CharField(max_length=254)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('event_count', models.PositiveIntegerField(default=1)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('fundraiser', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='accounts.fundraiser')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='notification_status_due'), models.Index(fields=['user', 'fundraiser', 'kind', 'channel', 'status'], name='notification_digest')],
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('donation', 'Donation received'), ('fundraiser_published', 'Fundraiser published'), ('fundraiser_closed', 'Fundraiser closed')], max_length=30)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('fundraiser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='accounts.fundraiser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='notif_event_processed')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0028_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonorDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Receipt'), ('statement', 'Annual statement')], max_length=20)),
+                ('donation_id', models.BigIntegerField(blank=True, null=True)),
+                ('year', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('file', models.FileField(max_length=255, upload_to='receipts/')),
+                ('donations_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('source_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['donor', 'created_at'], name='donation_donor_created'),
+        ),
+        migrations.AddField(
+            model_name='donordocument',
+            name='donor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donor_documents', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='donordocument',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'receipt')), fields=('donation_id',), name='uniq_donation_receipt'),
+        ),
+        migrations.AddConstraint(
+            model_name='donordocument',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'statement')), fields=('donor', 'year'), name='uniq_donor_statement'),
+        ),
+    ]
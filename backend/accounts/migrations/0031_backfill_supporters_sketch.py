@@ -0,0 +1,91 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:20
+
+import hashlib
+import math
+import struct
+
+from django.db import migrations
+
+# accounts.sketches as of this migration (P=12 HyperLogLog, sparse/dense
+# encoding); kept here so later changes to the module don't alter it
+P = 12
+M = 1 << P
+ALPHA = 0.7213 / (1 + 1.079 / M)
+CHUNK = 500
+
+
+def _add(registers, value):
+    h = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+    idx = h >> (64 - P)
+    rest = h & ((1 << (64 - P)) - 1)
+    registers[idx] = max(registers[idx], (64 - P) - rest.bit_length() + 1)
+
+
+def _to_bytes(registers):
+    nonzero = [(i, v) for i, v in enumerate(registers) if v]
+    if not nonzero:
+        return b""
+    if len(nonzero) * 3 < M:
+        return b"S" + b"".join(struct.pack(">HB", i, v) for i, v in nonzero)
+    return b"D" + bytes(registers)
+
+
+def _estimate(registers):
+    zeros = registers.count(0)
+    raw = ALPHA * M * M / sum(2.0 ** -v for v in registers)
+    if raw <= 2.5 * M and zeros:
+        return int(round(M * math.log(M / zeros)))
+    return int(round(raw))
+
+
+def build_sketches(apps, schema_editor):
+    """
+    0019 added the sketch columns empty, so fundraisers with donations from
+    before it showed 0 supporters. Rebuild every sketch from the received
+    donations (what reconcile_supporter_sketches --rebuild does).
+    """
+    Donation = apps.get_model("accounts", "Donation")
+    Fundraiser = apps.get_model("accounts", "Fundraiser")
+
+    Fundraiser.objects.update(supporters_sketch=b"", supporters_count=0)
+    pending = []
+
+    def save(fundraiser_id, registers):
+        pending.append(Fundraiser(
+            id=fundraiser_id,
+            supporters_sketch=_to_bytes(registers),
+            supporters_count=_estimate(registers),
+        ))
+        if len(pending) >= CHUNK:
+            Fundraiser.objects.bulk_update(pending, ["supporters_sketch", "supporters_count"])
+            pending.clear()
+
+    rows = (
+        Donation.objects
+        .filter(status="received", fundraiser__isnull=False, donor__isnull=False)
+        .order_by("fundraiser_id")
+        .values_list("fundraiser_id", "donor_id")
+        .iterator(chunk_size=5000)
+    )
+    current_id, registers = None, None
+    for fundraiser_id, donor_id in rows:
+        if fundraiser_id != current_id:
+            if current_id is not None:
+                save(current_id, registers)
+            current_id, registers = fundraiser_id, bytearray(M)
+        _add(registers, donor_id)
+    if current_id is not None:
+        save(current_id, registers)
+    if pending:
+        Fundraiser.objects.bulk_update(pending, ["supporters_sketch", "supporters_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0030_data_export'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_sketches, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,25 @@
+import html
+import re
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.conf import settings
 
+EXCERPT_LENGTH = 160
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Plain-text preview of a description for list cards, cut on a word."""
+    text = " ".join(html.unescape(_TAGS.sub(" ", text or "")).split())
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    if " " in cut[length // 2:]:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:-") + "…"
+
+
 class User(AbstractUser):
     phone = models.CharField(max_length=20, blank=True, null=True)
     cnic = models.CharField(max_length=20, blank=True, null=True)
@@ -160,6 +178,14 @@ class Donation(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # admin status filter / pending reconciliation, newest first
+            models.Index(fields=["status", "created_at"], name="donation_status_created"),
+            # receipts/statements: a donor's donations by date
+            models.Index(fields=["donor", "created_at"], name="donation_donor_created"),
+        ]
+
     def __str__(self):
         return f"{self.recipient_id} - {self.amount} - {self.status}"
 
@@ -183,6 +209,8 @@ class Fundraiser(models.Model):
     title = models.CharField(max_length=200)
     image = models.ImageField(upload_to="fundraisers/", blank=True, null=True)
     description = models.TextField(blank=True, default="")
+    # kept in sync by save(); list endpoints read this and never the full description
+    description_excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, default="")
     location = models.CharField(max_length=200, blank=True, default="")
     published_at = models.DateTimeField(null=True, blank=True)
     category = models.CharField(max_length=100, blank=True, default="")
@@ -190,6 +218,10 @@ class Fundraiser(models.Model):
     target_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     collected_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    # unique donors: HyperLogLog sketch of donor ids (accounts.sketches) + its estimate
+    supporters_sketch = models.BinaryField(blank=True, default=b"")
+    supporters_count = models.PositiveIntegerField(default=0)
+
     deadline = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DRAFT)
 
@@ -278,6 +310,23 @@ class Fundraiser(models.Model):
         default="",
     )
 
+    # when the payout engine (accounts.reimbursements) settles this fundraiser next
+    next_payout_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # expiry job: active fundraisers past their deadline
+            models.Index(fields=["status", "deadline"], name="fundraiser_status_deadline"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if "description" not in self.get_deferred_fields():
+            self.description_excerpt = make_excerpt(self.description)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "description" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "description_excerpt"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title
 
@@ -288,6 +337,8 @@ class FundraiserDocument(models.Model):
         related_name="documents",
     )
     file = models.FileField(upload_to="fundraiser_docs/")
+    # original upload name; `file` points at a shared blob (accounts.blobs)
+    name = models.CharField(max_length=255, blank=True, default="")
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
 class FundraiserPayout(models.Model):
@@ -329,4 +380,426 @@ class FundraiserPayout(models.Model):
         unique_together = ("fundraiser", "method")
 
     def __str__(self):
-        return f"{self.fundraiser_id} - {self.method}"
\ No newline at end of file
+        return f"{self.fundraiser_id} - {self.method}"
+
+class DonationRollup(models.Model):
+    """
+    Pre-aggregated received donations per fundraiser, time bucket and payment
+    method. Maintained incrementally by accounts.rollups on every donation write
+    and rebuilt with `manage.py rebuild_donation_rollups`.
+    """
+    GRANULARITY_HOUR = "hour"
+    GRANULARITY_DAY = "day"
+
+    GRANULARITY_CHOICES = [
+        (GRANULARITY_HOUR, "Hour"),
+        (GRANULARITY_DAY, "Day"),
+    ]
+
+    fundraiser = models.ForeignKey(
+        Fundraiser,
+        on_delete=models.CASCADE,
+        related_name="donation_rollups",
+    )
+
+    # denormalized so per-recipient dashboards are one range scan too
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="donation_rollups",
+    )
+
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    payment_method = models.CharField(max_length=30, blank=True, default="")
+
+    donations_count = models.PositiveIntegerField(default=0)
+    recurring_count = models.PositiveIntegerField(default=0)  # frequency_label set
+    amount_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tip_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fundraiser", "granularity", "bucket_start", "payment_method"],
+                name="uniq_donation_rollup_bucket",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["recipient", "granularity", "bucket_start"], name="rollup_recipient_range"),
+        ]
+
+    def __str__(self):
+        return f"{self.fundraiser_id} - {self.granularity} - {self.bucket_start:%Y-%m-%d %H:%M}"
+
+
+class PayoutBatch(models.Model):
+    """One payout run's entries for a single payout method, plus its export file."""
+    run_key = models.CharField(max_length=40)  # e.g. "2026-10-19"
+    method = models.CharField(max_length=20, choices=FundraiserPayout.METHOD_CHOICES)
+
+    entries_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    export_file = models.FileField(upload_to="payout_batches/", blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("run_key", "method")
+
+    def __str__(self):
+        return f"{self.run_key} - {self.method}"
+
+
+class PayoutLedgerEntry(models.Model):
+    """Amount owed to a fundraiser for one reimbursement cycle (append-only)."""
+    batch = models.ForeignKey(PayoutBatch, on_delete=models.PROTECT, related_name="entries")
+    fundraiser = models.ForeignKey(Fundraiser, on_delete=models.PROTECT, related_name="payout_entries")
+
+    method = models.CharField(max_length=20, choices=FundraiserPayout.METHOD_CHOICES)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    period_end = models.DateTimeField()  # the cycle this entry settles
+
+    # destination snapshot at payout time
+    bank_account_title = models.CharField(max_length=120, blank=True, default="")
+    bank_account_number = models.CharField(max_length=60, blank=True, default="")
+    bank_iban = models.CharField(max_length=50, blank=True, default="")
+    bank_raast_id = models.CharField(max_length=80, blank=True, default="")
+    phone_number = models.CharField(max_length=30, blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # re-running a cycle can never pay it twice
+        unique_together = ("fundraiser", "period_end")
+
+    def __str__(self):
+        return f"{self.fundraiser_id} - {self.amount} - {self.method}"
+
+
+class FundraiserSimilarity(models.Model):
+    """Precomputed "similar fundraisers" (build_similar_fundraisers), read by rank."""
+    fundraiser = models.ForeignKey(Fundraiser, on_delete=models.CASCADE, related_name="similar_links")
+    similar = models.ForeignKey(Fundraiser, on_delete=models.CASCADE, related_name="similar_to")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["fundraiser", "rank"], name="uniq_similarity_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.fundraiser_id} -> {self.similar_id} ({self.score:.3f})"
+
+
+class StoredBlob(models.Model):
+    """
+    One stored object per distinct content (accounts.blobs). Fundraiser.image
+    and FundraiserDocument.file hold its name; ref_count says how many do.
+    Unreferenced blobs are purged by gc_orphaned_media after a grace period.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to="blobs/", max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    ref_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # last time ref_count changed; the purge grace period counts from here
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ref_count", "updated_at"], name="blob_refcount_updated"),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} x{self.ref_count}"
+
+
+class RecurringDonation(models.Model):
+    """
+    A donor's repeating gift to one fundraiser, started by a donation whose
+    frequency_label is one of FREQUENCY_CHOICES (accounts.recurring). The
+    run_recurring_donations scheduler creates the next Donation when
+    next_run_at comes up.
+    """
+    FREQ_WEEKLY = "weekly"
+    FREQ_MONTHLY = "monthly"
+    FREQ_QUARTERLY = "quarterly"
+    FREQ_YEARLY = "yearly"
+
+    FREQUENCY_CHOICES = [
+        (FREQ_WEEKLY, "Weekly"),
+        (FREQ_MONTHLY, "Monthly"),
+        (FREQ_QUARTERLY, "Quarterly"),
+        (FREQ_YEARLY, "Yearly"),
+    ]
+
+    STATUS_ACTIVE = "active"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_ENDED = "ended"  # the fundraiser closed
+    STATUS_UNCONFIRMED = "unconfirmed"  # backfilled from old donations; charged only once the donor confirms
+
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, "Active"),
+        (STATUS_CANCELLED, "Cancelled"),
+        (STATUS_ENDED, "Ended"),
+        (STATUS_UNCONFIRMED, "Awaiting confirmation"),
+    ]
+
+    donor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="recurring_donations",
+    )
+    fundraiser = models.ForeignKey(Fundraiser, on_delete=models.CASCADE, related_name="recurring_donations")
+    # no FK: the donation table's key is (id, created_at) once partitioned
+    source_donation_id = models.BigIntegerField(null=True, blank=True)
+
+    frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+
+    # copied onto every donation the scheduler creates
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    tip_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    donor_name = models.CharField(max_length=120, blank=True, default="")
+    is_anonymous = models.BooleanField(default=False)
+    payment_method = models.CharField(max_length=30, blank=True, default="")
+    payer_phone = models.CharField(max_length=30, blank=True, default="")
+    card_holder_name = models.CharField(max_length=120, blank=True, default="")
+    card_number_last4 = models.CharField(max_length=4, blank=True, default="")
+    card_expiry = models.CharField(max_length=10, blank=True, default="")
+
+    # run n is due at started_at + n periods; `cycle` is the n of next_run_at
+    started_at = models.DateTimeField()
+    cycle = models.PositiveIntegerField(default=1)
+    next_run_at = models.DateTimeField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    runs_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # donating again with a frequency updates the running subscription
+            models.UniqueConstraint(
+                fields=["donor", "fundraiser"],
+                condition=models.Q(status="active"),
+                name="uniq_active_recurring_donation",
+            ),
+        ]
+        indexes = [
+            # scheduler: active subscriptions with next_run_at <= now
+            models.Index(fields=["status", "next_run_at"], name="recurring_status_next_run"),
+        ]
+
+    def __str__(self):
+        return f"{self.donor_id} -> {self.fundraiser_id} {self.amount} {self.frequency}"
+
+
+class NotificationEvent(models.Model):
+    """
+    Outbox row written in the same transaction as the change it reports
+    (accounts.notifications). The send_notifications worker fans it out into
+    Notification rows and sets processed_at.
+    """
+    KIND_DONATION = "donation"
+    KIND_FUNDRAISER_PUBLISHED = "fundraiser_published"
+    KIND_FUNDRAISER_CLOSED = "fundraiser_closed"
+
+    KIND_CHOICES = [
+        (KIND_DONATION, "Donation received"),
+        (KIND_FUNDRAISER_PUBLISHED, "Fundraiser published"),
+        (KIND_FUNDRAISER_CLOSED, "Fundraiser closed"),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    fundraiser = models.ForeignKey(Fundraiser, on_delete=models.CASCADE, related_name="notification_events")
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # worker: unprocessed events, oldest first
+            models.Index(fields=["processed_at", "id"], name="notif_event_processed"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} - {self.fundraiser_id}"
+
+
+class Notification(models.Model):
+    """
+    One message to one user on one channel. Donation notifications for the
+    same user and fundraiser are held for NOTIFY_DIGEST_WINDOW and merged
+    (event_count / amount) into a single digest before they are sent.
+    """
+    CHANNEL_EMAIL = "email"
+    CHANNEL_SMS = "sms"
+
+    CHANNEL_CHOICES = [
+        (CHANNEL_EMAIL, "Email"),
+        (CHANNEL_SMS, "SMS"),
+    ]
+
+    KIND_DONATION_RECEIVED = "donation_received"
+    KIND_DONOR_MESSAGE = "donor_message"
+    KIND_DONATION_CONFIRMATION = "donation_confirmation"
+    KIND_FUNDRAISER_UPDATE = "fundraiser_update"
+    KIND_CONNECTED_FUNDRAISER = "connected_fundraiser"
+    KIND_DATA_EXPORT = "data_export"
+
+    KIND_CHOICES = [
+        (KIND_DONATION_RECEIVED, "Donation received"),
+        (KIND_DONOR_MESSAGE, "Message from donor"),
+        (KIND_DONATION_CONFIRMATION, "Donation confirmation"),
+        (KIND_FUNDRAISER_UPDATE, "Fundraiser update"),
+        (KIND_CONNECTED_FUNDRAISER, "Connected fundraiser"),
+        (KIND_DATA_EXPORT, "Data export ready"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    fundraiser = models.ForeignKey(
+        Fundraiser, on_delete=models.CASCADE, null=True, blank=True, related_name="notifications"
+    )
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    destination = models.CharField(max_length=254)  # email address or phone number
+    data = models.JSONField(default=dict, blank=True)
+
+    # digests: how many events were merged into this message and their total
+    event_count = models.PositiveIntegerField(default=1)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # pending: send at; sending: lease expiry (a crashed worker's rows come back)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="notification_status_due"),
+            # digest merge: the pending row for (user, fundraiser, kind, channel)
+            models.Index(fields=["user", "fundraiser", "kind", "channel", "status"], name="notification_digest"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.channel} {self.kind} ({self.status})"
+
+
+class DonorDocument(models.Model):
+    """
+    A rendered receipt (one donation) or yearly statement (one donor, one
+    year) in the default storage (accounts.receipts). source_hash fingerprints
+    the donations it was rendered from, so unchanged statements are skipped
+    when a year is regenerated.
+    """
+    KIND_RECEIPT = "receipt"
+    KIND_STATEMENT = "statement"
+
+    KIND_CHOICES = [
+        (KIND_RECEIPT, "Receipt"),
+        (KIND_STATEMENT, "Annual statement"),
+    ]
+
+    donor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="donor_documents")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # no FK: the donation table's key is (id, created_at) once partitioned
+    donation_id = models.BigIntegerField(null=True, blank=True)
+    year = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    file = models.FileField(upload_to="receipts/", max_length=255)
+    donations_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    source_hash = models.CharField(max_length=64, blank=True, default="")
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["donation_id"], condition=models.Q(kind="receipt"), name="uniq_donation_receipt",
+            ),
+            models.UniqueConstraint(
+                fields=["donor", "year"], condition=models.Q(kind="statement"), name="uniq_donor_statement",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.donor_id} {self.year or self.donation_id}"
+
+
+class DataExport(models.Model):
+    """
+    A ZIP of everything a user has on the site (accounts.exports), built off
+    the request by `manage.py run_data_exports` and kept in the default
+    storage until expires_at. Queued on request, and on deactivation/closure
+    so the user can take their data with them.
+    """
+    REASON_REQUEST = "request"
+    REASON_DEACTIVATE = "deactivate"
+    REASON_CLOSE = "close"
+
+    REASON_CHOICES = [
+        (REASON_REQUEST, "Requested"),
+        (REASON_DEACTIVATE, "Account deactivated"),
+        (REASON_CLOSE, "Account closed"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_READY, "Ready"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="data_exports")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default=REASON_REQUEST)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    file = models.FileField(upload_to="exports/", max_length=255, blank=True, default="")
+    size = models.BigIntegerField(default=0)
+    rows = models.JSONField(default=dict, blank=True)  # {member file: row count}
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # running: when the worker took it (a crashed worker's job is retaken after EXPORT_LEASE)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # worker: queued jobs, oldest first
+            models.Index(fields=["status", "created_at"], name="data_export_status_created"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} export ({self.status})"
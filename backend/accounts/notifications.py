@@ -0,0 +1,402 @@
+"""
+Donation and fundraiser notifications, honouring NotificationPreference.
+
+Requests never send anything: they write NotificationEvent rows in their own
+transaction (notify_donations / notify_fundraisers). `manage.py
+send_notifications` then does two things, both in batches claimed with
+FOR UPDATE SKIP LOCKED so several workers can run:
+
+1. fan-out: each batch of events resolves its recipients with one query per
+   audience (fundraiser owners, donors) joined to their preferences; users
+   without a preference row get the model defaults. Donation notifications
+   wait NOTIFY_DIGEST_WINDOW seconds, and further donations for the same
+   owner and fundraiser in that window are merged into the waiting row, so a
+   busy campaign sends one digest instead of a message per donation;
+2. delivery: due notifications are leased per channel (status "sending"),
+   handed to the channel backend as one batch, then marked sent or retried
+   with exponential backoff, and failed after MAX_ATTEMPTS.
+
+Backends are set by dotted path (NOTIFY_EMAIL_BACKEND, NOTIFY_SMS_BACKEND);
+any class with send_batch(messages) -> {id: error or None} works:
+  EmailBackend    Django's mail connection (EMAIL_BACKEND)
+  HttpSMSBackend  POSTs the batch as JSON to NOTIFY_SMS_URL
+  ConsoleBackend  prints (local dev)
+  FileBackend     appends JSON lines to NOTIFY_FILE_PATH (tests)
+"""
+import json
+import urllib.request
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import BooleanField, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .metrics import NOTIFICATIONS
+from .models import Donation, Fundraiser, Notification, NotificationEvent, NotificationPreference, User
+
+MAX_ATTEMPTS = 6
+RETRY_BASE = 30  # seconds; doubles per attempt
+RETRY_MAX = 3600
+LEASE = timedelta(minutes=5)
+
+
+# ----------------------------
+# Enqueue (inside the request's transaction)
+# ----------------------------
+
+def notify_donations(donations):
+    events = [
+        NotificationEvent(
+            kind=NotificationEvent.KIND_DONATION,
+            fundraiser_id=d.fundraiser_id,
+            data={
+                "donor_id": d.donor_id,
+                "donor_name": "" if d.is_anonymous else d.donor_name,
+                "amount": str(d.amount),
+                "message": d.message or "",
+            },
+        )
+        for d in donations
+        if d.fundraiser_id is not None and d.status == Donation.STATUS_RECEIVED
+    ]
+    NotificationEvent.objects.bulk_create(events, batch_size=1000)
+
+
+def notify_fundraisers(kind, ids):
+    NotificationEvent.objects.bulk_create([NotificationEvent(kind=kind, fundraiser_id=i) for i in ids], batch_size=1000)
+
+
+# ----------------------------
+# Fan-out
+# ----------------------------
+
+def _pref(prefix, name):
+    """A preference flag through `prefix` (e.g. "owner__"), defaulted when the user has no row."""
+    default = NotificationPreference._meta.get_field(name).default
+    return Coalesce(F(f"{prefix}notification_preference__{name}"), Value(default), output_field=BooleanField())
+
+
+def _new(user_id, fundraiser_id, channel, kind, destination, data, due, amount=0, count=1):
+    return Notification(
+        user_id=user_id, fundraiser_id=fundraiser_id, channel=channel, kind=kind,
+        destination=destination, data=data, next_attempt_at=due, amount=amount, event_count=count,
+    )
+
+
+def _fan_out_donations(events, now):
+    by_fundraiser = defaultdict(list)
+    for e in events:
+        by_fundraiser[e.fundraiser_id].append(e)
+
+    owners = (
+        Fundraiser.objects
+        .filter(id__in=list(by_fundraiser), owner__is_active=True)
+        .values(
+            "id", "title", "owner_id",
+            email=F("owner__email"), phone=F("owner__phone"),
+            email_on=_pref("owner__", "email_donation_received"),
+            msg_on=_pref("owner__", "msg_donation_received"),
+            messages_on=_pref("owner__", "email_messages_from_donor"),
+        )
+    )
+    donor_ids = {e.data.get("donor_id") for e in events} - {None}
+    donors = {
+        row["id"]: row
+        for row in (
+            User.objects
+            .filter(id__in=donor_ids, is_active=True)
+            .values("id", "phone", confirm_on=_pref("", "msg_donation_confirmation"))
+        )
+    }
+
+    created = []
+    digest_due = now + timedelta(seconds=settings.NOTIFY_DIGEST_WINDOW)
+    for owner in owners:
+        fid, title = owner["id"], owner["title"]
+        batch = by_fundraiser[fid]
+        total = sum((Decimal(e.data["amount"]) for e in batch), Decimal("0.00"))
+        latest = {"title": title, **batch[-1].data}
+
+        channels = []
+        if owner["email_on"] and owner["email"]:
+            channels.append((Notification.CHANNEL_EMAIL, owner["email"]))
+        if owner["msg_on"] and owner["phone"]:
+            channels.append((Notification.CHANNEL_SMS, owner["phone"]))
+        for channel, destination in channels:
+            # fold into the digest still waiting for this owner, if any
+            merged = Notification.objects.filter(
+                user_id=owner["owner_id"], fundraiser_id=fid, kind=Notification.KIND_DONATION_RECEIVED,
+                channel=channel, status=Notification.STATUS_PENDING, next_attempt_at__gt=now,
+            ).update(event_count=F("event_count") + len(batch), amount=F("amount") + total, data=latest)
+            if not merged:
+                created.append(_new(
+                    owner["owner_id"], fid, channel, Notification.KIND_DONATION_RECEIVED, destination,
+                    latest, digest_due, amount=total, count=len(batch),
+                ))
+
+        for e in batch:
+            if e.data.get("message") and owner["messages_on"] and owner["email"]:
+                created.append(_new(
+                    owner["owner_id"], fid, Notification.CHANNEL_EMAIL, Notification.KIND_DONOR_MESSAGE,
+                    owner["email"], {"title": title, **e.data}, now, amount=e.data["amount"],
+                ))
+            donor = donors.get(e.data.get("donor_id"))
+            if donor and donor["confirm_on"] and donor["phone"]:
+                created.append(_new(
+                    donor["id"], fid, Notification.CHANNEL_SMS, Notification.KIND_DONATION_CONFIRMATION,
+                    donor["phone"], {"title": title, **e.data}, now, amount=e.data["amount"],
+                ))
+    return created
+
+
+def _fan_out_fundraisers(events, now):
+    """Closed: the fundraiser's donors. Published with a link: the linked fundraiser's donors."""
+    info = {
+        f["id"]: f
+        for f in Fundraiser.objects.filter(id__in={e.fundraiser_id for e in events}).values(
+            "id", "title", "linked_fundraiser_id", "linked_fundraiser__title",
+        )
+    }
+    audiences = defaultdict(list)  # fundraiser whose donors hear about it -> [(event fundraiser, kind, data)]
+    for e in events:
+        f = info.get(e.fundraiser_id)
+        if f is None:
+            continue
+        if e.kind == NotificationEvent.KIND_FUNDRAISER_CLOSED:
+            audiences[f["id"]].append((f["id"], Notification.KIND_FUNDRAISER_UPDATE, {"title": f["title"], "event": "closed"}))
+        elif f["linked_fundraiser_id"]:
+            audiences[f["linked_fundraiser_id"]].append((f["id"], Notification.KIND_CONNECTED_FUNDRAISER, {
+                "title": f["title"], "previous_title": f["linked_fundraiser__title"],
+            }))
+    if not audiences:
+        return
+
+    rows = (
+        Donation.objects
+        .filter(
+            fundraiser_id__in=list(audiences), status=Donation.STATUS_RECEIVED,
+            donor__isnull=False, donor__is_active=True,
+        )
+        .order_by()
+        .values(
+            "fundraiser_id", "donor_id",
+            email=F("donor__email"), phone=F("donor__phone"),
+            updates_email=_pref("donor__", "email_fundraiser_updates"),
+            updates_msg=_pref("donor__", "msg_fundraiser_updates"),
+            connected_email=_pref("donor__", "email_connected_fundraisers"),
+        )
+        .distinct()
+    )
+    for row in rows.iterator(chunk_size=2000):
+        for fid, kind, data in audiences[row["fundraiser_id"]]:
+            if kind == Notification.KIND_FUNDRAISER_UPDATE:
+                if row["updates_email"] and row["email"]:
+                    yield _new(row["donor_id"], fid, Notification.CHANNEL_EMAIL, kind, row["email"], data, now)
+                if row["updates_msg"] and row["phone"]:
+                    yield _new(row["donor_id"], fid, Notification.CHANNEL_SMS, kind, row["phone"], data, now)
+            elif row["connected_email"] and row["email"]:
+                yield _new(row["donor_id"], fid, Notification.CHANNEL_EMAIL, kind, row["email"], data, now)
+
+
+def _bulk_create(notifications):
+    batch = []
+    for n in notifications:
+        batch.append(n)
+        if len(batch) >= 1000:
+            Notification.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Notification.objects.bulk_create(batch)
+
+
+def fan_out(batch_size=500):
+    """Turn one batch of events into notifications. Returns the events processed."""
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0
+        donations = [e for e in events if e.kind == NotificationEvent.KIND_DONATION]
+        others = [e for e in events if e.kind != NotificationEvent.KIND_DONATION]
+        if donations:
+            _bulk_create(_fan_out_donations(donations, now))
+        if others:
+            _bulk_create(_fan_out_fundraisers(others, now))
+        NotificationEvent.objects.filter(id__in=[e.id for e in events]).update(processed_at=now)
+    return len(events)
+
+
+# ----------------------------
+# Rendering
+# ----------------------------
+
+def render(n):
+    """(subject, body) of a notification; SMS only uses the body."""
+    d = n.data
+    title = d.get("title") or "your fundraiser"
+    name = d.get("donor_name") or "Someone"
+    if n.kind == Notification.KIND_DONATION_RECEIVED:
+        if n.event_count > 1:
+            return (
+                f"{n.event_count} new donations to {title}",
+                f"{title} received {n.event_count} donations totalling Rs {n.amount}. Latest from {name}.",
+            )
+        return f"New donation to {title}", f"{name} donated Rs {n.amount} to {title}."
+    if n.kind == Notification.KIND_DONOR_MESSAGE:
+        return f"{name} left a message on {title}", d.get("message", "")
+    if n.kind == Notification.KIND_DONATION_CONFIRMATION:
+        return "Donation received", f"Thank you! Your donation of Rs {n.amount} to {title} was received."
+    if n.kind == Notification.KIND_DATA_EXPORT:
+        return (
+            "Your Miraj data export is ready",
+            f"Download your data here: {d.get('url', '')}\nThe link works until {d.get('expires_at', '')[:10]}.",
+        )
+    if n.kind == Notification.KIND_CONNECTED_FUNDRAISER:
+        return (
+            f"{d.get('previous_title') or 'A fundraiser you supported'} continues",
+            f"{d.get('previous_title') or 'A fundraiser you supported'} continues as {title}.",
+        )
+    return f"{title} has closed", f"{title} has closed. Thank you for supporting it."
+
+
+# ----------------------------
+# Backends
+# ----------------------------
+
+class ConsoleBackend:
+    def send_batch(self, messages):
+        for m in messages:
+            print(f"[Notify] to={m['to']} subject={m['subject']!r} body={m['body']!r}")
+        return {m["id"]: None for m in messages}
+
+
+class FileBackend:
+    def send_batch(self, messages):
+        with open(settings.NOTIFY_FILE_PATH, "a", encoding="utf-8") as fh:
+            for m in messages:
+                fh.write(json.dumps(m) + "\n")
+        return {m["id"]: None for m in messages}
+
+
+class EmailBackend:
+    """Django mail, one connection per batch; a failed message does not fail the rest."""
+
+    def send_batch(self, messages):
+        results = {}
+        with get_connection(fail_silently=False) as connection:
+            for m in messages:
+                try:
+                    EmailMessage(m["subject"], m["body"], None, [m["to"]], connection=connection).send()
+                    results[m["id"]] = None
+                except Exception as exc:
+                    results[m["id"]] = str(exc) or exc.__class__.__name__
+        return results
+
+
+class HttpSMSBackend:
+    """POST {"messages": [{"id", "to", "body"}]} to NOTIFY_SMS_URL; the gateway takes the batch or not."""
+
+    def send_batch(self, messages):
+        payload = json.dumps({"messages": [{"id": m["id"], "to": m["to"], "body": m["body"]} for m in messages]})
+        req = urllib.request.Request(
+            settings.NOTIFY_SMS_URL,
+            data=payload.encode(),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {settings.NOTIFY_SMS_TOKEN}"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=30):
+            pass
+        return {m["id"]: None for m in messages}
+
+
+_BACKEND_SETTINGS = {
+    Notification.CHANNEL_EMAIL: "NOTIFY_EMAIL_BACKEND",
+    Notification.CHANNEL_SMS: "NOTIFY_SMS_BACKEND",
+}
+
+
+def get_backend(channel):
+    return import_string(getattr(settings, _BACKEND_SETTINGS[channel]))()
+
+
+# ----------------------------
+# Delivery
+# ----------------------------
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX))
+
+
+def deliver(channel, batch_size=100, backend=None):
+    """Send one batch of due notifications on `channel`. Returns how many were attempted."""
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            Notification.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                channel=channel,
+                status__in=[Notification.STATUS_PENDING, Notification.STATUS_SENDING],
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if not claimed:
+            return 0
+        Notification.objects.filter(id__in=[n.id for n in claimed]).update(
+            status=Notification.STATUS_SENDING, next_attempt_at=now + LEASE,
+        )
+
+    messages = []
+    for n in claimed:
+        subject, body = render(n)
+        messages.append({"id": n.id, "to": n.destination, "subject": subject, "body": body})
+    try:
+        results = (backend or get_backend(channel)).send_batch(messages)
+    except Exception as exc:
+        results = {m["id"]: str(exc) or exc.__class__.__name__ for m in messages}
+
+    now = timezone.now()
+    sent = [n.id for n in claimed if results.get(n.id, "no result") is None]
+    Notification.objects.filter(id__in=sent).update(status=Notification.STATUS_SENT, sent_at=now, last_error="")
+
+    failed = [n for n in claimed if results.get(n.id, "no result") is not None]
+    for n in failed:
+        n.attempts += 1
+        n.last_error = results.get(n.id) or "no result"
+        if n.attempts >= MAX_ATTEMPTS:
+            n.status = Notification.STATUS_FAILED
+        else:
+            n.status = Notification.STATUS_PENDING
+            n.next_attempt_at = now + _retry_delay(n.attempts)
+    Notification.objects.bulk_update(failed, ["attempts", "last_error", "status", "next_attempt_at"])
+
+    NOTIFICATIONS.labels(channel, "sent").inc(len(sent))
+    NOTIFICATIONS.labels(channel, "failed").inc(len(failed))
+    return len(claimed)
+
+
+def purge(before, chunk_size=5000):
+    """Delete processed events and sent notifications older than `before`."""
+    deleted = 0
+    for qs in (
+        NotificationEvent.objects.filter(processed_at__lt=before),
+        Notification.objects.filter(status=Notification.STATUS_SENT, next_attempt_at__lt=before),
+    ):
+        while True:
+            ids = list(qs.order_by().values_list("id", flat=True)[:chunk_size])
+            if not ids:
+                break
+            deleted += qs.model.objects.filter(id__in=ids).delete()[0]
+    return deleted
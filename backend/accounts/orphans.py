@@ -0,0 +1,76 @@
+"""
+Orphaned media: storage objects no row points at any more (deleted documents,
+replaced avatars and cover images).
+
+The bucket listing is streamed page by page into a temp table (per
+connection); the orphans are then one anti-join of that table against every
+referencing column, read back in name order a page at a time. Neither side
+is ever held in Python as a whole.
+"""
+from django.db import connection
+
+from .models import DataExport, DonorDocument, Fundraiser, FundraiserDocument, PayoutBatch, StoredBlob, User
+
+# (model, file field) pairs that reference objects in the default storage
+REFERENCES = [
+    (User, "avatar"),
+    (Fundraiser, "image"),
+    (FundraiserDocument, "file"),
+    (PayoutBatch, "export_file"),
+    (StoredBlob, "file"),
+    (DonorDocument, "file"),
+    (DataExport, "file"),
+]
+
+LISTING_TABLE = "media_gc_listing"
+
+
+def reference_prefixes():
+    """upload_to directories of the referencing fields; nothing else is scanned."""
+    return sorted({model._meta.get_field(field).upload_to for model, field in REFERENCES})
+
+
+def create_listing_table():
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {LISTING_TABLE}")
+        cursor.execute(f"CREATE TEMP TABLE {LISTING_TABLE} (name VARCHAR(1024) PRIMARY KEY, size BIGINT)")
+
+
+def drop_listing_table():
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {LISTING_TABLE}")
+
+
+def add_listed(rows):
+    """rows: [(name, size)] from one listing page."""
+    with connection.cursor() as cursor:
+        cursor.executemany(f"INSERT INTO {LISTING_TABLE} (name, size) VALUES (%s, %s)", rows)
+
+
+def _orphans_sql():
+    qn = connection.ops.quote_name
+    conditions = []
+    for model, field in REFERENCES:
+        column = model._meta.get_field(field).column
+        conditions.append(
+            f"NOT EXISTS (SELECT 1 FROM {qn(model._meta.db_table)} r WHERE r.{qn(column)} = l.name)"
+        )
+    return (
+        f"SELECT l.name, l.size FROM {LISTING_TABLE} l "
+        f"WHERE l.name > %s AND {' AND '.join(conditions)} "
+        f"ORDER BY l.name LIMIT %s"
+    )
+
+
+def orphan_pages(page_size=1000):
+    """Pages of [(name, size)] listed but unreferenced, in name order."""
+    sql = _orphans_sql()
+    last = ""
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [last, page_size])
+            rows = cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
@@ -0,0 +1,163 @@
+"""
+Monthly range partitions of the donation table (Postgres only).
+
+Migration 0022 turns accounts_donation into a table PARTITION BY RANGE
+(created_at) with a default partition and one partition per month. The
+primary key there is (id, created_at) and ids still come from the one
+sequence, so the ORM keeps using `id` as before. Queries with a created_at
+bound only scan the partitions it overlaps.
+
+`manage.py donation_partitions` uses the helpers below to add future months
+and to archive cold months: COPY to a gzip CSV snapshot in the default
+storage and, optionally, a move to a cold tablespace. Archived months stay
+attached and queryable. Raised totals, balances, payouts owed, statements
+and exports all sum over Donation, so rows are never dropped here.
+
+On other databases (sqlite in dev/tests) the table stays a plain table;
+check is_partitioned() before calling anything else here.
+"""
+import gzip
+import re
+import tempfile
+from datetime import date
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+from .models import Donation
+
+TABLE = Donation._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+ARCHIVE_DIR = "donation_archive"
+
+_NAME_RE = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def is_supported():
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned():
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def add_months(d, n):
+    m = d.year * 12 + d.month - 1 + n
+    return date(m // 12, m % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def list_partitions():
+    """[(name, month)] of the monthly partitions, oldest first (default excluded)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    out = []
+    for name in names:
+        m = _NAME_RE.match(name)
+        if m:
+            out.append((name, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(out, key=lambda x: x[1])
+
+
+def create_partition(month):
+    """
+    Add the partition for `month`. Rows that already landed in the default
+    partition for that range are moved into it before it is attached.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(month)
+    lo, hi = month.isoformat(), add_months(month, 1).isoformat()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} "
+            f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            [lo, hi],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)",
+            [lo, hi],
+        )
+    return name
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """Create any missing partitions from the current month to months_ahead out."""
+    current = month_start(today or date.today())
+    existing = {m for _, m in list_partitions()}
+    created = []
+    for i in range(months_ahead + 1):
+        month = add_months(current, i)
+        if month not in existing:
+            created.append(create_partition(month))
+    return created
+
+
+def archive_path(name):
+    return f"{ARCHIVE_DIR}/{name}.csv.gz"
+
+
+def archive_partition(name, month, tablespace=""):
+    """
+    Write one monthly partition to <ARCHIVE_DIR>/<name>.csv.gz in the default
+    storage and, with `tablespace`, move it there (cheaper disk). The partition
+    stays attached: every reader that sums over Donation (raised totals,
+    balances, payouts owed, statements, exports) still sees its rows.
+    Returns (storage path, rows); path is "" when the snapshot already existed.
+    """
+    qn = connection.ops.quote_name
+    path = ""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {qn(name)}")
+        rows = cursor.fetchone()[0]
+
+        if not default_storage.exists(archive_path(name)):
+            # COPY streams straight into the gzip temp file, nothing is held in memory
+            with tempfile.TemporaryFile() as tmp:
+                with gzip.GzipFile(fileobj=tmp, mode="wb") as gz:
+                    cursor.copy_expert(
+                        f"COPY (SELECT * FROM {qn(name)} ORDER BY id) TO STDOUT WITH (FORMAT csv, HEADER true)",
+                        gz,
+                    )
+                tmp.seek(0)
+                path = default_storage.save(archive_path(name), File(tmp))
+
+        if tablespace:
+            cursor.execute(
+                "SELECT 1 FROM pg_class c JOIN pg_tablespace t ON t.oid = c.reltablespace "
+                "WHERE c.relname = %s AND t.spcname = %s",
+                [name, tablespace],
+            )
+            if cursor.fetchone() is None:
+                cursor.execute(f"ALTER TABLE {qn(name)} SET TABLESPACE {qn(tablespace)}")
+    return path, rows
+
+
+def archivable(before):
+    """Monthly partitions that end on or before `before`."""
+    return [(name, month) for name, month in list_partitions() if add_months(month, 1) <= before]
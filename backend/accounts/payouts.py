@@ -0,0 +1,89 @@
+"""
+Payout-method configuration for a fundraiser.
+
+Every write goes through save_payout_methods(): one bulk INSERT .. ON CONFLICT
+(fundraiser, method) DO UPDATE, so saving six methods costs the same as one.
+Call it inside the caller's transaction.
+"""
+from django.db.models import Exists, OuterRef, Q
+
+from .models import FundraiserPayout
+
+BANK_FIELDS = ["bank_account_title", "bank_account_number", "bank_iban", "bank_raast_id"]
+WALLET_FIELDS = ["phone_number"]
+UPDATE_FIELDS = ["is_enabled", *BANK_FIELDS, *WALLET_FIELDS]
+
+
+def _setup_row(fundraiser, m):
+    # the setup screen sends full rows: a bank row clears the wallet phone and vice versa
+    obj = FundraiserPayout(fundraiser=fundraiser, method=m["method"], is_enabled=m["is_enabled"])
+    if m["method"] == FundraiserPayout.METHOD_BANK:
+        for f in BANK_FIELDS:
+            setattr(obj, f, m.get(f, ""))
+    else:
+        obj.phone_number = m.get("phone_number", "")
+    return obj
+
+
+def save_payout_methods(fundraiser, methods, partial=False):
+    """
+    Upsert payout rows by method.
+
+    partial=False: each row replaces the stored one (payout setup step).
+    partial=True: only the keys sent are changed (fundraiser edit); the current
+    rows are read in one query and merged before the upsert.
+    """
+    # one row per method, or the upsert would hit the same row twice: partial
+    # entries are merged in order, full rows replace earlier ones
+    merged = {}
+    for m in methods:
+        if m.get("method"):
+            merged[m["method"]] = {**merged.get(m["method"], {}), **m} if partial else m
+    methods = list(merged.values())
+    if not methods:
+        return []
+
+    if partial:
+        existing = {
+            p.method: p
+            for p in FundraiserPayout.objects.filter(
+                fundraiser=fundraiser, method__in=[m["method"] for m in methods]
+            )
+        }
+        rows = []
+        for m in methods:
+            obj = existing.get(m["method"]) or FundraiserPayout(fundraiser=fundraiser, method=m["method"])
+            for k, v in m.items():
+                setattr(obj, k, v)
+            rows.append(obj)
+    else:
+        rows = [_setup_row(fundraiser, m) for m in methods]
+
+    return FundraiserPayout.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["fundraiser", "method"],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def usable_payouts(qs):
+    """
+    Enabled rows with a complete destination (the fields
+    FundraiserPayoutMethodInputSerializer requires). Autosave may store an
+    enabled row before its details are filled in; such rows don't count.
+    """
+    bank = Q(method=FundraiserPayout.METHOD_BANK)
+    return qs.filter(is_enabled=True).filter(
+        (bank & ~Q(bank_account_title="") & ~Q(bank_account_number=""))
+        | (~bank & ~Q(phone_number=""))
+    )
+
+
+def with_payout_readiness(qs):
+    """Annotate has_enabled_payout so publish checks it in the same query as the fundraiser."""
+    return qs.annotate(
+        has_enabled_payout=Exists(
+            usable_payouts(FundraiserPayout.objects.filter(fundraiser=OuterRef("pk")))
+        )
+    )
@@ -0,0 +1,225 @@
+"""
+On-demand profiling of single requests, for staff.
+
+A staff user asks for a token (POST /api/auth/profiles/token/, optionally
+bound to a path prefix) and replays the slow request with it, either as an
+"X-Profile: <token>" header or a "_profile=<token>" query parameter. The
+token is signed with SECRET_KEY, expires after PROFILE_TOKEN_MAX_AGE and
+profiles at most PROFILE_TOKEN_USES requests (a per-token counter in the
+cache), so only staff can turn profiling on, it can be handed to the user
+who sees the slowness, and a leaked token cannot fill the cache.
+
+That one request then runs under cProfile with every SQL statement timed. The
+report (hot functions with their callees, the queries, the raw pstats dump
+for snakeviz and the like) is kept in the cache for PROFILE_TTL and fetched
+from /api/auth/profiles/<id>/. The response carries the id in X-Profile-Id.
+Reports over PROFILE_MAX_REPORT_BYTES lose the pstats dump first, then the
+tail of the query and function lists.
+
+Requests without the header or query flag pay one dict lookup and one
+substring check, nothing else.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pickle
+import pstats
+import threading
+import time
+import traceback
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+
+from .cache import make_key, set_value, get_value
+
+HEADER = "HTTP_X_PROFILE"
+QUERY_PARAM = "_profile"
+SALT = "accounts.profiling"
+
+TOP_FUNCTIONS = 60
+TOP_CALLEES = 8
+MAX_QUERIES = 500
+MAX_SQL_CHARS = 2000
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# cProfile cannot nest, and one profiled request at a time per worker is plenty
+_busy = threading.Lock()
+
+
+def make_token(user, path=""):
+    return signing.dumps({"u": user.pk, "p": path, "n": uuid.uuid4().hex}, salt=SALT, compress=True)
+
+
+def read_token(token):
+    """The token payload, or None when it is forged or expired."""
+    try:
+        return signing.loads(token, salt=SALT, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def _report_key(profile_id):
+    return make_key("profile", profile_id)
+
+
+def _use_token(payload):
+    """Count one use of the token; False once it has profiled PROFILE_TOKEN_USES requests."""
+    key = make_key("profile-uses", payload.get("n", ""))
+    cache.add(key, 0, settings.PROFILE_TOKEN_MAX_AGE)
+    try:
+        return cache.incr(key) <= settings.PROFILE_TOKEN_USES
+    except ValueError:  # evicted in between
+        return False
+
+
+def get_report(profile_id):
+    return get_value(_report_key(profile_id))
+
+
+class _QueryLog:
+    def __init__(self):
+        self.queries = []
+        self.seconds = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds += elapsed
+            self.count += 1
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({
+                    "sql": sql[:MAX_SQL_CHARS],
+                    "ms": round(elapsed * 1000, 3),
+                    "many": many,
+                    "caller": _app_caller(),
+                })
+
+
+def _app_caller():
+    """Innermost accounts/ frame that issued the query, as 'file.py:line in func'."""
+    for frame in reversed(traceback.extract_stack(limit=40)[:-3]):
+        if frame.filename.startswith(_APP_DIR) and not frame.filename.endswith("profiling.py"):
+            return f"{os.path.relpath(frame.filename, _APP_DIR)}:{frame.lineno} in {frame.name}"
+    return ""
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name  # built-in
+    return f"{filename}:{line}({name})"
+
+
+def _functions(stats):
+    """Top functions by cumulative time, each with its most expensive callees."""
+    stats.calc_callees()
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+    out = []
+    for func, (_, calls, total, cumulative, _) in rows:
+        callees = sorted(
+            stats.all_callees.get(func, {}).items(), key=lambda item: item[1][3], reverse=True
+        )[:TOP_CALLEES]
+        out.append({
+            "function": _label(func),
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+            "callees": [
+                {"function": _label(c), "calls": s[1], "cumulative_ms": round(s[3] * 1000, 3)}
+                for c, s in callees
+            ],
+        })
+    return out
+
+
+def _build_report(request, response, profiler, queries, seconds, user_id):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    return {
+        "method": request.method,
+        "path": request.path,
+        "query_string": request.META.get("QUERY_STRING", ""),
+        "status": response.status_code,
+        "requested_by": user_id,
+        "created_at": time.time(),
+        "duration_ms": round(seconds * 1000, 3),
+        "sql": {
+            "count": queries.count,
+            "total_ms": round(queries.seconds * 1000, 3),
+            "queries": queries.queries,
+            "truncated": queries.count > len(queries.queries),
+        },
+        "functions": _functions(stats),
+        "pstats": marshal.dumps(stats.stats),
+    }
+
+
+def _cap_report(report):
+    """Shrink the report to PROFILE_MAX_REPORT_BYTES: drop the pstats dump, then halve the lists."""
+    limit = settings.PROFILE_MAX_REPORT_BYTES
+    if len(pickle.dumps(report)) <= limit:
+        return report
+    report["pstats"] = b""
+    queries, functions = report["sql"]["queries"], report["functions"]
+    while (queries or functions) and len(pickle.dumps(report)) > limit:
+        del queries[len(queries) // 2:]
+        del functions[len(functions) // 2:]
+        report["sql"]["truncated"] = True
+    return report
+
+
+class ProfilingMiddleware:
+    """Runs the request under cProfile when it carries a valid profiling token."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        meta = request.META
+        if HEADER not in meta and QUERY_PARAM + "=" not in meta.get("QUERY_STRING", ""):
+            return self.get_response(request)
+
+        token = meta.get(HEADER) or request.GET.get(QUERY_PARAM, "")
+        payload = read_token(token)
+        if payload is None or not request.path.startswith(payload.get("p") or "/"):
+            return self.get_response(request)
+
+        if not _busy.acquire(blocking=False):
+            response = self.get_response(request)
+            response["X-Profile-Status"] = "busy"
+            return response
+
+        if not _use_token(payload):
+            _busy.release()
+            response = self.get_response(request)
+            response["X-Profile-Status"] = "used"
+            return response
+
+        try:
+            queries = _QueryLog()
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            with connection.execute_wrapper(queries):
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            seconds = time.perf_counter() - started
+        finally:
+            _busy.release()
+
+        profile_id = uuid.uuid4().hex
+        report = _cap_report(_build_report(request, response, profiler, queries, seconds, payload["u"]))
+        set_value(_report_key(profile_id), report, settings.PROFILE_TTL)
+        response["X-Profile-Id"] = profile_id
+        return response
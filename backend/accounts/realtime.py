@@ -0,0 +1,235 @@
+"""
+Donation push channel (Server-Sent Events), mounted by config/asgi.py.
+
+    GET /api/stream/donations/                  every donation (home page cards)
+    GET /api/stream/fundraisers/<id>/           one fundraiser (public page)
+
+Each event carries deltas (raised_delta / supporters_delta) so open pages can
+update their totals without refetching the aggregate endpoints.
+
+REALTIME_BROKER picks how events travel between processes:
+  "memory" -> in-process only (local dev, single uvicorn worker)
+  "redis"  -> Redis pub/sub at REALTIME_REDIS_URL; one subscription per worker
+              process, fanned out in memory to every open stream
+"""
+import asyncio
+import json
+import logging
+import re
+import threading
+
+from django.conf import settings
+
+GLOBAL_CHANNEL = "donations"
+STREAM_PREFIX = "/api/stream/"
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+_ROUTES = [
+    (re.compile(r"^/api/stream/donations/?$"), lambda m: GLOBAL_CHANNEL),
+    (re.compile(r"^/api/stream/fundraisers/(\d+)/?$"), lambda m: fundraiser_channel(m.group(1))),
+]
+
+
+def fundraiser_channel(fundraiser_id):
+    return f"fundraiser:{fundraiser_id}"
+
+
+# ----------------------------
+# Brokers
+# ----------------------------
+
+class InMemoryBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel -> set of (loop, queue)
+
+    def publish(self, channel, event):
+        self._dispatch(channel, event)
+
+    def _dispatch(self, channel, event):
+        with self._lock:
+            targets = list(self._subscribers.get(channel, ()))
+        for loop, queue in targets:
+            # publish() runs in Django's sync thread; queues belong to the event loop
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+    async def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(entry)
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self._lock:
+            subs = self._subscribers.get(channel)
+            if not subs:
+                return
+            for entry in [e for e in subs if e[1] is queue]:
+                subs.discard(entry)
+            if not subs:
+                self._subscribers.pop(channel, None)
+
+
+def _offer(queue, event):
+    # a slow client loses its oldest events instead of growing memory
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+class RedisBroker(InMemoryBroker):
+    def __init__(self, url, prefix):
+        super().__init__()
+        import redis
+
+        self._url = url
+        self._prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def publish(self, channel, event):
+        self._client.publish(self._prefix + channel, json.dumps(event))
+
+    async def subscribe(self, channel):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return await super().subscribe(channel)
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self._url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(self._prefix + "*")
+        async for message in pubsub.listen():
+            if message.get("type") != "pmessage":
+                continue
+            channel = message["channel"].decode()[len(self._prefix):]
+            self._dispatch(channel, json.loads(message["data"]))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.REALTIME_BROKER == "redis":
+                    _broker = RedisBroker(settings.REALTIME_REDIS_URL, settings.REALTIME_CHANNEL_PREFIX)
+                else:
+                    _broker = InMemoryBroker()
+    return _broker
+
+
+# ----------------------------
+# Publishing (sync, from views)
+# ----------------------------
+
+def donation_event(donation, supporters_delta=1):
+    from .serializers import PublicDonationListSerializer
+
+    donor = PublicDonationListSerializer(donation).data
+    return {
+        "type": "donation",
+        "fundraiser_id": donation.fundraiser_id,
+        "raised_delta": donor["amount"],
+        "supporters_delta": supporters_delta,
+        "donation": {
+            "id": donor["id"],
+            "donor_display": donor["donor_display"],
+            "amount": donor["amount"],
+            "created_at": donor["created_at"],
+        },
+    }
+
+
+def publish_donation(donation, supporters_delta=1):
+    """Call after the donation is committed (transaction.on_commit)."""
+    event = donation_event(donation, supporters_delta)
+    broker = get_broker()
+    try:
+        broker.publish(fundraiser_channel(donation.fundraiser_id), event)
+        broker.publish(GLOBAL_CHANNEL, event)
+    except Exception:
+        # the donation is already saved; a lost push only means a stale page
+        logger.exception("realtime publish failed for donation=%s", donation.id)
+
+
+# ----------------------------
+# SSE ASGI app
+# ----------------------------
+
+def _cors_headers(scope):
+    if getattr(settings, "CORS_ALLOW_ALL_ORIGINS", False):
+        return [(b"access-control-allow-origin", b"*")]
+    origin = dict(scope.get("headers") or []).get(b"origin", b"")
+    if origin and origin.decode() in getattr(settings, "CORS_ALLOWED_ORIGINS", []):
+        return [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+    return []
+
+
+async def _plain(send, status, body):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def stream_application(scope, receive, send):
+    channel = None
+    for pattern, to_channel in _ROUTES:
+        match = pattern.match(scope["path"])
+        if match:
+            channel = to_channel(match)
+            break
+    if channel is None:
+        return await _plain(send, 404, b"Not found")
+    if scope["method"] != "GET":
+        return await _plain(send, 405, b"Method not allowed")
+
+    broker = get_broker()
+    queue = await broker.subscribe(channel)
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                _offer(queue, None)  # wake the sender loop
+                return
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+                *_cors_headers(scope),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b"retry: 5000\n\n", "more_body": True})
+
+        while not disconnected.is_set():
+            try:
+                event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                if event is None:
+                    break
+                chunk = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+            except asyncio.TimeoutError:
+                chunk = b": keep-alive\n\n"
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    except OSError:
+        pass
+    finally:
+        watcher.cancel()
+        broker.unsubscribe(channel, queue)
@@ -0,0 +1,262 @@
+"""
+Donation receipts and annual statements (DonorDocument).
+
+Documents are HTML (templates/accounts/receipts/), printable to PDF from the
+browser, and saved under receipts/ in the default storage. The API never
+renders in the request thread: request_receipt() / request_statement() hand
+the job to a small per-process thread pool (RECEIPT_WORKERS). A cache lock
+keeps a document from being queued twice across workers. The client polls
+until the document is ready, then gets a signed URL that is cached for half
+its lifetime.
+
+A statement covers one donor's received donations in one calendar year
+(current time zone). `manage.py generate_statements --year` rebuilds a whole
+year from a single query over the (donor, created_at) index, streamed and
+grouped by donor. Each donor's rows go to a pool of render+upload threads.
+Statements whose donations have not changed since the last run, per their
+source_hash, are skipped.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from decimal import Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .cache import make_key
+from .models import Donation, DonorDocument
+
+logger = logging.getLogger(__name__)
+
+JOB_LOCK_TIMEOUT = 300
+
+RECEIPT_FIELDS = [
+    "id", "donor_id", "created_at", "amount", "tip_amount", "payment_method", "card_number_last4",
+    "frequency_label", "fundraiser__title", "fundraiser__institution_name",
+    "donor__username", "donor__first_name", "donor__last_name",
+]
+STATEMENT_FIELDS = [
+    "id", "donor_id", "created_at", "amount", "payment_method", "fundraiser__title",
+    "donor__username", "donor__first_name", "donor__last_name",
+]
+
+
+def receipt_number(donation_id):
+    return f"MRJ-{donation_id:08d}"
+
+
+def year_range(year):
+    return timezone.make_aware(datetime(year, 1, 1)), timezone.make_aware(datetime(year + 1, 1, 1))
+
+
+def _donor_name(row):
+    return f"{row['donor__first_name']} {row['donor__last_name']}".strip() or row["donor__username"]
+
+
+def _received():
+    return Donation.objects.filter(status=Donation.STATUS_RECEIVED, donor__isnull=False)
+
+
+def _store(lookup, content, filename, count, total, source_hash=""):
+    """Save the rendered file, point the document row at it, drop the previous file."""
+    name = default_storage.save(f"receipts/{filename}", ContentFile(content))
+    with transaction.atomic():
+        doc = DonorDocument.objects.select_for_update().filter(**lookup).first()
+        old = doc.file.name if doc else ""
+        doc = doc or DonorDocument(**lookup)
+        doc.file.name = name
+        doc.donations_count = count
+        doc.total_amount = total
+        doc.source_hash = source_hash
+        doc.save()
+    if old and old != name:
+        default_storage.delete(old)
+    return doc
+
+
+# ----------------------------
+# Rendering
+# ----------------------------
+
+def generate_receipt(donation_id):
+    d = _received().filter(id=donation_id).values(*RECEIPT_FIELDS).first()
+    if d is None:
+        return None
+    number = receipt_number(d["id"])
+    html = render_to_string("accounts/receipts/receipt.html", {
+        "d": d,
+        "number": number,
+        "donor_name": _donor_name(d),
+        "total": d["amount"] + d["tip_amount"],
+        "generated_at": timezone.now(),
+    })
+    return _store(
+        {"kind": DonorDocument.KIND_RECEIPT, "donation_id": d["id"], "donor_id": d["donor_id"]},
+        html.encode(), f"{number}.html", 1, d["amount"],
+    )
+
+
+def statement_hash(rows):
+    h = hashlib.sha256()
+    for r in rows:
+        h.update(f"{r['id']}:{r['amount']};".encode())
+    return h.hexdigest()
+
+
+def save_statement(donor_id, year, rows, source_hash=None):
+    total = sum((r["amount"] for r in rows), Decimal("0.00"))
+    for r in rows:
+        r["number"] = receipt_number(r["id"])
+    html = render_to_string("accounts/receipts/statement.html", {
+        "year": year,
+        "rows": rows,
+        "total": total,
+        "donor_name": _donor_name(rows[0]),
+        "generated_at": timezone.now(),
+    })
+    return _store(
+        {"kind": DonorDocument.KIND_STATEMENT, "donor_id": donor_id, "year": year},
+        html.encode(), f"statement-{year}-{donor_id}.html", len(rows), total,
+        source_hash or statement_hash(rows),
+    )
+
+
+def donor_year(donor_id, year):
+    start, end = year_range(year)
+    return _received().filter(donor_id=donor_id, created_at__gte=start, created_at__lt=end)
+
+
+def generate_statement(donor_id, year):
+    rows = list(donor_year(donor_id, year).order_by("created_at", "id").values(*STATEMENT_FIELDS))
+    if not rows:
+        return None
+    return save_statement(donor_id, year, rows)
+
+
+# ----------------------------
+# Background jobs (API)
+# ----------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.RECEIPT_WORKERS, thread_name_prefix="receipts")
+    return _pool
+
+
+def _in_background(job_key, fn, *args):
+    lock = make_key("receipt_job", job_key)
+    if not cache.add(lock, 1, JOB_LOCK_TIMEOUT):
+        return  # already queued or running somewhere
+
+    def run():
+        close_old_connections()
+        try:
+            fn(*args)
+        except Exception:
+            # the lock is dropped below, so the next request queues it again
+            logger.exception("receipt job %s failed", job_key)
+        finally:
+            cache.delete(lock)
+            close_old_connections()
+
+    _executor().submit(run)
+
+
+def request_receipt(donation_id):
+    """The receipt if it exists, else None after queueing it."""
+    doc = DonorDocument.objects.filter(kind=DonorDocument.KIND_RECEIPT, donation_id=donation_id).first()
+    if doc is None:
+        _in_background(f"receipt:{donation_id}", generate_receipt, donation_id)
+    return doc
+
+
+def request_statement(donor_id, year):
+    """
+    (document or None, state): "ready", "pending" (queued; a statement whose
+    count/total no longer match the year's donations is rebuilt) or "empty".
+    """
+    doc = DonorDocument.objects.filter(kind=DonorDocument.KIND_STATEMENT, donor_id=donor_id, year=year).first()
+    totals = donor_year(donor_id, year).aggregate(n=Count("id"), total=Sum("amount"))
+    if not totals["n"]:
+        return doc, "empty"
+    if doc is not None and doc.donations_count == totals["n"] and doc.total_amount == totals["total"]:
+        return doc, "ready"
+    _in_background(f"statement:{donor_id}:{year}", generate_statement, donor_id, year)
+    return doc, "pending"
+
+
+# ----------------------------
+# Bulk (generate_statements)
+# ----------------------------
+
+def statement_groups(year, chunk_size=2000):
+    """(donor_id, rows) for every donor with donations in `year`, from one streamed query."""
+    start, end = year_range(year)
+    rows = (
+        _received()
+        .filter(created_at__gte=start, created_at__lt=end)
+        .order_by("donor_id", "created_at", "id")
+        .values(*STATEMENT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for donor_id, group in groupby(rows, key=lambda r: r["donor_id"]):
+        yield donor_id, list(group)
+
+
+def _render_job(donor_id, year, rows, source_hash):
+    try:
+        save_statement(donor_id, year, rows, source_hash)
+    finally:
+        close_old_connections()
+
+
+def regenerate_year(year, workers=4, force=False, log=logger.info):
+    existing = dict(
+        DonorDocument.objects
+        .filter(kind=DonorDocument.KIND_STATEMENT, year=year)
+        .values_list("donor_id", "source_hash")
+    )
+    stats = {"donors": 0, "written": 0, "skipped": 0, "failed": 0}
+
+    def collect(done):
+        for future in done:
+            if future.exception():
+                stats["failed"] += 1
+                log(f"statement failed: {future.exception()}")
+            else:
+                stats["written"] += 1
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="statements") as pool:
+        pending = set()
+        for donor_id, rows in statement_groups(year):
+            stats["donors"] += 1
+            source_hash = statement_hash(rows)
+            if not force and existing.get(donor_id) == source_hash:
+                stats["skipped"] += 1
+                continue
+            # bounded backlog: the reader never gets far ahead of the renderers
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(pool.submit(_render_job, donor_id, year, rows, source_hash))
+            if stats["donors"] % 1000 == 0:
+                log(f"{stats['donors']} donors read")
+        collect(wait(pending).done)
+
+    return stats
@@ -0,0 +1,174 @@
+"""
+Item-to-item "similar fundraisers" from co-donation data.
+
+The fundraiser x donor matrix is never materialised: the database builds the
+distinct (donor, fundraiser) pairs and self-joins them on donor, which gives
+the co-donation counts (the sparse A.T @ A) for one chunk of fundraisers at a
+time, so memory is bounded by the chunk, not by the number of donations.
+Cosine similarity is co / sqrt(n_a * n_b), with n the number of distinct
+donors.
+
+Campaigns with few donors are blended with a content score (same category,
+same location) so new fundraisers still get neighbours:
+
+    score = a * cosine + (1 - a) * content,   a = n / (n + SHRINK)
+
+Only the top K active fundraisers per source are kept, in FundraiserSimilarity.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from .models import Donation, Fundraiser, FundraiserSimilarity
+
+TOP_K = 12
+SHRINK = 10
+CATEGORY_WEIGHT = 0.6
+LOCATION_WEIGHT = 0.4
+# content candidates kept per category / location (by supporters)
+CONTENT_POOL = 50
+# donors spread over more fundraisers than this say little and make the join quadratic
+MAX_DONOR_FUNDRAISERS = 200
+
+PAIRS_TABLE = "similarity_pairs"
+_PAIRS_SQL = """
+    SELECT DISTINCT d.donor_id, d.fundraiser_id
+    FROM {donation} d
+    WHERE d.status = %s AND d.donor_id IS NOT NULL AND d.fundraiser_id IS NOT NULL
+      AND d.donor_id NOT IN (
+          SELECT donor_id FROM {donation}
+          WHERE status = %s AND donor_id IS NOT NULL AND fundraiser_id IS NOT NULL
+          GROUP BY donor_id HAVING COUNT(DISTINCT fundraiser_id) > %s
+      )
+"""
+
+
+def create_pairs_table():
+    """
+    Materialise the distinct (donor, fundraiser) pairs once per build as a
+    temp table (per connection), so each chunk joins an indexed table instead
+    of rescanning donations.
+    """
+    donation = connection.ops.quote_name(Donation._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {PAIRS_TABLE}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {PAIRS_TABLE} AS {_PAIRS_SQL.format(donation=donation)}",
+            [Donation.STATUS_RECEIVED, Donation.STATUS_RECEIVED, MAX_DONOR_FUNDRAISERS],
+        )
+        cursor.execute(f"CREATE INDEX {PAIRS_TABLE}_donor ON {PAIRS_TABLE} (donor_id, fundraiser_id)")
+        cursor.execute(f"CREATE INDEX {PAIRS_TABLE}_fundraiser ON {PAIRS_TABLE} (fundraiser_id, donor_id)")
+
+
+def drop_pairs_table():
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {PAIRS_TABLE}")
+
+
+def donor_counts():
+    """fundraiser_id -> distinct donors (the column norms squared)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT fundraiser_id, COUNT(*) FROM {PAIRS_TABLE} GROUP BY fundraiser_id")
+        return dict(cursor.fetchall())
+
+
+def co_donations(lo, hi):
+    """(source, other, co-donors) for sources with lo <= id <= hi, streamed."""
+    sql = (
+        f"SELECT a.fundraiser_id, b.fundraiser_id, COUNT(*) "
+        f"FROM {PAIRS_TABLE} a JOIN {PAIRS_TABLE} b "
+        f"ON a.donor_id = b.donor_id AND a.fundraiser_id <> b.fundraiser_id "
+        f"WHERE a.fundraiser_id BETWEEN %s AND %s "
+        f"GROUP BY a.fundraiser_id, b.fundraiser_id"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [lo, hi])
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            yield from rows
+
+
+def _content_pools(targets):
+    by_category, by_location = defaultdict(list), defaultdict(list)
+    for t in targets:  # already ordered by supporters
+        cat, loc = t["category"].strip().lower(), t["location"].strip().lower()
+        if cat and len(by_category[cat]) < CONTENT_POOL:
+            by_category[cat].append(t["id"])
+        if loc and len(by_location[loc]) < CONTENT_POOL:
+            by_location[loc].append(t["id"])
+    return by_category, by_location
+
+
+def build(chunk_size=500, log=print):
+    """Recompute FundraiserSimilarity for every published fundraiser."""
+    create_pairs_table()
+    try:
+        return _build(chunk_size, log)
+    finally:
+        drop_pairs_table()
+
+
+def _build(chunk_size, log):
+    counts = donor_counts()
+
+    # recommended: active only; keyed info for the content score
+    targets = list(
+        Fundraiser.objects
+        .filter(status=Fundraiser.STATUS_ACTIVE)
+        .order_by("-supporters_count", "-id")
+        .values("id", "category", "location")
+    )
+    info = {t["id"]: (t["category"].strip().lower(), t["location"].strip().lower()) for t in targets}
+    by_category, by_location = _content_pools(targets)
+
+    sources = Fundraiser.objects.exclude(status=Fundraiser.STATUS_DRAFT)
+    last_id = 0
+    written = 0
+
+    while True:
+        chunk = list(
+            sources.filter(id__gt=last_id).order_by("id").values("id", "category", "location")[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1]["id"]
+        lo, hi = chunk[0]["id"], chunk[-1]["id"]
+
+        cosine = defaultdict(dict)
+        for src, other, co in co_donations(lo, hi):
+            if other in info:
+                cosine[src][other] = co / math.sqrt(counts[src] * counts[other])
+
+        rows = []
+        for s in chunk:
+            sid = s["id"]
+            cat, loc = s["category"].strip().lower(), s["location"].strip().lower()
+            alpha = counts.get(sid, 0) / (counts.get(sid, 0) + SHRINK)
+
+            candidates = set(cosine[sid]) | set(by_category.get(cat, [])) | set(by_location.get(loc, []))
+            candidates.discard(sid)
+
+            scored = []
+            for cid in candidates:
+                ccat, cloc = info[cid]
+                content = (CATEGORY_WEIGHT if cat and ccat == cat else 0) + (LOCATION_WEIGHT if loc and cloc == loc else 0)
+                score = alpha * cosine[sid].get(cid, 0.0) + (1 - alpha) * content
+                if score > 0:
+                    scored.append((score, cid))
+
+            for rank, (score, cid) in enumerate(heapq.nlargest(TOP_K, scored), start=1):
+                rows.append(FundraiserSimilarity(fundraiser_id=sid, similar_id=cid, rank=rank, score=score))
+
+        with transaction.atomic():
+            FundraiserSimilarity.objects.filter(fundraiser_id__gte=lo, fundraiser_id__lte=hi).delete()
+            FundraiserSimilarity.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+        log(f"fundraisers {lo}..{hi}: {len(rows)} rows")
+
+    # drafts (e.g. a fundraiser moved back to draft) keep no stale rows
+    FundraiserSimilarity.objects.filter(fundraiser__status=Fundraiser.STATUS_DRAFT).delete()
+    return written
@@ -0,0 +1,225 @@
+"""
+Recurring donations (RecurringDonation), started by a donation sent with
+"recurring": true and a frequency_label of weekly/monthly/quarterly/yearly.
+The label alone is not consent (the checkout used to preselect "monthly").
+
+`manage.py run_recurring_donations` walks the due subscriptions
+(status, next_run_at index) in batches. Each batch is one transaction:
+
+1. SELECT .. FOR UPDATE SKIP LOCKED claims up to batch_size due rows, so any
+   number of schedulers can run at once without charging a row twice;
+2. their fundraisers are locked, also SKIP LOCKED, and their status is read
+   under that lock. Closing a fundraiser and donating lock the fundraiser
+   before its subscriptions; the scheduler holds subscriptions first, so it
+   never waits on a fundraiser: subscriptions whose fundraiser is busy are
+   left for the next run. Subscriptions to fundraisers no longer active end;
+3. the next donations are bulk-inserted;
+4. totals move once per fundraiser per batch (collected_amount, supporters,
+   rollups), fundraisers in id order;
+5. the subscriptions move to their next cycle with one bulk UPDATE.
+
+Only donors whose account is active are charged; closing or deactivating an
+account cancels its subscriptions (cancel_for_donor).
+
+Run n of a subscription is due at started_at + n periods (months are calendar
+months, clamped to the month end), so due dates never drift. If the scheduler
+was down for several periods only one donation is created and the missed
+cycles are skipped.
+"""
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .metrics import donations_received
+from .models import Donation, Fundraiser, RecurringDonation
+from .notifications import notify_donations
+from .rollups import add_collected, record_donations
+from .sketches import add_supporters
+
+PERIOD_MONTHS = {
+    RecurringDonation.FREQ_MONTHLY: 1,
+    RecurringDonation.FREQ_QUARTERLY: 3,
+    RecurringDonation.FREQ_YEARLY: 12,
+}
+FREQUENCIES = {RecurringDonation.FREQ_WEEKLY, *PERIOD_MONTHS}
+
+# copied from the subscription onto each donation it creates
+COPIED_FIELDS = [
+    "amount", "tip_amount", "donor_name", "is_anonymous", "payment_method",
+    "payer_phone", "card_holder_name", "card_number_last4", "card_expiry",
+]
+
+
+def frequency_of(label):
+    """The RecurringDonation frequency for a Donation.frequency_label, or None (one-time)."""
+    label = (label or "").strip().lower()
+    return label if label in FREQUENCIES else None
+
+
+def run_at(started_at, frequency, cycle):
+    """When run number `cycle` (1 = the first repeat) of a subscription is due."""
+    if frequency == RecurringDonation.FREQ_WEEKLY:
+        return started_at + timedelta(weeks=cycle)
+    m = started_at.month - 1 + PERIOD_MONTHS[frequency] * cycle
+    year, month = started_at.year + m // 12, m % 12 + 1
+    day = min(started_at.day, calendar.monthrange(year, month)[1])
+    return started_at.replace(year=year, month=month, day=day)
+
+
+def next_cycle(started_at, frequency, cycle, now):
+    """(cycle, due) of the first run after `cycle` that is still in the future."""
+    cycle += 1
+    due = run_at(started_at, frequency, cycle)
+    while due <= now:
+        cycle += 1
+        due = run_at(started_at, frequency, cycle)
+    return cycle, due
+
+
+def subscribe(donation):
+    """
+    Start (or restart) the donor's subscription to this fundraiser from a
+    received donation the donor opted in to repeating. Call inside the
+    transaction that creates it. Returns the subscription, or None when the
+    label is not a frequency.
+    """
+    frequency = frequency_of(donation.frequency_label)
+    if frequency is None or donation.donor_id is None or donation.status != Donation.STATUS_RECEIVED:
+        return None
+    started_at = donation.created_at
+    # a new recurring donation supersedes one still awaiting confirmation
+    RecurringDonation.objects.filter(
+        donor_id=donation.donor_id, fundraiser_id=donation.fundraiser_id,
+        status=RecurringDonation.STATUS_UNCONFIRMED,
+    ).update(status=RecurringDonation.STATUS_CANCELLED, updated_at=timezone.now())
+    subscription, _ = RecurringDonation.objects.update_or_create(
+        donor_id=donation.donor_id,
+        fundraiser_id=donation.fundraiser_id,
+        status=RecurringDonation.STATUS_ACTIVE,
+        defaults={
+            **{name: getattr(donation, name) for name in COPIED_FIELDS},
+            "frequency": frequency,
+            "source_donation_id": donation.id,
+            "started_at": started_at,
+            "cycle": 1,
+            "next_run_at": run_at(started_at, frequency, 1),
+        },
+    )
+    return subscription
+
+
+def confirm(subscription, now):
+    """
+    Start charging an unconfirmed subscription (accounts migration 0027): the
+    first run is the next cycle after `now`, nothing missed is charged.
+    Returns False if the donor already has an active one for the fundraiser.
+    """
+    if RecurringDonation.objects.filter(
+        donor_id=subscription.donor_id, fundraiser_id=subscription.fundraiser_id,
+        status=RecurringDonation.STATUS_ACTIVE,
+    ).exists():
+        return False
+    subscription.cycle, subscription.next_run_at = next_cycle(
+        subscription.started_at, subscription.frequency, 0, now
+    )
+    subscription.status = RecurringDonation.STATUS_ACTIVE
+    subscription.save(update_fields=["status", "cycle", "next_run_at", "updated_at"])
+    return True
+
+
+def due_subscriptions(now):
+    return RecurringDonation.objects.filter(
+        status=RecurringDonation.STATUS_ACTIVE, next_run_at__lte=now, donor__is_active=True,
+    )
+
+
+def cancel_for_donor(donor_id):
+    """Cancel a donor's active subscriptions (account closed/deactivated). Returns rows changed."""
+    return RecurringDonation.objects.filter(
+        donor_id=donor_id, status=RecurringDonation.STATUS_ACTIVE
+    ).update(status=RecurringDonation.STATUS_CANCELLED, updated_at=timezone.now())
+
+
+def _claim(now, batch_size):
+    return list(
+        due_subscriptions(now)
+        .select_for_update(skip_locked=True, of=("self",))
+        .select_related("fundraiser")
+        .only(
+            "id", "donor_id", "frequency", "started_at", "cycle", "runs_count", *COPIED_FIELDS,
+            "fundraiser__id", "fundraiser__owner_id",
+        )
+        .order_by("next_run_at")[:batch_size]
+    )
+
+
+def _donation(subscription):
+    return Donation(
+        recipient_id=subscription.fundraiser.owner_id,
+        fundraiser_id=subscription.fundraiser_id,
+        donor_id=subscription.donor_id,
+        frequency_label=subscription.frequency,
+        status=Donation.STATUS_RECEIVED,
+        **{name: getattr(subscription, name) for name in COPIED_FIELDS},
+    )
+
+
+def run_due(now, batch_size=1000, log=print):
+    stats = {"batches": 0, "donations": 0, "amount": Decimal("0.00"), "ended": 0, "deferred": 0}
+
+    while True:
+        with transaction.atomic():
+            claimed = _claim(now, batch_size)
+            if not claimed:
+                break
+
+            # fundraiser rows in id order: the lock order for everything below
+            status = dict(
+                Fundraiser.objects
+                .select_for_update(skip_locked=True)
+                .filter(id__in={s.fundraiser_id for s in claimed})
+                .order_by("id")
+                .values_list("id", "status")
+            )
+            ended = [s.id for s in claimed if status.get(s.fundraiser_id, Fundraiser.STATUS_ACTIVE) != Fundraiser.STATUS_ACTIVE]
+            live = [s for s in claimed if status.get(s.fundraiser_id) == Fundraiser.STATUS_ACTIVE]
+            deferred = len(claimed) - len(ended) - len(live)
+            if not live and not ended:
+                # every fundraiser is locked by a close/donation right now; next run
+                stats["deferred"] += deferred
+                break
+            if ended:
+                RecurringDonation.objects.filter(id__in=ended).update(status=RecurringDonation.STATUS_ENDED)
+
+            donations = Donation.objects.bulk_create([_donation(s) for s in live], batch_size=1000)
+
+            add_collected(donations)
+            donors = defaultdict(list)
+            for d in donations:
+                donors[d.fundraiser_id].append(d.donor_id)
+            for fundraiser_id in sorted(donors):
+                add_supporters(fundraiser_id, donors[fundraiser_id])
+            record_donations(donations)
+            notify_donations(donations)
+
+            for s in live:
+                s.cycle, s.next_run_at = next_cycle(s.started_at, s.frequency, s.cycle, now)
+                s.last_run_at = s.updated_at = now
+                s.runs_count += 1
+            RecurringDonation.objects.bulk_update(
+                live, ["cycle", "next_run_at", "last_run_at", "runs_count", "updated_at"], batch_size=1000
+            )
+            transaction.on_commit(lambda donations=donations: donations_received(donations))
+
+        stats["batches"] += 1
+        stats["donations"] += len(donations)
+        stats["amount"] += sum((d.amount for d in donations), Decimal("0.00"))
+        stats["ended"] += len(ended)
+        stats["deferred"] += deferred
+        log(f"batch {stats['batches']}: {len(donations)} donations, {len(ended)} ended, {deferred} deferred")
+
+    return stats
@@ -0,0 +1,254 @@
+"""
+Payout engine driven by Fundraiser.reimbursement_period.
+
+A run (see `manage.py run_payouts`) does three set-based steps:
+
+1. schedule: published fundraisers without next_payout_at get their next
+   cycle boundary after now (published_at + n periods, or the day after the
+   deadline). Closed fundraisers are never scanned here: closing makes them
+   due (lifecycle.close_fundraisers) and so does money received after they
+   settled (rollups.add_collected);
+2. settle: due fundraisers (next_payout_at <= now, indexed) are walked in
+   id-ordered chunks. For each chunk the owed amount (received - already paid)
+   and the payout method are computed in SQL. Ledger rows are bulk-inserted
+   into a per-method PayoutBatch, and next_payout_at moves to the first cycle
+   boundary after now, so a run that was missed for a while pays once;
+3. export: each touched batch is streamed to a CSV in the default storage.
+
+Ledger rows are unique per (fundraiser, period_end), so re-running a run or a
+crashed chunk never pays a cycle twice.
+"""
+import csv
+import io
+import logging
+import tempfile
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Donation, Fundraiser, FundraiserPayout, PayoutBatch, PayoutLedgerEntry
+
+logger = logging.getLogger(__name__)
+
+PERIOD_DAYS = {
+    Fundraiser.REIMB_3: 3,
+    Fundraiser.REIMB_7: 7,
+    Fundraiser.REIMB_15: 15,
+    Fundraiser.REIMB_30: 30,
+}
+
+# an on_deadline fundraiser still active after its deadline is re-checked daily
+DEADLINE_RECHECK = timedelta(days=1)
+
+ZERO = Decimal("0.00")
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+EXPORT_COLUMNS = [
+    "fundraiser_id", "amount", "method", "period_end",
+    "bank_account_title", "bank_account_number", "bank_iban", "bank_raast_id", "phone_number",
+]
+
+
+def cycle_after(period, anchor, now):
+    """The first boundary anchor + n * period (n >= 1) after `now`."""
+    step = timedelta(days=PERIOD_DAYS[period])
+    if anchor + step > now:
+        return anchor + step
+    return anchor + step * ((now - anchor) // step + 1)
+
+
+def first_cycle(row, now):
+    """First payout of an active fundraiser (values row), or None while it has no schedule."""
+    period = row["reimbursement_period"]
+    if period in PERIOD_DAYS:
+        return cycle_after(period, row["published_at"], now)
+    if period == Fundraiser.REIMB_DEADLINE and row["deadline"]:
+        return datetime.combine(row["deadline"] + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+    return None
+
+
+def next_cycle(row, now):
+    period = row["reimbursement_period"]
+    if period in PERIOD_DAYS:
+        return cycle_after(period, row["next_payout_at"], now)
+    return now + DEADLINE_RECHECK
+
+
+def schedule_unscheduled(now, chunk_size=1000):
+    scheduled = 0
+    unscheduled = (
+        Fundraiser.objects
+        .filter(
+            status=Fundraiser.STATUS_ACTIVE,
+            published_at__isnull=False,
+            next_payout_at__isnull=True,
+        )
+        .exclude(reimbursement_period="")
+        .order_by("id")
+        .values("id", "reimbursement_period", "published_at", "deadline")
+    )
+    last_id = 0
+    while True:
+        rows = list(unscheduled.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        due = [Fundraiser(id=r["id"], next_payout_at=first_cycle(r, now)) for r in rows]
+        due = [f for f in due if f.next_payout_at is not None]
+        Fundraiser.objects.bulk_update(due, ["next_payout_at"])
+        scheduled += len(due)
+    return scheduled
+
+
+def due_fundraisers(now):
+    return Fundraiser.objects.filter(next_payout_at__lte=now)
+
+
+def _with_owed(qs):
+    received = (
+        Donation.objects
+        .filter(fundraiser=OuterRef("pk"), status=Donation.STATUS_RECEIVED)
+        .values("fundraiser")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    paid = (
+        PayoutLedgerEntry.objects
+        .filter(fundraiser=OuterRef("pk"))
+        .values("fundraiser")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    return qs.annotate(
+        owed=ExpressionWrapper(
+            Coalesce(Subquery(received, output_field=MONEY), ZERO)
+            - Coalesce(Subquery(paid, output_field=MONEY), ZERO),
+            output_field=MONEY,
+        ),
+    )
+
+
+def _owed_rows(ids):
+    return _with_owed(Fundraiser.objects.filter(id__in=ids)).values("id", "payout_method", "next_payout_at", "owed")
+
+
+def run_payouts(now, run_key, chunk_size=1000, dry_run=False, log=logger.info):
+    scheduled = 0 if dry_run else schedule_unscheduled(now)
+    stats = {"scheduled": scheduled, "due": 0, "entries": 0, "amount": ZERO, "no_method": 0}
+    batches = {}
+    last_id = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                due_fundraisers(now)
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            stats["due"] += len(ids)
+
+            owed = [r for r in _owed_rows(ids) if r["owed"] > 0]
+
+            # enabled destinations for the whole chunk in one query
+            destinations = {}
+            for p in FundraiserPayout.objects.filter(
+                fundraiser_id__in=[r["id"] for r in owed], is_enabled=True
+            ).order_by("method"):
+                destinations.setdefault(p.fundraiser_id, {})[p.method] = p
+
+            payable = []
+            for r in owed:
+                enabled = destinations.get(r["id"])
+                if not enabled:
+                    stats["no_method"] += 1
+                    continue
+                # the fundraiser's main payout_method if enabled, else the first enabled one
+                dest = enabled.get(r["payout_method"]) or next(iter(enabled.values()))
+                payable.append((r, dest))
+
+            if dry_run:
+                stats["entries"] += len(payable)
+                stats["amount"] += sum((r["owed"] for r, _ in payable), ZERO)
+                continue
+
+            entries = []
+            for r, dest in payable:
+                if dest.method not in batches:
+                    batches[dest.method], _ = PayoutBatch.objects.get_or_create(run_key=run_key, method=dest.method)
+                entries.append(PayoutLedgerEntry(
+                    batch=batches[dest.method],
+                    fundraiser_id=r["id"],
+                    method=dest.method,
+                    amount=r["owed"],
+                    period_end=r["next_payout_at"],
+                    bank_account_title=dest.bank_account_title,
+                    bank_account_number=dest.bank_account_number,
+                    bank_iban=dest.bank_iban,
+                    bank_raast_id=dest.bank_raast_id,
+                    phone_number=dest.phone_number,
+                ))
+            # cycles already in the ledger are skipped; bulk_create(ignore_conflicts)
+            # would return them too and inflate the counts
+            paid = set(
+                PayoutLedgerEntry.objects
+                .filter(fundraiser_id__in=[e.fundraiser_id for e in entries], period_end__in={e.period_end for e in entries})
+                .values_list("fundraiser_id", "period_end")
+            )
+            entries = [e for e in entries if (e.fundraiser_id, e.period_end) not in paid]
+            PayoutLedgerEntry.objects.bulk_create(entries, ignore_conflicts=True)
+            stats["entries"] += len(entries)
+            stats["amount"] += sum((e.amount for e in entries), ZERO)
+
+            # closed fundraisers are fully settled now; active ones move to the next cycle
+            Fundraiser.objects.filter(id__in=ids, status=Fundraiser.STATUS_CLOSED).update(next_payout_at=None)
+            Fundraiser.objects.bulk_update(
+                [
+                    Fundraiser(id=r["id"], next_payout_at=next_cycle(r, now))
+                    for r in Fundraiser.objects.filter(id__in=ids).exclude(status=Fundraiser.STATUS_CLOSED)
+                    .values("id", "reimbursement_period", "next_payout_at")
+                ],
+                ["next_payout_at"],
+            )
+
+        log(f"settled up to fundraiser id {last_id} ({stats['due']} due so far)")
+
+    if dry_run:
+        return stats
+
+    # every batch of the run, so re-running also repairs an export that failed last time
+    finalized = [_finalize_batch(b) for b in PayoutBatch.objects.filter(run_key=run_key).order_by("method")]
+    stats["batches"] = [(b.method, b.entries_count, str(b.total_amount)) for b in finalized]
+    return stats
+
+
+def _finalize_batch(batch):
+    totals = batch.entries.aggregate(n=Count("id"), total=Sum("amount"))
+    batch.entries_count = totals["n"] or 0
+    batch.total_amount = totals["total"] or ZERO
+
+    # stream the ledger rows through a temp file, never a list in memory
+    with tempfile.TemporaryFile() as tmp:
+        text = io.TextIOWrapper(tmp, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in batch.entries.order_by("id").values_list(*EXPORT_COLUMNS).iterator(chunk_size=2000):
+            writer.writerow(row)
+        text.flush()
+        tmp.seek(0)
+
+        if batch.export_file:
+            default_storage.delete(batch.export_file.name)
+        batch.export_file.save(f"{batch.run_key}-{batch.method}.csv", File(tmp), save=False)
+        text.detach()
+
+    batch.save(update_fields=["entries_count", "total_amount", "export_file"])
+    return batch
@@ -0,0 +1,160 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Donation, DonationRollup, Fundraiser, RecurringDonation
+
+GRANULARITIES = [DonationRollup.GRANULARITY_HOUR, DonationRollup.GRANULARITY_DAY]
+
+# longest range the analytics endpoint serves per granularity
+MAX_RANGE = {
+    DonationRollup.GRANULARITY_HOUR: timedelta(days=14),
+    DonationRollup.GRANULARITY_DAY: timedelta(days=366 * 2),
+}
+
+# frequency_label values that make a donation recurring (recurring.frequency_of);
+# anything else, including the frontend's "one_time", is a one-off gift
+RECURRING_LABELS = {value for value, _ in RecurringDonation.FREQUENCY_CHOICES}
+
+
+def is_recurring_label(label):
+    return (label or "").strip().lower() in RECURRING_LABELS
+
+
+def bucket_start(dt, granularity):
+    # same truncation as TruncHour/TruncDay in the rebuild command (current tz)
+    dt = timezone.localtime(dt).replace(minute=0, second=0, microsecond=0)
+    if granularity == DonationRollup.GRANULARITY_DAY:
+        dt = dt.replace(hour=0)
+    return dt
+
+
+def record_donations(donations):
+    """
+    Add received donations to their hour/day buckets.
+
+    Call inside the transaction that creates the donations. All touched buckets
+    are upserted with a single INSERT .. ON CONFLICT DO UPDATE that increments
+    the counters, so concurrent writers never lose an update.
+    """
+    increments = defaultdict(lambda: [0, 0, Decimal("0.00"), Decimal("0.00")])
+
+    for d in donations:
+        if d.fundraiser_id is None or d.status != Donation.STATUS_RECEIVED:
+            continue
+        for granularity in GRANULARITIES:
+            key = (d.fundraiser_id, d.recipient_id, granularity,
+                   bucket_start(d.created_at, granularity), d.payment_method or "")
+            inc = increments[key]
+            inc[0] += 1
+            inc[1] += 1 if is_recurring_label(d.frequency_label) else 0
+            inc[2] += d.amount or 0
+            inc[3] += d.tip_amount or 0
+
+    if not increments:
+        return
+
+    table = connection.ops.quote_name(DonationRollup._meta.db_table)
+    columns = [
+        "fundraiser_id", "recipient_id", "granularity", "bucket_start", "payment_method",
+        "donations_count", "recurring_count", "amount_total", "tip_total",
+    ]
+    counters = columns[5:]
+    rows, params = [], []
+    for (fundraiser_id, recipient_id, granularity, start, method), inc in increments.items():
+        rows.append("(%s)" % ", ".join(["%s"] * len(columns)))
+        params.extend([
+            fundraiser_id, recipient_id, granularity,
+            connection.ops.adapt_datetimefield_value(start), method,
+            inc[0], inc[1], connection.ops.adapt_decimalfield_value(inc[2]),
+            connection.ops.adapt_decimalfield_value(inc[3]),
+        ])
+
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join(rows)} "
+        f"ON CONFLICT (fundraiser_id, granularity, bucket_start, payment_method) DO UPDATE SET "
+        + ", ".join(f"{c} = {table}.{c} + EXCLUDED.{c}" for c in counters)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def add_collected(donations):
+    """
+    Add received donations to Fundraiser.collected_amount, one UPDATE per
+    fundraiser. Call in the same transaction as record_donations; rows are
+    touched in id order so concurrent writers lock them in the same order.
+    Money landing on a closed, already settled fundraiser makes it due for
+    the next payout run (accounts.reimbursements).
+    """
+    totals = defaultdict(Decimal)
+    for d in donations:
+        if d.fundraiser_id is not None and d.status == Donation.STATUS_RECEIVED:
+            totals[d.fundraiser_id] += d.amount or 0
+    now = timezone.now()
+    for fundraiser_id in sorted(totals):
+        Fundraiser.objects.filter(pk=fundraiser_id).update(
+            collected_amount=F("collected_amount") + totals[fundraiser_id],
+            next_payout_at=Case(
+                When(status=Fundraiser.STATUS_CLOSED, next_payout_at__isnull=True, then=Value(now)),
+                default=F("next_payout_at"),
+            ),
+        )
+
+
+def summarize(rows, granularity, start, end):
+    """
+    Build the analytics payload from rollup rows of one range scan:
+    time series, payment-method breakdown and totals.
+    """
+    series = {}
+    methods = defaultdict(lambda: {"donations": 0, "amount": Decimal("0.00")})
+    totals = {"donations": 0, "recurring": 0, "amount": Decimal("0.00"), "tips": Decimal("0.00")}
+
+    for r in rows:
+        point = series.setdefault(r["bucket_start"], {"donations": 0, "amount": Decimal("0.00"), "tips": Decimal("0.00")})
+        point["donations"] += r["donations_count"]
+        point["amount"] += r["amount_total"]
+        point["tips"] += r["tip_total"]
+
+        m = methods[r["payment_method"] or "unknown"]
+        m["donations"] += r["donations_count"]
+        m["amount"] += r["amount_total"]
+
+        totals["donations"] += r["donations_count"]
+        totals["recurring"] += r["recurring_count"]
+        totals["amount"] += r["amount_total"]
+        totals["tips"] += r["tip_total"]
+
+    return {
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "series": [
+            {"bucket": b, "donations": p["donations"], "amount": str(p["amount"]), "tips": str(p["tips"])}
+            for b, p in sorted(series.items())
+        ],
+        "payment_methods": sorted(
+            [
+                {"payment_method": k, "donations": v["donations"], "amount": str(v["amount"])}
+                for k, v in methods.items()
+            ],
+            key=lambda x: -x["donations"],
+        ),
+        "totals": {
+            "donations": totals["donations"],
+            "recurring": totals["recurring"],
+            "amount": str(totals["amount"]),
+            "tips": str(totals["tips"]),
+        },
+    }
+
+
+ROLLUP_VALUES = [
+    "bucket_start", "payment_method", "donations_count",
+    "recurring_count", "amount_total", "tip_total",
+]
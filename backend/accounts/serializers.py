@@ -2,16 +2,81 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import PayoutPreference
 from .models import NotificationPreference, AccountSetting, Donation, Fundraiser, FundraiserDocument, FundraiserPayout
+from .models import RecurringDonation
 from django.db.models import Count, Sum, Q
 from datetime import date, time, datetime
 from django.utils import timezone
 from django.db.models.functions import Coalesce
 from decimal import Decimal
 from django.core.files.storage import default_storage
+from django.db import transaction
+from contextlib import ExitStack
+from django.core.exceptions import FieldDoesNotExist
+from .blobs import release_blob, stored_blob
+from .payouts import save_payout_methods
 
 User = get_user_model()
 
 
+def _param_list(request, name):
+    return {f.strip() for f in (request.query_params.get(name) or "").split(",") if f.strip()}
+
+
+def requested_fields(request, available):
+    """
+    Sparse fieldsets for list endpoints: ?fields=a,b keeps only those,
+    ?exclude=c drops them. Unknown names are ignored and "id" is always kept.
+    """
+    names = list(available)
+    if request is None:
+        return names
+    only, skip = _param_list(request, "fields"), _param_list(request, "exclude")
+    return [n for n in names if n == "id" or ((not only or n in only) and n not in skip)]
+
+
+class SparseFieldsetMixin:
+    """
+    Drops the fields not asked for (request from the serializer context) and
+    tells the view which model columns are still needed, so the SELECT list
+    shrinks with the payload.
+    """
+    # serializer field -> model columns, for method fields (source "*")
+    sparse_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(requested_fields(self.context.get("request"), self.fields))
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def sparse_field_names(cls, request):
+        return requested_fields(request, cls().fields)
+
+    @classmethod
+    def sparse_queryset(cls, qs, request):
+        """qs.only() the columns behind the requested fields; annotations are left to the view."""
+        fields = cls().fields
+        model = cls.Meta.model
+        columns = {"id"}
+        for name in requested_fields(request, fields):
+            sources = cls.sparse_sources.get(name)
+            if sources is None:
+                source = fields[name].source
+                sources = [] if source == "*" else [source.replace(".", "__")]
+            for col in sources:
+                try:
+                    model._meta.get_field(col.split("__")[0])
+                except FieldDoesNotExist:
+                    continue  # annotation
+                columns.add(col)
+        related = {c.split("__")[0] for c in columns if "__" in c}
+        if related:
+            qs = qs.select_related(*related)
+        return qs.only(*columns)
+
+
 class SignupSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
 
@@ -148,7 +213,17 @@ class DonationSerializer(serializers.ModelSerializer):
         model = Donation
         fields = ["id", "donor_name", "amount", "frequency_label", "status", "created_at"]
 
-class FundraiserListSerializer(serializers.ModelSerializer):
+class RecurringDonationSerializer(serializers.ModelSerializer):
+    fundraiser_title = serializers.CharField(source="fundraiser.title", read_only=True)
+
+    class Meta:
+        model = RecurringDonation
+        fields = [
+            "id", "fundraiser", "fundraiser_title", "amount", "tip_amount", "frequency", "status",
+            "payment_method", "started_at", "next_run_at", "last_run_at", "runs_count",
+        ]
+
+class FundraiserListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     collected_amount = serializers.DecimalField(
         source="collected_amount_real",
         max_digits=12,
@@ -207,7 +282,7 @@ class FundraiserDonationSerializer(serializers.ModelSerializer):
 class FundraiserDocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = FundraiserDocument
-        fields = ["id", "file", "uploaded_at"]
+        fields = ["id", "file", "name", "uploaded_at"]
 
 class FundraiserPayoutSerializer(serializers.ModelSerializer):
     class Meta:
@@ -304,24 +379,19 @@ class FundraiserEditSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         payouts_data = validated_data.pop("payouts", None)
 
-        instance = super().update(instance, validated_data)
-
-        if payouts_data is not None:
-            # Upsert each payout row by method
-            for p in payouts_data:
-                method = p.get("method")
-                if not method:
-                    continue
+        old_image = instance.image.name if instance.image else ""
+        with ExitStack() as stack:
+            if validated_data.get("image"):
+                validated_data["image"] = stack.enter_context(stored_blob(validated_data["image"]))
 
-                obj, _ = FundraiserPayout.objects.get_or_create(
-                    fundraiser=instance,
-                    method=method
-                )
+            with transaction.atomic():
+                instance = super().update(instance, validated_data)
+                if "image" in validated_data and old_image != (instance.image.name or ""):
+                    release_blob(old_image)
 
-                # update fields
-                for k, v in p.items():
-                    setattr(obj, k, v)
-                obj.save()
+                if payouts_data is not None:
+                    # upsert payout rows by method, only the keys that were sent
+                    save_payout_methods(instance, payouts_data, partial=True)
 
         return instance
 
@@ -503,9 +573,10 @@ class FundraiserPayoutSetupSerializer(serializers.Serializer):
             seen.add(m["method"])
         return methods
 
-class FeaturedFundraiserSerializer(serializers.ModelSerializer):
+class FeaturedFundraiserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     organizer = serializers.CharField(source="owner.username", read_only=True)
-    donations_count = serializers.IntegerField(read_only=True)
+    # shown as supporters on the cards: distinct donors, not donation rows
+    donations_count = serializers.IntegerField(source="supporters_count", read_only=True)
     collected_amount = serializers.DecimalField(
         source="collected_amount_real",
         max_digits=12,
@@ -514,6 +585,8 @@ class FeaturedFundraiserSerializer(serializers.ModelSerializer):
     )
     days_left = serializers.SerializerMethodField()
 
+    sparse_sources = {"days_left": ["deadline"]}
+
     class Meta:
         model = Fundraiser
         fields = [
@@ -534,20 +607,23 @@ class FeaturedFundraiserSerializer(serializers.ModelSerializer):
         delta = (obj.deadline - date.today()).days
         return max(delta, 0)
 
-class DiscoverFundraiserSerializer(serializers.ModelSerializer):
+class DiscoverFundraiserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     organizer = serializers.CharField(source="owner.username", read_only=True)
-    supporters = serializers.IntegerField(source="donations_count", read_only=True)
+    excerpt = serializers.CharField(source="description_excerpt", read_only=True)
+    supporters = serializers.IntegerField(source="supporters_count", read_only=True)
     raised = serializers.DecimalField(source="collected_amount_real", max_digits=12, decimal_places=2, read_only=True)
 
     daysLeft = serializers.SerializerMethodField()
     deadline_at = serializers.SerializerMethodField()  # ✅ NEW
 
+    sparse_sources = {"daysLeft": ["deadline"], "deadline_at": ["deadline"]}
+
     class Meta:
         model = Fundraiser
         fields = [
             "id",
             "title",
-            "description",
+            "excerpt",
             "image",
             "category",
             "location",
@@ -604,7 +680,7 @@ class PublicDonationListSerializer(serializers.ModelSerializer):
 class PublicFundraiserDetailSerializer(serializers.ModelSerializer):
     organizer = serializers.CharField(source="owner.username", read_only=True)
     raised = serializers.DecimalField(source="collected_amount_real", max_digits=12, decimal_places=2, read_only=True)
-    supporters = serializers.IntegerField(source="donations_count", read_only=True)
+    supporters = serializers.IntegerField(source="supporters_count", read_only=True)
 
     image_url = serializers.SerializerMethodField()
     deadline_at = serializers.SerializerMethodField()
@@ -659,8 +735,69 @@ class PublicFundraiserDetailSerializer(serializers.ModelSerializer):
                 url = ""
             out.append({
                 "id": d.id,
-                "name": (d.file.name.split("/")[-1] if d.file else ""),
+                "name": d.name or (d.file.name.split("/")[-1] if d.file else ""),
                 "url": url,
                 "uploaded_at": d.uploaded_at,
             })
-        return out
\ No newline at end of file
+        return out
+
+
+class FundraiserSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Card-sized public view of a fundraiser (accounts.summaries); "image" is the storage name."""
+    organizer = serializers.CharField(source="owner.username", read_only=True)
+    excerpt = serializers.CharField(source="description_excerpt", read_only=True)
+    raised = serializers.DecimalField(source="collected_amount_real", max_digits=12, decimal_places=2, read_only=True)
+    supporters = serializers.IntegerField(source="supporters_count", read_only=True)
+    image = serializers.SerializerMethodField()
+    deadline_at = serializers.SerializerMethodField()
+
+    sparse_sources = {"image": ["image"], "deadline_at": ["deadline"]}
+
+    class Meta:
+        model = Fundraiser
+        fields = [
+            "id",
+            "title",
+            "excerpt",
+            "category",
+            "location",
+            "organizer",
+            "target_amount",
+            "raised",
+            "supporters",
+            "deadline",
+            "deadline_at",
+            "image",
+        ]
+
+    def get_image(self, obj):
+        return obj.image.name if obj.image else ""
+
+    def get_deadline_at(self, obj):
+        if not obj.deadline:
+            return None
+        dt = datetime.combine(obj.deadline, time(23, 59, 59))
+        if timezone.is_naive(dt):
+            dt = timezone.make_aware(dt, timezone.get_current_timezone())
+        return dt.isoformat()
+
+
+class SimilarFundraiserSerializer(serializers.ModelSerializer):
+    organizer = serializers.CharField(source="owner.username", read_only=True)
+    supporters = serializers.IntegerField(source="supporters_count", read_only=True)
+    score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Fundraiser
+        fields = [
+            "id",
+            "title",
+            "image",
+            "category",
+            "location",
+            "organizer",
+            "target_amount",
+            "supporters",
+            "deadline",
+            "score",
+        ]
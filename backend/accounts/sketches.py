@@ -0,0 +1,130 @@
+"""
+HyperLogLog sketches for unique-supporter counts.
+
+Each fundraiser keeps a sketch of its donor ids (Fundraiser.supporters_sketch)
+plus the cached estimate (Fundraiser.supporters_count). Sketches merge by
+taking the register-wise max, so the distinct supporters of a category or of
+all of a user's fundraisers is a merge instead of COUNT(DISTINCT donor_id).
+
+P=12 -> 4096 registers, standard error 1.04/sqrt(4096) ~= 1.6%. Small sketches
+are stored sparse (index, value pairs) so a campaign with a few donors costs
+a few bytes rather than 4 KB.
+"""
+import hashlib
+import math
+import struct
+
+from .models import Fundraiser
+
+P = 12
+M = 1 << P
+STD_ERROR = 1.04 / math.sqrt(M)
+
+_DENSE = b"D"
+_SPARSE = b"S"
+_ALPHA = 0.7213 / (1 + 1.079 / M)
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    __slots__ = ("registers",)
+
+    def __init__(self, registers=None):
+        self.registers = registers if registers is not None else bytearray(M)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data or b"")
+        if not data:
+            return cls()
+        kind, body = data[:1], data[1:]
+        if kind == _DENSE:
+            return cls(bytearray(body))
+        registers = bytearray(M)
+        for idx, val in struct.iter_unpack(">HB", body):
+            registers[idx] = val
+        return cls(registers)
+
+    def to_bytes(self):
+        nonzero = [(i, v) for i, v in enumerate(self.registers) if v]
+        if not nonzero:
+            return b""
+        if len(nonzero) * 3 < M:
+            return _SPARSE + b"".join(struct.pack(">HB", i, v) for i, v in nonzero)
+        return _DENSE + bytes(self.registers)
+
+    def add(self, value):
+        """Returns True if the sketch changed."""
+        h = _hash64(value)
+        idx = h >> (64 - P)
+        rest = h & ((1 << (64 - P)) - 1)
+        rank = (64 - P) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        regs = self.registers
+        for i, v in enumerate(other.registers):
+            if v > regs[i]:
+                regs[i] = v
+        return self
+
+    def estimate(self):
+        zeros = 0
+        total = 0.0
+        for v in self.registers:
+            total += 2.0 ** -v
+            if not v:
+                zeros += 1
+        raw = _ALPHA * M * M / total
+        if raw <= 2.5 * M and zeros:
+            # small range: linear counting is much more accurate
+            return int(round(M * math.log(M / zeros)))
+        return int(round(raw))
+
+
+def merge_sketches(blobs):
+    """Union of stored sketches (bytes) -> HyperLogLog."""
+    out = HyperLogLog()
+    for blob in blobs:
+        if blob:
+            out.merge(HyperLogLog.from_bytes(blob))
+    return out
+
+
+def add_supporters(fundraiser_id, donor_ids):
+    """
+    Fold donor ids into a fundraiser's sketch. Call inside the transaction that
+    writes the donations; the row lock serialises concurrent donors.
+    Returns the change in the supporters estimate.
+    """
+    donor_ids = [d for d in donor_ids if d is not None]
+    if not donor_ids:
+        return 0
+
+    fundraiser = (
+        Fundraiser.objects
+        .select_for_update()
+        .only("id", "supporters_sketch", "supporters_count")
+        .get(pk=fundraiser_id)
+    )
+    sketch = HyperLogLog.from_bytes(fundraiser.supporters_sketch)
+    changed = False
+    for donor_id in donor_ids:
+        changed = sketch.add(donor_id) or changed
+    if not changed:
+        return 0
+
+    before = fundraiser.supporters_count
+    fundraiser.supporters_sketch = sketch.to_bytes()
+    fundraiser.supporters_count = sketch.estimate()
+    Fundraiser.objects.filter(pk=fundraiser_id).update(
+        supporters_sketch=fundraiser.supporters_sketch,
+        supporters_count=fundraiser.supporters_count,
+    )
+    return fundraiser.supporters_count - before
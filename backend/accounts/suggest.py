@@ -0,0 +1,197 @@
+"""
+In-memory prefix index for the Discover search box (fundraisers/suggest/).
+
+Every worker keeps a trie over active fundraiser titles (each word start, so
+"wat" finds "Clean water well"), categories, locations and organizer names.
+Each node stores its top TOP_N entries by popularity, so a lookup is one walk
+down the prefix; only a small unsplit bucket is ever filtered.
+
+The index is rebuilt in a background thread when the public_fundraisers cache
+namespace moves (publish/close, see accounts.lifecycle) or after MAX_AGE
+seconds (supporter counts drift). Requests keep using the previous index
+while the new one is built.
+"""
+import re
+from bisect import insort
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Count, Sum
+
+from .cache import namespace_version
+from .lifecycle import PUBLIC_NAMESPACE
+from .models import Fundraiser
+
+TOP_N = 10
+MAX_KEY_LEN = 24
+MAX_AGE = 600
+# how often a request may look at the shared namespace version
+VERSION_CHECK_EVERY = 1.0
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _SPACES.sub(" ", text).strip().lower()
+
+
+class _Node:
+    __slots__ = ("children", "bucket", "top")
+
+    def __init__(self):
+        self.children = None
+        self.bucket = []  # [(key, item)] until the node splits
+        self.top = []  # [(-weight, entry_idx)] best first, at most TOP_N
+
+
+def _offer(top, item):
+    if any(idx == item[1] for _, idx in top):
+        return  # same entry reached through another key
+    if len(top) < TOP_N:
+        insort(top, item)
+    elif item < top[-1]:
+        top.pop()
+        insort(top, item)
+
+
+class SuggestIndex:
+    """
+    Burst trie: a node keeps its keys in a small bucket and only grows
+    children once more than BUCKET keys pass through it, so long unique
+    tails never become chains of single-child nodes.
+    """
+    BUCKET = 32
+
+    def __init__(self):
+        self.root = _Node()
+        self.entries = []
+
+    def add(self, keys, weight, payload):
+        idx = len(self.entries)
+        self.entries.append(payload)
+        item = (-weight, idx)
+        for key in keys:
+            key = normalize(key)[:MAX_KEY_LEN]
+            if key:
+                self._insert(self.root, key, item, 0)
+
+    def _insert(self, node, key, item, depth):
+        while True:
+            _offer(node.top, item)
+            if node.children is None:
+                node.bucket.append((key, item))
+                if len(node.bucket) > self.BUCKET and depth < MAX_KEY_LEN:
+                    self._split(node, depth)
+                return
+            if len(key) == depth:
+                return
+            child = node.children.get(key[depth])
+            if child is None:
+                child = node.children[key[depth]] = _Node()
+            node, depth = child, depth + 1
+
+    def _split(self, node, depth):
+        bucket, node.bucket, node.children = node.bucket, None, {}
+        for key, item in bucket:
+            if len(key) > depth:
+                child = node.children.get(key[depth])
+                if child is None:
+                    child = node.children[key[depth]] = _Node()
+                self._insert(child, key, item, depth + 1)
+
+    def lookup(self, prefix, limit=TOP_N):
+        prefix = normalize(prefix)[:MAX_KEY_LEN]
+        node = self.root
+        for depth, ch in enumerate(prefix):
+            if node.children is None:
+                # unsplit bucket: filter its keys by the rest of the prefix
+                items = sorted({item for key, item in node.bucket if key.startswith(prefix)})
+                return [self.entries[idx] for _, idx in items[:limit]]
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return [self.entries[idx] for _, idx in node.top[:limit]]
+
+
+def _word_starts(text):
+    words = normalize(text).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def build_index():
+    index = SuggestIndex()
+    active = Fundraiser.objects.filter(status=Fundraiser.STATUS_ACTIVE)
+
+    for f in active.values("id", "title", "supporters_count").iterator(chunk_size=2000):
+        index.add(
+            _word_starts(f["title"]),
+            f["supporters_count"] + 1,
+            {"type": "fundraiser", "id": f["id"], "label": f["title"]},
+        )
+
+    # categories, locations and organizers weigh by how much activity they group
+    for field, kind in (("category", "category"), ("location", "location"), ("owner__username", "organizer")):
+        labels = defaultdict(lambda: [None, 0])
+        rows = (
+            active.exclude(**{field: ""})
+            .values(field)
+            .annotate(n=Count("id"), supporters=Sum("supporters_count"))
+            .order_by()
+        )
+        for row in rows:
+            label = (row[field] or "").strip()
+            if not label:
+                continue
+            slot = labels[normalize(label)]
+            slot[0] = slot[0] or label
+            slot[1] += row["n"] + (row["supporters"] or 0)
+        for label, weight in labels.values():
+            index.add(_word_starts(label), weight, {"type": kind, "label": label})
+
+    return index
+
+
+_lock = threading.Lock()
+_state = {"index": None, "version": None, "built_at": 0.0, "checked_at": 0.0, "building": False}
+
+
+def _rebuild(version):
+    try:
+        index = build_index()
+        with _lock:
+            _state.update(index=index, version=version, built_at=time.monotonic())
+    finally:
+        _state["building"] = False
+        # the thread got its own connection
+        connection.close()
+
+
+def get_index():
+    now = time.monotonic()
+    if _state["index"] is None:
+        with _lock:
+            if _state["index"] is None:
+                version = namespace_version(PUBLIC_NAMESPACE)
+                _state.update(index=build_index(), version=version, built_at=now, checked_at=now)
+        return _state["index"]
+
+    if now - _state["checked_at"] >= VERSION_CHECK_EVERY:
+        _state["checked_at"] = now
+        version = namespace_version(PUBLIC_NAMESPACE)
+        stale = version != _state["version"] or now - _state["built_at"] > MAX_AGE
+        if stale and not _state["building"]:
+            _state["building"] = True
+            threading.Thread(target=_rebuild, args=(version,), daemon=True).start()
+
+    return _state["index"]
+
+
+def suggest(prefix, limit=8):
+    if not normalize(prefix):
+        return []
+    return get_index().lookup(prefix, limit)
@@ -0,0 +1,46 @@
+"""
+Public fundraiser summaries for multi-card views (fundraisers/batch/).
+
+Each summary is cached per id for a short while under the public_fundraisers
+namespace (so publish/close drop them). A batch does one get_many for the
+ids, one aggregate query for the misses and one set_many to store them.
+The cached summary keeps the image *name*; the caller signs the URLs.
+"""
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from .cache import get_many_values, namespace_version, set_many_values, versioned_key
+from .lifecycle import PUBLIC_NAMESPACE
+from .models import Donation, Fundraiser
+from .serializers import FundraiserSummarySerializer
+
+BATCH_MAX_IDS = 50
+# raised/supporters move with every donation; keep this short
+SUMMARY_TIMEOUT = 60
+
+
+def fundraiser_summaries(ids):
+    """{id: summary} for the active fundraisers among `ids`; others are left out."""
+    version = namespace_version(PUBLIC_NAMESPACE)
+    keys = {fid: versioned_key(PUBLIC_NAMESPACE, "summary", fid, version=version) for fid in ids}
+    cached = get_many_values(list(keys.values()))
+    found = {fid: cached[key] for fid, key in keys.items() if key in cached}
+
+    missing = [fid for fid in ids if fid not in found]
+    if missing:
+        qs = FundraiserSummarySerializer.sparse_queryset(
+            Fundraiser.objects.filter(id__in=missing, status=Fundraiser.STATUS_ACTIVE), None
+        ).annotate(
+            collected_amount_real=Coalesce(
+                Sum("donations__amount", filter=Q(donations__status=Donation.STATUS_RECEIVED)),
+                Decimal("0.00")
+            ),
+        )
+        fresh = {row["id"]: dict(row) for row in FundraiserSummarySerializer(qs, many=True).data}
+        if fresh:
+            set_many_values({keys[fid]: summary for fid, summary in fresh.items()}, SUMMARY_TIMEOUT)
+        found.update(fresh)
+
+    return found
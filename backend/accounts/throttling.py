@@ -0,0 +1,134 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .cache import make_key
+
+# bucket -> unix time until which it is known to be over its limit.
+# Lets a worker turn away a hammering client without touching the shared cache.
+_local_blocks = {}
+_LOCAL_BLOCKS_MAX = 10000
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60). Same format as DRF's DEFAULT_THROTTLE_RATES."""
+    num, period = rate.split("/")
+    return int(num), _PERIODS[period.strip()[0]]
+
+
+def _remember_block(bucket, until):
+    if len(_local_blocks) >= _LOCAL_BLOCKS_MAX:
+        now = time.time()
+        for k in [k for k, v in _local_blocks.items() if v <= now]:
+            _local_blocks.pop(k, None)
+        if len(_local_blocks) >= _LOCAL_BLOCKS_MAX:
+            _local_blocks.clear()
+    _local_blocks[bucket] = until
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Sliding-window counter kept in the shared cache.
+
+    Each (scope, ident) has one integer per fixed window, bumped with an atomic
+    cache.incr. The effective count is the current window plus the previous one
+    weighted by how much of it still overlaps the sliding window, so a client
+    can't double its rate at window boundaries.
+
+    The rate comes from REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] using the
+    view's `throttle_scope` (+ `rate_suffix`). A scope without a rate is not
+    throttled.
+    """
+    rate_suffix = ""
+    timer = time.time
+
+    def get_throttle_ident(self, request):
+        raise NotImplementedError
+
+    def get_rate(self, view):
+        scope = getattr(view, "throttle_scope", None)
+        if not scope:
+            return None, None
+        return scope, api_settings.DEFAULT_THROTTLE_RATES.get(scope + self.rate_suffix)
+
+    def allow_request(self, request, view):
+        self._wait = None
+        if not getattr(settings, "RATE_LIMIT_ENABLED", True):
+            return True
+
+        scope, rate = self.get_rate(view)
+        if not rate:
+            return True
+        ident = self.get_throttle_ident(request)
+        if ident is None:
+            return True
+
+        limit, period = parse_rate(rate)
+        bucket = f"{scope}{self.rate_suffix}:{ident}"
+        now = self.timer()
+
+        blocked_until = _local_blocks.get(bucket)
+        if blocked_until is not None:
+            if blocked_until > now:
+                self._wait = blocked_until - now
+                return False
+            _local_blocks.pop(bucket, None)
+
+        window = int(now // period)
+        current = self._incr(make_key("rl", bucket, window), period)
+        previous = cache.get(make_key("rl", bucket, window - 1), 0)
+
+        elapsed = now - window * period
+        estimated = previous * (1 - elapsed / period) + current
+        if estimated <= limit:
+            return True
+
+        self._wait = max(self._wait_for(limit, period, elapsed, current, previous), 1)
+        _remember_block(bucket, now + self._wait)
+        return False
+
+    def _incr(self, key, period):
+        # keep the counter for two windows: it is the "previous" one afterwards
+        try:
+            return cache.incr(key)
+        except ValueError:
+            if cache.add(key, 1, period * 2):
+                return 1
+            return cache.incr(key)
+
+    def _wait_for(self, limit, period, elapsed, current, previous):
+        if current <= limit and previous:
+            # the previous window's weight decays until there is room again
+            return period * (1 - (limit - current) / previous) - elapsed
+        # the current window alone is over: wait for it to become the previous one
+        # and decay enough
+        return (period - elapsed) + period * (1 - limit / max(current, 1))
+
+    def wait(self):
+        return self._wait
+
+
+class ScopedIPThrottle(SlidingWindowThrottle):
+    """Per client IP, rate key = `<scope>`."""
+
+    def get_throttle_ident(self, request):
+        return self.get_ident(request)
+
+
+class ScopedUserThrottle(SlidingWindowThrottle):
+    """Per authenticated user, rate key = `<scope>_user`. Anonymous requests pass."""
+    rate_suffix = "_user"
+
+    def get_throttle_ident(self, request):
+        user = getattr(request, "user", None)
+        if not user or not user.is_authenticated:
+            return None
+        return user.pk
+
+
+SCOPED_THROTTLES = [ScopedIPThrottle, ScopedUserThrottle]
@@ -1,6 +1,6 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import SignupView, ProfileView, AvatarUploadView
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import SignupView, LoginView, ProfileView, AvatarUploadView
 from .views import (
     PasswordResetStartView,
     PasswordResetResendView,
@@ -9,6 +9,7 @@ from .views import (
     SignupView, ProfileView, AvatarUploadView,
     NotificationPreferenceView, AccountSettingView,
     ChangePasswordView, DeactivateAccountView, CloseAccountView,
+    DataExportView, DataExportDownloadView,
     BalanceView, DashboardView, MyFundraisersView,
     FundraiserDetailView, FundraiserDonationsView, FundraiserCloseView,
     FundraiserEditView,
@@ -19,13 +20,20 @@ from .views import (
     FundraiserBasicView, FundraiserDetailsView,
     MyActiveFundraisersView, FundraiserLinkPreviousView,
     FundraiserPayoutSetupView, FundraiserPublishView,
+    FundraiserWizardView, FundraiserDraftAutosaveView,
     FeaturedFundraisersView, FundraiserCategoriesView, FundraiserDiscoverView,
     FundraiserPublicDetailView, FundraiserDonateCreateView,
+    FundraiserAnalyticsView, DashboardAnalyticsView,
+    FundraiserSimilarView, FundraiserSuggestView, FundraiserBatchView,
+    FundraiserChainView, FundraiserCloneView,
+    ProfileTokenView, ProfileReportView,
+    MyRecurringDonationsView, RecurringDonationCancelView, RecurringDonationConfirmView,
+    DonationReceiptView, DonationStatementView,
 )
 
 urlpatterns = [
     path("signup/", SignupView.as_view(), name="signup"),
-    path("login/", TokenObtainPairView.as_view(), name="login"),      # username + password
+    path("login/", LoginView.as_view(), name="login"),      # username + password
     path("refresh/", TokenRefreshView.as_view(), name="refresh"),
     path("me/", ProfileView.as_view(), name="me"),
     path("me/avatar/", AvatarUploadView.as_view(), name="avatar"),
@@ -38,6 +46,8 @@ urlpatterns = [
     path("change-password/", ChangePasswordView.as_view()),
     path("deactivate/", DeactivateAccountView.as_view()),
     path("close/", CloseAccountView.as_view()),
+    path("exports/", DataExportView.as_view()),
+    path("exports/<str:token>/download/", DataExportDownloadView.as_view()),
     path("balance/", BalanceView.as_view()),
     path("dashboard/", DashboardView.as_view()),
     path("dashboard/my-fundraisers/", MyFundraisersView.as_view()),
@@ -49,17 +59,34 @@ urlpatterns = [
     path("fundraisers/<int:fundraiser_id>/edit/documents/", FundraiserDocumentUploadView.as_view()),
     path("fundraisers/<int:fundraiser_id>/edit/documents/<int:doc_id>/", FundraiserDocumentDeleteView.as_view()),
     path("dashboard/my-donations/", MyDonationsView.as_view()),
+    path("dashboard/recurring/", MyRecurringDonationsView.as_view()),
+    path("dashboard/donations/<int:donation_id>/receipt/", DonationReceiptView.as_view()),
+    path("dashboard/statements/<int:year>/", DonationStatementView.as_view()),
+    path("dashboard/recurring/<int:recurring_id>/cancel/", RecurringDonationCancelView.as_view()),
+    path("dashboard/recurring/<int:recurring_id>/confirm/", RecurringDonationConfirmView.as_view()),
     path("fundraisers/start/", StartFundraiserView.as_view(), name="fundraiser-start"),
     path("fundraisers/<int:fundraiser_id>/start-details/", FundraiserStartDetailsView.as_view(), name="fundraiser-start-details"),
     path("fundraisers/<int:fundraiser_id>/basic/", FundraiserBasicView.as_view(), name="fundraiser-basic"),
     path("fundraisers/<int:fundraiser_id>/details/", FundraiserDetailsView.as_view(), name="fundraiser-details"),
     path("fundraisers/active/", MyActiveFundraisersView.as_view(), name="my-active-fundraisers"),
     path("fundraisers/<int:fundraiser_id>/link-previous/", FundraiserLinkPreviousView.as_view(), name="link-previous"),
+    path("fundraisers/<int:fundraiser_id>/chain/", FundraiserChainView.as_view(), name="fundraiser-chain"),
+    path("fundraisers/<int:fundraiser_id>/clone/", FundraiserCloneView.as_view(), name="fundraiser-clone"),
     path("fundraisers/<int:fundraiser_id>/payout-setup/", FundraiserPayoutSetupView.as_view(), name="fundraiser-payout-setup"),
     path("fundraisers/<int:fundraiser_id>/publish/", FundraiserPublishView.as_view(), name="fundraiser-publish"),
+    path("fundraisers/wizard/", FundraiserWizardView.as_view(), name="fundraiser-wizard"),
+    path("fundraisers/<int:fundraiser_id>/wizard/", FundraiserWizardView.as_view(), name="fundraiser-wizard-update"),
+    path("fundraisers/<int:fundraiser_id>/draft/", FundraiserDraftAutosaveView.as_view(), name="fundraiser-draft-autosave"),
     path("fundraisers/featured/", FeaturedFundraisersView.as_view(), name="featured-fundraisers"),
     path("fundraisers/categories/", FundraiserCategoriesView.as_view()),
     path("fundraisers/discover/", FundraiserDiscoverView.as_view()),
+    path("fundraisers/suggest/", FundraiserSuggestView.as_view()),
+    path("fundraisers/batch/", FundraiserBatchView.as_view()),
     path("fundraisers/<int:fundraiser_id>/public/", FundraiserPublicDetailView.as_view()),
+    path("fundraisers/<int:fundraiser_id>/similar/", FundraiserSimilarView.as_view()),
     path("fundraisers/<int:fundraiser_id>/donate/", FundraiserDonateCreateView.as_view()),
+    path("fundraisers/<int:fundraiser_id>/analytics/", FundraiserAnalyticsView.as_view()),
+    path("dashboard/analytics/", DashboardAnalyticsView.as_view()),
+    path("profiles/token/", ProfileTokenView.as_view()),
+    path("profiles/<str:profile_id>/", ProfileReportView.as_view()),
 ]
@@ -1,22 +1,53 @@
 import random
 import uuid
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Sum, Count, Q, Max
+from django.db.models import Sum, Count, Q, Max, F, OuterRef, Subquery
 from django.db.models import Value, IntegerField
+from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
+from django.utils.crypto import constant_time_compare
 from django.db.models.functions import Coalesce
 from decimal import Decimal
 from django.core.files.storage import default_storage
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.db import transaction
-
-from .serializers import SignupSerializer, ProfileSerializer, DonationSerializer
+from datetime import datetime, time, timedelta
+
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from .blobs import release_blob, stored_blob
+from .cache import get_or_compute, make_key, versioned_key
+from .chains import chain_root, chain_summary, invalidate_chains, would_cycle
+from .cloning import clone_fundraiser
+from .exports import load_link, make_link, request_export
+from .lifecycle import PUBLIC_NAMESPACE, close_fundraisers, invalidate_public_listings
+from .media import cached_signed_url, signed_url, signed_urls
+from . import metrics
+from .profiling import get_report, make_token
+from .notifications import notify_donations, notify_fundraisers
+from .realtime import publish_donation
+from .receipts import request_receipt, request_statement
+from .recurring import cancel_for_donor, confirm, frequency_of, subscribe
+from .payouts import save_payout_methods, with_payout_readiness
+from .wizard import apply_wizard, apply_draft_patch, publish_error
+from .rollups import add_collected, record_donations, summarize, bucket_start, MAX_RANGE, ROLLUP_VALUES
+from .sketches import add_supporters, merge_sketches
+from .suggest import suggest
+from .summaries import BATCH_MAX_IDS, fundraiser_summaries
+from .throttling import SCOPED_THROTTLES
+from .serializers import SignupSerializer, ProfileSerializer, DonationSerializer, requested_fields
+from .serializers import RecurringDonationSerializer
 from .models import NotificationPreference, AccountSetting, Fundraiser, Donation, FundraiserDocument, FundraiserPayout
+from .models import DataExport, DonationRollup, NotificationEvent, RecurringDonation
 from .serializers import (
     NotificationPreferenceSerializer,
     AccountSettingSerializer,
@@ -27,12 +58,14 @@ from .serializers import (
     StartFundraiserSerializer, FundraiserStartDetailsSerializer,
     FundraiserBasicSerializer, FundraiserLinkOptionSerializer,
     FundraiserPayoutSetupSerializer, FeaturedFundraiserSerializer,
-    DiscoverFundraiserSerializer, PublicFundraiserDetailSerializer,
+    DiscoverFundraiserSerializer, PublicFundraiserDetailSerializer, SimilarFundraiserSerializer,
     PublicDonationListSerializer,
 )
 
 class SignupView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "signup"
 
     def post(self, request):
         serializer = SignupSerializer(data=request.data)
@@ -40,6 +73,10 @@ class SignupView(APIView):
         user = serializer.save()
         return Response({"message": "User created successfully"}, status=status.HTTP_201_CREATED)
 
+class LoginView(TokenObtainPairView):
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "login"
+
 class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -67,15 +104,23 @@ class AvatarUploadView(APIView):
 
 User = get_user_model()
 OTP_TTL = 300
+OTP_MAX_ATTEMPTS = 5
 
-def _otp_key(reset_id): 
-    return f"pwreset:{reset_id}"
+# OTP state must live in the shared cache tier (CACHE_BACKEND), not per-process
+# memory: start/verify/complete can land on different gunicorn workers.
+def _otp_key(reset_id):
+    return make_key("pwreset", reset_id)
 
-def _token_key(reset_id): 
-    return f"pwreset_token:{reset_id}"
+def _token_key(reset_id):
+    return make_key("pwreset_token", reset_id)
+
+def _attempts_key(reset_id):
+    return make_key("pwreset_attempts", reset_id)
 
 class PasswordResetStartView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "password_reset"
 
     def post(self, request):
         method = request.data.get("method")      # "email" or "phone"
@@ -99,6 +144,9 @@ class PasswordResetStartView(APIView):
 
 class PasswordResetResendView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "password_reset"
+
     def post(self, request):
         reset_id = request.data.get("reset_id")
         if not reset_id:
@@ -111,12 +159,16 @@ class PasswordResetResendView(APIView):
         code = f"{random.randint(0, 999999):06d}"
         info["code"] = code
         cache.set(_otp_key(reset_id), info, OTP_TTL)
+        cache.delete(_attempts_key(reset_id))
         print(f"[PasswordReset] resend reset_id={reset_id} code={code}")
 
         return Response({"expires_in": OTP_TTL})
 
 class PasswordResetVerifyView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "password_reset_verify"
+
     def post(self, request):
         reset_id = request.data.get("reset_id")
         code = (request.data.get("code") or "").strip()
@@ -124,6 +176,17 @@ class PasswordResetVerifyView(APIView):
         info = cache.get(_otp_key(reset_id))
         if not info:
             return Response({"message": "Code expired. Please resend."}, status=400)
+
+        # cap guesses per code, independent of the caller's IP
+        cache.add(_attempts_key(reset_id), 0, OTP_TTL)
+        try:
+            attempts = cache.incr(_attempts_key(reset_id))
+        except ValueError:
+            attempts = 1
+        if attempts > OTP_MAX_ATTEMPTS:
+            cache.delete(_otp_key(reset_id))
+            return Response({"message": "Too many attempts. Please start again."}, status=400)
+
         if info["code"] != code:
             return Response({"message": "Invalid code."}, status=400)
 
@@ -155,6 +218,7 @@ class PasswordResetCompleteView(APIView):
 
         cache.delete(_otp_key(reset_id))
         cache.delete(_token_key(reset_id))
+        cache.delete(_attempts_key(reset_id))
         return Response({"message": "Password reset successful."})
 
 class NotificationPreferenceView(APIView):
@@ -222,8 +286,13 @@ class DeactivateAccountView(APIView):
         # also disable login
         request.user.is_active = False
         request.user.save()
+        cancel_for_donor(request.user.id)
 
-        return Response({"detail": "Account deactivated successfully."})
+        payload = {"detail": "Account deactivated successfully."}
+        if request.data.get("export_data", False):
+            # login is off from here on, so the download link is emailed
+            payload["export_id"] = request_export(request.user, DataExport.REASON_DEACTIVATE).id
+        return Response(payload)
 
 
 class CloseAccountView(APIView):
@@ -245,14 +314,66 @@ class CloseAccountView(APIView):
 
         request.user.is_active = False
         request.user.save()
+        cancel_for_donor(request.user.id)
+
+        payload = {"detail": "Account closed successfully."}
+        if request.data.get("export_data", False):
+            payload["export_id"] = request_export(request.user, DataExport.REASON_CLOSE).id
+        return Response(payload)
+
+
+def _export_payload(job):
+    data = {
+        "id": job.id,
+        "status": job.status,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "expires_at": job.expires_at,
+        "size": job.size,
+    }
+    if job.status == DataExport.STATUS_READY and job.expires_at > timezone.now():
+        data["url"] = make_link(job)
+    return data
+
+
+class DataExportView(APIView):
+    """
+    GET: the user's latest data export; POST: queue a new one (accounts.exports).
+    Exports are built by `manage.py run_data_exports` and emailed when ready.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        job = DataExport.objects.filter(user=request.user).order_by("-id").first()
+        if job is None:
+            return Response({"detail": "No export yet."}, status=404)
+        return Response(_export_payload(job))
+
+    def post(self, request):
+        return Response(_export_payload(request_export(request.user)), status=202)
+
+
+class DataExportDownloadView(APIView):
+    """The emailed link: redirects to a fresh signed storage URL. No login, so it works after closure."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, token):
+        job = load_link(token)
+        url = signed_url(job.file.name) if job else ""
+        if not url:
+            return Response({"detail": "This link is invalid or has expired."}, status=404)
+        return HttpResponseRedirect(url)
 
-        return Response({"detail": "Account closed successfully."})
 
 class BalanceView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        qs = Donation.objects.filter(recipient=request.user).order_by("-created_at")
+        # nothing is received before the account existed; the bound lets Postgres skip older partitions
+        qs = Donation.objects.filter(
+            recipient=request.user, created_at__gte=request.user.date_joined
+        ).order_by("-created_at")
 
         total = qs.filter(status=Donation.STATUS_RECEIVED).aggregate(
             total=Sum("amount")
@@ -272,6 +393,10 @@ class DashboardView(APIView):
         fr_total = fundraisers.aggregate(total=Sum("collected_amount"))["total"] or 0
         fr_active = fundraisers.filter(status=Fundraiser.STATUS_ACTIVE).count()
         fr_closed = fundraisers.filter(status=Fundraiser.STATUS_CLOSED).count()
+        # distinct donors across all of the user's fundraisers (sketch union)
+        fr_supporters = merge_sketches(
+            fundraisers.values_list("supporters_sketch", flat=True)
+        ).estimate()
 
         # Donations made by user (donor=request.user)
         donations_made = Donation.objects.filter(donor=request.user)
@@ -288,6 +413,7 @@ class DashboardView(APIView):
                 "collected_amount": str(fr_total),
                 "active": fr_active,
                 "closed": fr_closed,
+                "unique_supporters": fr_supporters,
             },
             "my_donations": {
                 "total_donated": str(dn_total),
@@ -304,25 +430,30 @@ class MyFundraisersView(APIView):
         q = (request.query_params.get("q") or "").strip()
         sort = (request.query_params.get("sort") or "newest").strip().lower()
 
-        # ✅ annotate real totals from donations
-        qs = (
-                Fundraiser.objects
-                .filter(owner=request.user)
-                .annotate(
-                    collected_amount_real=Coalesce(
-                        Sum(
-                            "donations__amount",
-                            filter=Q(donations__status=Donation.STATUS_RECEIVED)
-                        ),
-                        Decimal("0.00")
+        fields = FundraiserListSerializer.sparse_field_names(request)
+        qs = FundraiserListSerializer.sparse_queryset(
+            Fundraiser.objects.filter(owner=request.user), request
+        )
+
+        # ✅ annotate real totals from donations (only when shown or sorted on)
+        if "collected_amount" in fields or sort in ["collected_desc", "collected_asc"]:
+            qs = qs.annotate(
+                collected_amount_real=Coalesce(
+                    Sum(
+                        "donations__amount",
+                        filter=Q(donations__status=Donation.STATUS_RECEIVED)
                     ),
-                    donations_count=Coalesce(
-                        Count(
-                            "donations",
-                            filter=Q(donations__status=Donation.STATUS_RECEIVED)
-                        ),
-                        0
-                    )
+                    Decimal("0.00")
+                )
+            )
+        if "donations_count" in fields:
+            qs = qs.annotate(
+                donations_count=Coalesce(
+                    Count(
+                        "donations",
+                        filter=Q(donations__status=Donation.STATUS_RECEIVED)
+                    ),
+                    0
                 )
             )
 
@@ -345,7 +476,7 @@ class MyFundraisersView(APIView):
         }
         qs = qs.order_by(sort_map.get(sort, "-created_at"))
 
-        return Response(FundraiserListSerializer(qs, many=True).data)
+        return Response(FundraiserListSerializer(qs, many=True, context={"request": request}).data)
 
 class FundraiserDetailView(APIView):
     permission_classes = [IsAuthenticated]
@@ -382,7 +513,9 @@ class FundraiserDonationsView(APIView):
 
     def get(self, request, fundraiser_id):
         fundraiser = get_object_or_404(Fundraiser, id=fundraiser_id, owner=request.user)
-        qs = Donation.objects.filter(fundraiser=fundraiser).order_by("-created_at")
+        qs = Donation.objects.filter(
+            fundraiser=fundraiser, created_at__gte=fundraiser.created_at
+        ).order_by("-created_at")
         return Response(FundraiserDonationSerializer(qs, many=True).data)
 
 
@@ -390,10 +523,17 @@ class FundraiserCloseView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, fundraiser_id):
-        fundraiser = get_object_or_404(Fundraiser, id=fundraiser_id, owner=request.user)
-        fundraiser.status = Fundraiser.STATUS_CLOSED
-        fundraiser.save()
-        return Response({"detail": "Fundraiser closed successfully."}, status=status.HTTP_200_OK)
+        fundraiser = get_object_or_404(Fundraiser.objects.only("id"), id=fundraiser_id, owner=request.user)
+        with transaction.atomic():
+            closed = close_fundraisers([fundraiser.id])
+            if not closed:
+                # a draft was never public: nothing to settle, notify or invalidate
+                closed = Fundraiser.objects.filter(
+                    id=fundraiser.id, status=Fundraiser.STATUS_DRAFT
+                ).update(status=Fundraiser.STATUS_CLOSED)
+        # closing twice is fine (retries): report the current state either way
+        detail = "Fundraiser closed successfully." if closed else "Fundraiser is already closed."
+        return Response({"detail": detail, "status": Fundraiser.STATUS_CLOSED}, status=status.HTTP_200_OK)
 
 class FundraiserEditView(APIView):
     permission_classes = [IsAuthenticated]
@@ -419,8 +559,13 @@ class FundraiserCoverUploadView(APIView):
         if not file:
             return Response({"detail": "image is required"}, status=400)
 
-        fundraiser.image = file
-        fundraiser.save()
+        # same bytes already stored (another fundraiser, a re-upload) -> no upload
+        old = fundraiser.image.name if fundraiser.image else ""
+        with stored_blob(file) as name, transaction.atomic():
+            fundraiser.image = name
+            fundraiser.save(update_fields=["image"])
+            if old != fundraiser.image.name:
+                release_blob(old)
         return Response(FundraiserEditSerializer(fundraiser).data)
 
 
@@ -433,7 +578,10 @@ class FundraiserDocumentUploadView(APIView):
         if not file:
             return Response({"detail": "file is required"}, status=400)
 
-        doc = FundraiserDocument.objects.create(fundraiser=fundraiser, file=file)
+        with stored_blob(file) as name, transaction.atomic():
+            doc = FundraiserDocument.objects.create(
+                fundraiser=fundraiser, file=name, name=(file.name or "")[:255]
+            )
         return Response(FundraiserDocumentSerializer(doc).data, status=status.HTTP_201_CREATED)
 
 
@@ -443,9 +591,109 @@ class FundraiserDocumentDeleteView(APIView):
     def delete(self, request, fundraiser_id, doc_id):
         fundraiser = get_object_or_404(Fundraiser, id=fundraiser_id, owner=request.user)
         doc = get_object_or_404(FundraiserDocument, id=doc_id, fundraiser=fundraiser)
-        doc.delete()
+        with transaction.atomic():
+            doc.delete()
+            release_blob(doc.file.name)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+# My Donations keys -> the fundraiser columns grouped on for them
+MY_DONATION_FIELDS = {
+    "fundraiser_id": [],
+    "title": ["fundraiser__title"],
+    "image": ["fundraiser__image"],
+    "published_by": ["fundraiser__owner__username"],
+    "total_donated": [],
+    "frequency_label": [],
+    "left": ["fundraiser__target_amount"],
+    "last_donation": [],
+}
+
+
+class MyRecurringDonationsView(APIView):
+    """The user's recurring donations (accounts.recurring), active first."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        qs = (
+            RecurringDonation.objects
+            .filter(donor=request.user)
+            .select_related("fundraiser")
+            .order_by("status", "next_run_at")
+        )
+        return Response({"results": RecurringDonationSerializer(qs, many=True).data})
+
+
+class RecurringDonationCancelView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, recurring_id):
+        updated = RecurringDonation.objects.filter(
+            id=recurring_id, donor=request.user,
+            status__in=[RecurringDonation.STATUS_ACTIVE, RecurringDonation.STATUS_UNCONFIRMED],
+        ).update(status=RecurringDonation.STATUS_CANCELLED, updated_at=timezone.now())
+        if not updated:
+            return Response({"detail": "Active recurring donation not found."}, status=404)
+        return Response({"id": recurring_id, "status": RecurringDonation.STATUS_CANCELLED})
+
+
+class RecurringDonationConfirmView(APIView):
+    """Opt in to a subscription created from an old donation (status "unconfirmed")."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, recurring_id):
+        with transaction.atomic():
+            subscription = (
+                RecurringDonation.objects
+                .select_for_update()
+                .filter(
+                    id=recurring_id, donor=request.user,
+                    status=RecurringDonation.STATUS_UNCONFIRMED,
+                    fundraiser__status=Fundraiser.STATUS_ACTIVE,
+                )
+                .first()
+            )
+            if subscription is None:
+                return Response({"detail": "Recurring donation awaiting confirmation not found."}, status=404)
+            if not confirm(subscription, timezone.now()):
+                return Response(
+                    {"detail": "You already have an active recurring donation to this fundraiser."}, status=400
+                )
+        return Response(RecurringDonationSerializer(subscription).data)
+
+
+class DonationReceiptView(APIView):
+    """Receipt for one of the user's donations; 202 while it is being rendered (accounts.receipts)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, donation_id):
+        if not Donation.objects.filter(
+            id=donation_id, donor=request.user, status=Donation.STATUS_RECEIVED
+        ).exists():
+            return Response({"detail": "Donation not found."}, status=404)
+        doc = request_receipt(donation_id)
+        if doc is None:
+            return Response({"status": "pending"}, status=202)
+        return Response({"status": "ready", "url": cached_signed_url(doc.file.name)})
+
+
+class DonationStatementView(APIView):
+    """The user's annual statement for `year`; 202 while it is being (re)built."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, year):
+        if not 2000 <= year <= timezone.localdate().year:
+            return Response({"detail": "Invalid year."}, status=400)
+        doc, state = request_statement(request.user.id, year)
+        if state == "empty":
+            return Response({"detail": "No donations in that year."}, status=404)
+        if state == "ready":
+            return Response({"status": "ready", "url": cached_signed_url(doc.file.name)})
+        if doc is None:
+            return Response({"status": "pending"}, status=202)
+        # the previous version stays downloadable while the new one renders
+        return Response({"status": "pending", "url": cached_signed_url(doc.file.name)}, status=202)
+
+
 class MyDonationsView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -459,30 +707,38 @@ class MyDonationsView(APIView):
         if q:
             qs = qs.filter(fundraiser__title__icontains=q)
 
+        fields = requested_fields(request, MY_DONATION_FIELDS)
+
+        # only the fundraiser columns the requested fields need
+        group_by = ["fundraiser_id"]
+        for name in fields:
+            group_by += MY_DONATION_FIELDS[name]
+
         grouped = (
-            qs.values(
-                "fundraiser_id",
-                "fundraiser__title",
-                "fundraiser__image",
-                "fundraiser__owner__username",
-                "fundraiser__target_amount",
-            )
+            qs.values(*dict.fromkeys(group_by))
             .annotate(
                 # total donated by this user to this fundraiser
                 total_donated=Coalesce(Sum("amount"), Decimal("0.00")),
                 last_donation=Max("created_at"),
                 frequency_label=Max("frequency_label"),
-
-                # ✅ real collected by fundraiser from ALL received donations
+            )
+        )
+        if "left" in fields:
+            # ✅ real collected by fundraiser from ALL received donations; a subquery,
+            # joining them here would multiply total_donated
+            grouped = grouped.annotate(
                 collected_real=Coalesce(
-                    Sum(
-                        "fundraiser__donations__amount",
-                        filter=Q(fundraiser__donations__status=Donation.STATUS_RECEIVED),
+                    Subquery(
+                        Donation.objects
+                        .filter(fundraiser_id=OuterRef("fundraiser_id"), status=Donation.STATUS_RECEIVED)
+                        .order_by()
+                        .values("fundraiser_id")
+                        .annotate(total=Sum("amount"))
+                        .values("total")[:1]
                     ),
                     Decimal("0.00"),
                 ),
             )
-        )
 
         # sort
         if sort == "latest":
@@ -496,27 +752,29 @@ class MyDonationsView(APIView):
 
         out = []
         for row in grouped:
-            target = row["fundraiser__target_amount"] or Decimal("0.00")
-            collected = row["collected_real"] or Decimal("0.00")
-            left = target - collected
-            if left < 0:
-                left = Decimal("0.00")
-
-            # ✅ image path in values can be "fundraisers/xxx.png" or "/media/..."
-            img = row["fundraiser__image"] or ""
-            if img:
-                img = default_storage.url(img)
-
-            out.append({
-                "fundraiser_id": row["fundraiser_id"],
-                "title": row["fundraiser__title"],
-                "image": img,
-                "published_by": row["fundraiser__owner__username"] or "",
-                "total_donated": str(row["total_donated"]),
-                "frequency_label": row["frequency_label"] or "",
-                "left": str(left),
-                "last_donation": row["last_donation"],
-            })
+            item = {}
+            for name in fields:
+                if name == "fundraiser_id":
+                    item[name] = row["fundraiser_id"]
+                elif name == "title":
+                    item[name] = row["fundraiser__title"]
+                elif name == "image":
+                    # ✅ image path in values can be "fundraisers/xxx.png" or "/media/..."
+                    img = row["fundraiser__image"] or ""
+                    item[name] = default_storage.url(img) if img else ""
+                elif name == "published_by":
+                    item[name] = row["fundraiser__owner__username"] or ""
+                elif name == "total_donated":
+                    item[name] = str(row["total_donated"])
+                elif name == "frequency_label":
+                    item[name] = row["frequency_label"] or ""
+                elif name == "left":
+                    target = row["fundraiser__target_amount"] or Decimal("0.00")
+                    collected = row["collected_real"] or Decimal("0.00")
+                    item[name] = str(max(target - collected, Decimal("0.00")))
+                elif name == "last_donation":
+                    item[name] = row["last_donation"]
+            out.append(item)
 
         return Response(out)
 
@@ -594,10 +852,12 @@ class FundraiserLinkPreviousView(APIView):
         fundraiser = get_object_or_404(Fundraiser, id=fundraiser_id, owner=request.user)
 
         linked_id = request.data.get("linked_fundraiser_id", None)
+        old_root = chain_root(fundraiser.id)
 
         if linked_id in ["", None]:
             fundraiser.linked_fundraiser = None
             fundraiser.save(update_fields=["linked_fundraiser"])
+            invalidate_chains(old_root, fundraiser.id)
             return Response({"linked_fundraiser_id": None})
 
         # ensure the linked fundraiser is ACTIVE and belongs to the same user
@@ -612,8 +872,13 @@ class FundraiserLinkPreviousView(APIView):
         if linked.id == fundraiser.id:
             return Response({"detail": "Cannot link fundraiser to itself."}, status=400)
 
+        # prevent loops: the linked campaign must not already continue this one
+        if would_cycle(fundraiser.id, linked.id):
+            return Response({"detail": "That fundraiser already continues this one."}, status=400)
+
         fundraiser.linked_fundraiser = linked
         fundraiser.save(update_fields=["linked_fundraiser"])
+        invalidate_chains(old_root, fundraiser.id, chain_root(linked.id))
 
         return Response({"linked_fundraiser_id": linked.id})
 
@@ -649,33 +914,18 @@ class FundraiserPayoutSetupView(APIView):
         ser.is_valid(raise_exception=True)
         data = ser.validated_data
 
-        # update reimbursement period
-        if "reimbursement_period" in data:
-            fundraiser.reimbursement_period = data.get("reimbursement_period") or ""
-            fundraiser.save(update_fields=["reimbursement_period"])
-
-        # upsert payout methods
-        for m in data["payout_methods"]:
-            obj, _ = FundraiserPayout.objects.get_or_create(
-                fundraiser=fundraiser,
-                method=m["method"],
-            )
-            obj.is_enabled = m["is_enabled"]
-
-            if m["method"] == "bank":
-                obj.bank_account_title = m.get("bank_account_title", "")
-                obj.bank_account_number = m.get("bank_account_number", "")
-                obj.bank_iban = m.get("bank_iban", "")
-                obj.bank_raast_id = m.get("bank_raast_id", "")
-                obj.phone_number = ""
-            else:
-                obj.phone_number = m.get("phone_number", "")
-                obj.bank_account_title = ""
-                obj.bank_account_number = ""
-                obj.bank_iban = ""
-                obj.bank_raast_id = ""
-
-            obj.save()
+        with transaction.atomic():
+            # update reimbursement period
+            if "reimbursement_period" in data:
+                period = data.get("reimbursement_period") or ""
+                if period != fundraiser.reimbursement_period:
+                    fundraiser.reimbursement_period = period
+                    # the payout engine reschedules from the new period on its next run
+                    fundraiser.next_payout_at = None
+                    fundraiser.save(update_fields=["reimbursement_period", "next_payout_at"])
+
+            # upsert payout methods in one statement
+            save_payout_methods(fundraiser, data["payout_methods"])
 
         return Response({"detail": "Saved"})
 
@@ -683,28 +933,22 @@ class FundraiserPublishView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, fundraiser_id):
-        fundraiser = get_object_or_404(Fundraiser, id=fundraiser_id, owner=request.user)
+        fundraiser = get_object_or_404(
+            with_payout_readiness(Fundraiser.objects.all()), id=fundraiser_id, owner=request.user
+        )
+
+        # at least one enabled payout method + basic minimum validations
+        error = publish_error(fundraiser, fundraiser.has_enabled_payout)
+        if error:
+            return Response({"detail": error}, status=400)
 
-        # must have at least one enabled payout method
-        enabled = FundraiserPayout.objects.filter(fundraiser=fundraiser, is_enabled=True).exists()
-        if not enabled:
-            return Response({"detail": "Select at least one payout method."}, status=400)
-
-        # basic minimum validations (extend later)
-        if not fundraiser.title.strip():
-            return Response({"detail": "Title is required."}, status=400)
-        if not fundraiser.location.strip():
-            return Response({"detail": "Location is required."}, status=400)
-        if not fundraiser.category.strip():
-            return Response({"detail": "Category is required."}, status=400)
-        if fundraiser.target_amount <= 0:
-            return Response({"detail": "Target amount must be greater than 0."}, status=400)
-        if not fundraiser.deadline:
-            return Response({"detail": "Deadline is required."}, status=400)
-
-        fundraiser.status = Fundraiser.STATUS_ACTIVE
-        fundraiser.published_at = timezone.now()
-        fundraiser.save(update_fields=["status", "published_at"])
+        with transaction.atomic():
+            fundraiser.status = Fundraiser.STATUS_ACTIVE
+            fundraiser.published_at = timezone.now()
+            fundraiser.save(update_fields=["status", "published_at"])
+            notify_fundraisers(NotificationEvent.KIND_FUNDRAISER_PUBLISHED, [fundraiser.id])
+            invalidate_public_listings()
+            transaction.on_commit(metrics.FUNDRAISERS_PUBLISHED.inc)
 
         return Response({
         "id": fundraiser.id,
@@ -713,15 +957,61 @@ class FundraiserPublishView(APIView):
         "status": fundraiser.status,
     })
 
+class FundraiserWizardView(APIView):
+    """
+    All wizard steps in one request: any subset of start, start_details, basic,
+    details, link_previous, payout_setup and publish. POST creates the draft,
+    PATCH updates an existing one. Validated together, written in one transaction.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if "start" not in request.data:
+            return Response({"start": {"fundraiser_type": ["This field is required."]}}, status=400)
+        fundraiser = Fundraiser(owner=request.user, status=Fundraiser.STATUS_DRAFT, title="Untitled Fundraiser")
+        return self._apply(request, fundraiser, status.HTTP_201_CREATED)
+
+    def patch(self, request, fundraiser_id):
+        fundraiser = get_object_or_404(Fundraiser, id=fundraiser_id, owner=request.user)
+        return self._apply(request, fundraiser, status.HTTP_200_OK)
+
+    def _apply(self, request, fundraiser, ok_status):
+        errors, steps = apply_wizard(fundraiser, request.user, request.data)
+        if errors:
+            return Response(errors, status=400)
+        return Response({"id": fundraiser.id, "status": fundraiser.status, "steps": steps}, status=ok_status)
+
+class FundraiserDraftAutosaveView(APIView):
+    """JSON-patch style autosave for drafts; the client debounces and sends only changed fields."""
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request, fundraiser_id):
+        fundraiser = get_object_or_404(
+            Fundraiser.objects.only("id", "owner_id", "status"),
+            id=fundraiser_id,
+            owner=request.user,
+        )
+        if fundraiser.status != Fundraiser.STATUS_DRAFT:
+            return Response({"detail": "Only drafts can be autosaved."}, status=400)
+
+        errors, saved = apply_draft_patch(fundraiser, request.data)
+        if errors:
+            return Response(errors, status=400)
+        return Response({"saved": saved})
+
 class FeaturedFundraisersView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "public_read"
 
     def get(self, request):
         limit = int(request.query_params.get("limit", 12))
 
+        # supporters come from the stored sketch estimate, no COUNT over donations
         qs = (
-            Fundraiser.objects
-            .filter(status=Fundraiser.STATUS_ACTIVE)
+            FeaturedFundraiserSerializer.sparse_queryset(
+                Fundraiser.objects.filter(status=Fundraiser.STATUS_ACTIVE), request
+            )
             .annotate(
                 collected_amount_real=Coalesce(
                     Sum(
@@ -730,23 +1020,25 @@ class FeaturedFundraisersView(APIView):
                     ),
                     Decimal("0.00")
                 ),
-                donations_count=Coalesce(
-                    Count(
-                        "donations",
-                        filter=Q(donations__status=Donation.STATUS_RECEIVED)
-                    ),
-                    0
-                ),
             )
             .order_by("-collected_amount_real", "-created_at")[:limit]
         )
 
-        return Response(FeaturedFundraiserSerializer(qs, many=True).data)
+        return Response(FeaturedFundraiserSerializer(qs, many=True, context={"request": request}).data)
 
 class FundraiserCategoriesView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "public_read"
 
     def get(self, request):
+        # cached until a fundraiser is published or closed (lifecycle bumps the namespace)
+        categories = get_or_compute(
+            versioned_key(PUBLIC_NAMESPACE, "categories"), self._categories, timeout=300
+        )
+        return Response(categories)
+
+    def _categories(self):
         # categories from DB (only active)
         qs = (
             Fundraiser.objects
@@ -756,8 +1048,9 @@ class FundraiserCategoriesView(APIView):
             .order_by("-count", "category")
         )
 
-        categories = [{"id": "all", "label": "All Causes", "count": Fundraiser.objects.filter(status=Fundraiser.STATUS_ACTIVE).count()}]
-        for row in qs:
+        rows = list(qs)
+        categories = [{"id": "all", "label": "All Causes", "count": sum(r["count"] for r in rows)}]
+        for row in rows:
             cat = (row["category"] or "").strip()
             if not cat:
                 continue
@@ -767,11 +1060,13 @@ class FundraiserCategoriesView(APIView):
                 "count": row["count"],
             })
 
-        return Response(categories)
+        return categories
 
 
 class FundraiserDiscoverView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "public_read"
 
     def get(self, request):
         q = (request.query_params.get("q") or "").strip()
@@ -780,7 +1075,10 @@ class FundraiserDiscoverView(APIView):
         limit = int(request.query_params.get("limit", 6))
         sort = (request.query_params.get("sort") or "newest").strip().lower()
 
-        qs = Fundraiser.objects.filter(status=Fundraiser.STATUS_ACTIVE)
+        fields = DiscoverFundraiserSerializer.sparse_field_names(request)
+        qs = DiscoverFundraiserSerializer.sparse_queryset(
+            Fundraiser.objects.filter(status=Fundraiser.STATUS_ACTIVE), request
+        )
 
         if category and category.lower() != "all":
             # category is passed as label from frontend
@@ -797,28 +1095,26 @@ class FundraiserDiscoverView(APIView):
             "newest": "-created_at",
             "most_funded": "-collected_amount_real",
             "ending_soon": "deadline",
-            "most_supporters": "-donations_count",
-            "needs_attention": "donations_count",  # low supporters first
+            "most_supporters": "-supporters_count",
+            "needs_attention": "supporters_count",  # low supporters first
         }
 
-        qs = qs.annotate(
-            collected_amount_real=Coalesce(
-                Sum("donations__amount", filter=Q(donations__status=Donation.STATUS_RECEIVED)),
-                Decimal("0.00")
-            ),
-            donations_count=Coalesce(
-                Count("donations", filter=Q(donations__status=Donation.STATUS_RECEIVED)),
-                0
+        # counted before the donations join is added
+        total = qs.count()
+
+        if "raised" in fields or sort == "most_funded":
+            qs = qs.annotate(
+                collected_amount_real=Coalesce(
+                    Sum("donations__amount", filter=Q(donations__status=Donation.STATUS_RECEIVED)),
+                    Decimal("0.00")
+                ),
             )
-        )
 
         qs = qs.order_by(sort_map.get(sort, "-created_at"))
-
-        total = qs.count()
         page = qs[offset: offset + limit]
 
         return Response({
-            "results": DiscoverFundraiserSerializer(page, many=True).data,
+            "results": DiscoverFundraiserSerializer(page, many=True, context={"request": request}).data,
             "total": total,
             "offset": offset,
             "limit": limit,
@@ -826,6 +1122,8 @@ class FundraiserDiscoverView(APIView):
 
 class FundraiserPublicDetailView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "public_read"
 
     def get(self, request, fundraiser_id):
         fundraiser = (
@@ -833,15 +1131,12 @@ class FundraiserPublicDetailView(APIView):
             .filter(id=fundraiser_id, status=Fundraiser.STATUS_ACTIVE)
             .select_related("owner")
             .prefetch_related("documents")
+            .defer("supporters_sketch")
             .annotate(
                 collected_amount_real=Coalesce(
                     Sum("donations__amount", filter=Q(donations__status=Donation.STATUS_RECEIVED)),
                     Decimal("0.00")
                 ),
-                donations_count=Coalesce(
-                    Count("donations", filter=Q(donations__status=Donation.STATUS_RECEIVED)),
-                    0
-                )
             )
             .first()
         )
@@ -865,6 +1160,8 @@ class FundraiserPublicDetailView(APIView):
 
 class FundraiserDonateCreateView(APIView):
     permission_classes = [IsAuthenticated]  # ✅ require login for this step
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "donate"
 
     def post(self, request, fundraiser_id):
         fundraiser = get_object_or_404(
@@ -876,6 +1173,13 @@ class FundraiserDonateCreateView(APIView):
         amount = request.data.get("amount")
         tip_amount = request.data.get("tip_amount", 0)
         frequency_label = (request.data.get("frequency_label") or "").strip()
+        # repeat charges only on an explicit opt-in, never from the label alone
+        recurring = bool(request.data.get("recurring", False))
+        if recurring and frequency_of(frequency_label) is None:
+            return Response(
+                {"detail": "frequency_label must be weekly, monthly, quarterly or yearly for a recurring donation."},
+                status=400,
+            )
 
         payment_method = (request.data.get("payment_method") or "").strip().lower()
         is_anonymous = bool(request.data.get("is_anonymous", False))
@@ -947,9 +1251,272 @@ class FundraiserDonateCreateView(APIView):
                 card_number_last4=card_last4,
                 card_expiry=card_expiry,
             )
+            add_collected([donation])
+            supporters_delta = add_supporters(fundraiser.id, [request.user.id])
+            record_donations([donation])
+            subscription = subscribe(donation) if recurring else None
+            notify_donations([donation])
+            # push to open fundraiser pages only once the row is visible to everyone
+            transaction.on_commit(lambda: publish_donation(donation, supporters_delta))
+            transaction.on_commit(lambda: metrics.donations_received([donation]))
 
         return Response({
             "id": donation.id,
             "status": donation.status,
+            "recurring_id": subscription.id if subscription else None,
             "message": "Donation received",
-        }, status=201)
\ No newline at end of file
+        }, status=201)
+
+def _analytics_range(request):
+    """
+    Reads granularity/start/end query params.
+    start/end accept YYYY-MM-DD or an ISO datetime; default is the last 30 days
+    (day) or 48 hours (hour).
+    """
+    granularity = (request.query_params.get("granularity") or DonationRollup.GRANULARITY_DAY).strip().lower()
+    if granularity not in MAX_RANGE:
+        return None, "granularity must be 'hour' or 'day'."
+
+    def parse(value, end_of_day=False):
+        value = (value or "").strip()
+        if not value:
+            return None
+        dt = parse_datetime(value)
+        if dt is None:
+            d = parse_date(value)
+            if d is None:
+                raise ValueError(value)
+            dt = datetime.combine(d, time.max if end_of_day else time.min)
+        if timezone.is_naive(dt):
+            dt = timezone.make_aware(dt, timezone.get_current_timezone())
+        return dt
+
+    try:
+        end = parse(request.query_params.get("end"), end_of_day=True) or timezone.now()
+        default_span = timedelta(days=30) if granularity == DonationRollup.GRANULARITY_DAY else timedelta(hours=48)
+        start = parse(request.query_params.get("start")) or end - default_span
+    except ValueError:
+        return None, "start/end must be YYYY-MM-DD or ISO datetimes."
+
+    # include the bucket that contains `start`
+    start = bucket_start(start, granularity)
+
+    if start > end:
+        return None, "start must be before end."
+    if end - start > MAX_RANGE[granularity]:
+        return None, f"Range too large for granularity '{granularity}'."
+
+    return (granularity, start, end), None
+
+
+class FundraiserAnalyticsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, fundraiser_id):
+        fundraiser = get_object_or_404(Fundraiser, id=fundraiser_id, owner=request.user)
+
+        rng, error = _analytics_range(request)
+        if error:
+            return Response({"detail": error}, status=400)
+        granularity, start, end = rng
+
+        # one range scan on (fundraiser, granularity, bucket_start)
+        rows = (
+            DonationRollup.objects
+            .filter(fundraiser=fundraiser, granularity=granularity, bucket_start__range=(start, end))
+            .values(*ROLLUP_VALUES)
+        )
+        data = summarize(rows, granularity, start, end)
+        data["fundraiser_id"] = fundraiser.id
+        return Response(data)
+
+
+class DashboardAnalyticsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        rng, error = _analytics_range(request)
+        if error:
+            return Response({"detail": error}, status=400)
+        granularity, start, end = rng
+
+        # one range scan on (recipient, granularity, bucket_start)
+        rows = (
+            DonationRollup.objects
+            .filter(recipient=request.user, granularity=granularity, bucket_start__range=(start, end))
+            .values(*ROLLUP_VALUES)
+        )
+        return Response(summarize(rows, granularity, start, end))
+
+
+class FundraiserSimilarView(APIView):
+    permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "public_read"
+
+    def get(self, request, fundraiser_id):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 6)), 1), 12)
+        except ValueError:
+            limit = 6
+
+        # precomputed by build_similar_fundraisers; one range read on (fundraiser, rank)
+        qs = (
+            Fundraiser.objects
+            .filter(similar_to__fundraiser_id=fundraiser_id, status=Fundraiser.STATUS_ACTIVE)
+            .select_related("owner")
+            .only(
+                "id", "title", "image", "category", "location", "target_amount",
+                "supporters_count", "deadline", "owner__username",
+            )
+            .annotate(score=F("similar_to__score"))
+            .order_by("similar_to__rank")[:limit]
+        )
+        return Response(SimilarFundraiserSerializer(qs, many=True).data)
+
+
+class FundraiserSuggestView(APIView):
+    """Search-box autocomplete from the in-memory prefix index (accounts.suggest)."""
+    permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "suggest"
+
+    def get(self, request):
+        q = (request.query_params.get("q") or "")[:50]
+        try:
+            limit = min(max(int(request.query_params.get("limit", 8)), 1), 10)
+        except ValueError:
+            limit = 8
+        return Response({"q": q, "results": suggest(q, limit)})
+
+
+class FundraiserBatchView(APIView):
+    """Public card summaries for several fundraisers at once: ?ids=3,1,7."""
+    permission_classes = [AllowAny]
+    throttle_classes = SCOPED_THROTTLES
+    throttle_scope = "public_read"
+
+    def get(self, request):
+        ids = []
+        for part in (request.query_params.get("ids") or "").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if not part.isdigit():
+                return Response({"detail": "ids must be a comma-separated list of integers."}, status=400)
+            ids.append(int(part))
+        ids = list(dict.fromkeys(ids))
+
+        if not ids:
+            return Response({"detail": "ids is required."}, status=400)
+        if len(ids) > BATCH_MAX_IDS:
+            return Response({"detail": f"At most {BATCH_MAX_IDS} ids per request."}, status=400)
+
+        summaries = fundraiser_summaries(ids)
+        urls = signed_urls(s["image"] for s in summaries.values())
+
+        results = []
+        for fid in ids:
+            if fid in summaries:
+                item = dict(summaries[fid])
+                item["image_url"] = urls.get(item.pop("image"), "")
+                results.append(item)
+
+        return Response({
+            "results": results,
+            "missing": [fid for fid in ids if fid not in summaries],
+        })
+
+
+class FundraiserChainView(APIView):
+    """The linked-fundraiser chain a fundraiser belongs to, with chain-level totals."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, fundraiser_id):
+        fundraiser = get_object_or_404(Fundraiser.objects.only("id"), id=fundraiser_id, owner=request.user)
+        return Response(chain_summary(fundraiser.id))
+
+
+class FundraiserCloneView(APIView):
+    """Start a follow-up campaign: a draft copy linked to this fundraiser, files shared not re-uploaded."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, fundraiser_id):
+        source = get_object_or_404(
+            Fundraiser.objects.defer("supporters_sketch"), id=fundraiser_id, owner=request.user
+        )
+        if source.status == Fundraiser.STATUS_DRAFT:
+            return Response({"detail": "Drafts cannot be cloned."}, status=400)
+
+        clone = clone_fundraiser(source)
+        return Response(
+            {"id": clone.id, "linked_fundraiser_id": source.id},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint (accounts.metrics): staff users or the METRICS_TOKEN bearer."""
+    authentication_classes = []  # the scraper's token is not a JWT
+    permission_classes = [AllowAny]
+
+    def _allowed(self, request):
+        token = settings.METRICS_TOKEN
+        if token and constant_time_compare(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"):
+            return True
+        user = getattr(request._request, "user", None)  # admin session
+        if user is not None and user.is_staff:
+            return True
+        try:
+            auth = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return bool(auth and auth[0].is_staff)
+
+    def get(self, request):
+        if not self._allowed(request):
+            return Response({"detail": "Not allowed."}, status=403)
+        body, content_type = metrics.render()
+        return HttpResponse(body, content_type=content_type)
+
+
+class ProfileTokenView(APIView):
+    """Staff only: a signed token that turns on profiling (accounts.profiling) for requests carrying it."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.is_staff:
+            return Response({"detail": "Not allowed."}, status=403)
+        path = str(request.data.get("path") or "")
+        if path and not path.startswith("/"):
+            return Response({"detail": "path must start with /."}, status=400)
+        return Response({
+            "token": make_token(request.user, path),
+            "header": "X-Profile",
+            "query_param": "_profile",
+            "expires_in": settings.PROFILE_TOKEN_MAX_AGE,
+            "uses": settings.PROFILE_TOKEN_USES,
+        })
+
+
+class ProfileReportView(APIView):
+    """Staff only: a stored profile report; ?download=1 returns the raw pstats file."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, profile_id):
+        if not request.user.is_staff:
+            return Response({"detail": "Not allowed."}, status=403)
+        report = get_report(profile_id)
+        if report is None:
+            return Response({"detail": "Profile not found or expired."}, status=404)
+
+        if request.query_params.get("download"):
+            if not report["pstats"]:
+                return Response({"detail": "The raw profile was too large to keep."}, status=404)
+            response = HttpResponse(report["pstats"], content_type="application/octet-stream")
+            response["Content-Disposition"] = f'attachment; filename="profile-{profile_id}.prof"'
+            return response
+
+        data = {k: v for k, v in report.items() if k != "pstats"}
+        data["id"] = profile_id
+        return Response(data)
@@ -0,0 +1,255 @@
+"""
+Fundraiser creation wizard in one request.
+
+apply_wizard() takes any subset of the wizard steps (start_details, basic,
+details, link_previous, payout_setup, publish), validates all of them with
+the per-step serializers before anything is written, then saves the
+fundraiser once and the payout rows with one upsert, inside one transaction.
+
+apply_draft_patch() is the autosave path: a JSON-patch style list of
+{"op", "path", "value"} changes that only coerces field types (drafts may be
+incomplete) and writes the changed columns with a single UPDATE. An enabled
+payout row saved this way only counts towards publishing once its
+destination fields are complete (payouts.usable_payouts).
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .chains import chain_root, invalidate_chains, would_cycle
+from .lifecycle import invalidate_public_listings
+from .metrics import FUNDRAISERS_PUBLISHED
+from .models import Fundraiser, FundraiserPayout, NotificationEvent, make_excerpt
+from .notifications import notify_fundraisers
+from .payouts import UPDATE_FIELDS as PAYOUT_FIELDS, save_payout_methods, usable_payouts
+from .serializers import (
+    FundraiserStartDetailsSerializer, FundraiserBasicSerializer, FundraiserDetailsSerializer,
+    FundraiserPayoutSetupSerializer, FundraiserPayoutMethodInputSerializer, StartFundraiserSerializer,
+)
+
+FIELD_STEPS = {
+    "start_details": FundraiserStartDetailsSerializer,
+    "basic": FundraiserBasicSerializer,
+    "details": FundraiserDetailsSerializer,
+}
+STEP_NAMES = ["start", *FIELD_STEPS, "link_previous", "payout_setup", "publish"]
+
+# fields the autosave may touch, with the serializer that knows their type
+DRAFT_FIELDS = {
+    name: cls
+    for cls in FIELD_STEPS.values()
+    for name in cls.Meta.fields
+    if name != "id"
+}
+
+
+def publish_error(fundraiser, has_enabled_payout):
+    """Minimum checks before a fundraiser goes live; returns a message or None."""
+    if not has_enabled_payout:
+        return "Select at least one payout method and complete its details."
+    if not (fundraiser.title or "").strip():
+        return "Title is required."
+    if not (fundraiser.location or "").strip():
+        return "Location is required."
+    if not (fundraiser.category or "").strip():
+        return "Category is required."
+    if fundraiser.target_amount <= 0:
+        return "Target amount must be greater than 0."
+    if not fundraiser.deadline:
+        return "Deadline is required."
+    # expire_fundraisers closes it the day after the deadline
+    if fundraiser.deadline < timezone.localdate():
+        return "Deadline must not be in the past."
+    return None
+
+
+def _validate_link(fundraiser, user, data):
+    linked_id = (data or {}).get("linked_fundraiser_id")
+    if linked_id in ["", None]:
+        return None, None
+    linked = (
+        Fundraiser.objects
+        .filter(id=linked_id, owner=user, status=Fundraiser.STATUS_ACTIVE)
+        .only("id")
+        .first()
+    )
+    if linked is None:
+        return None, "Linked fundraiser not found."
+    if linked.id == fundraiser.id:
+        return None, "Cannot link fundraiser to itself."
+    if fundraiser.pk and would_cycle(fundraiser.pk, linked.id):
+        return None, "That fundraiser already continues this one."
+    return linked, None
+
+
+def apply_wizard(fundraiser, user, payload):
+    """
+    Validate then write the given steps. fundraiser may be unsaved (create).
+    Returns (errors, changed_steps); errors is keyed by step and nothing is
+    written when it is not empty.
+    """
+    errors = {}
+    changed_fields = set()
+    steps = [s for s in STEP_NAMES if s in payload]
+
+    if "start" in steps:
+        ser = StartFundraiserSerializer(data=payload["start"])
+        if ser.is_valid():
+            if hasattr(fundraiser, "fundraiser_type"):
+                fundraiser.fundraiser_type = ser.validated_data["fundraiser_type"]
+                changed_fields.add("fundraiser_type")
+        else:
+            errors["start"] = ser.errors
+
+    # field steps are applied in memory in order, so later steps and the
+    # publish check see the merged state
+    for step, cls in FIELD_STEPS.items():
+        if step not in steps:
+            continue
+        ser = cls(fundraiser, data=payload[step], partial=True)
+        if not ser.is_valid():
+            errors[step] = ser.errors
+            continue
+        for k, v in ser.validated_data.items():
+            setattr(fundraiser, k, v)
+            changed_fields.add(k)
+
+    stale_chains = []
+    if "link_previous" in steps:
+        linked, err = _validate_link(fundraiser, user, payload["link_previous"])
+        if err:
+            errors["link_previous"] = {"detail": err}
+        else:
+            fundraiser.linked_fundraiser = linked
+            changed_fields.add("linked_fundraiser")
+            if fundraiser.pk:
+                stale_chains += [chain_root(fundraiser.pk), fundraiser.pk]
+            if linked:
+                stale_chains.append(chain_root(linked.id))
+
+    payout_data = None
+    if "payout_setup" in steps:
+        ser = FundraiserPayoutSetupSerializer(data=payload["payout_setup"])
+        if ser.is_valid():
+            payout_data = ser.validated_data
+            if "reimbursement_period" in payout_data:
+                period = payout_data.get("reimbursement_period") or ""
+                if period != fundraiser.reimbursement_period:
+                    fundraiser.reimbursement_period = period
+                    fundraiser.next_payout_at = None
+                    changed_fields.update(["reimbursement_period", "next_payout_at"])
+        else:
+            errors["payout_setup"] = ser.errors
+
+    publish = bool(payload.get("publish"))
+    if publish and not errors:
+        enabled = set()
+        if fundraiser.pk:
+            enabled = set(
+                usable_payouts(FundraiserPayout.objects.filter(fundraiser=fundraiser))
+                .values_list("method", flat=True)
+            )
+        # payout_setup rows were validated by FundraiserPayoutMethodInputSerializer
+        for m in (payout_data or {}).get("payout_methods", []):
+            (enabled.add if m["is_enabled"] else enabled.discard)(m["method"])
+        err = publish_error(fundraiser, bool(enabled))
+        if err:
+            errors["publish"] = {"detail": err}
+
+    if errors:
+        return errors, []
+
+    with transaction.atomic():
+        if publish:
+            fundraiser.status = Fundraiser.STATUS_ACTIVE
+            fundraiser.published_at = fundraiser.published_at or timezone.now()
+            changed_fields.update(["status", "published_at"])
+
+        if fundraiser.pk is None:
+            fundraiser.save()
+        elif changed_fields:
+            fundraiser.save(update_fields=sorted(changed_fields))
+
+        if payout_data is not None:
+            save_payout_methods(fundraiser, payout_data["payout_methods"])
+
+        if publish:
+            invalidate_public_listings()
+            notify_fundraisers(NotificationEvent.KIND_FUNDRAISER_PUBLISHED, [fundraiser.id])
+            transaction.on_commit(FUNDRAISERS_PUBLISHED.inc)
+
+    if stale_chains:
+        invalidate_chains(*stale_chains)
+
+    return {}, steps
+
+
+def _parse_path(path):
+    parts = [p for p in (path or "").split("/") if p]
+    if len(parts) == 1 and parts[0] in DRAFT_FIELDS:
+        return parts[0], None, None
+    if len(parts) == 3 and parts[0] == "payout_methods" and parts[2] in PAYOUT_FIELDS:
+        return None, parts[1], parts[2]
+    return None, None, None
+
+
+def apply_draft_patch(fundraiser, ops):
+    """
+    Apply autosave ops to a draft. Supported: replace/add (set a value) and
+    remove (back to the field default) on "/<field>" or
+    "/payout_methods/<method>/<field>". Returns (errors, saved_paths).
+    """
+    if not isinstance(ops, list):
+        return {"detail": "Expected a list of patch operations."}, []
+
+    errors = {}
+    changes = {}
+    payouts = {}
+    payout_fields = FundraiserPayoutMethodInputSerializer().fields
+    bound = {cls: cls(fundraiser) for cls in FIELD_STEPS.values()}
+
+    for op in ops:
+        path = op.get("path") if isinstance(op, dict) else None
+        kind = op.get("op") if isinstance(op, dict) else None
+        field, method, payout_field = _parse_path(path)
+
+        if kind not in ("replace", "add", "remove") or not (field or method):
+            errors[str(path)] = "Unsupported operation or path."
+            continue
+
+        if field:
+            if kind == "remove":
+                changes[field] = Fundraiser._meta.get_field(field).get_default()
+                continue
+            # type coercion only; completeness is checked when the step is submitted
+            ser_field = bound[DRAFT_FIELDS[field]].fields[field]
+            try:
+                changes[field] = ser_field.run_validation(op.get("value"))
+            except serializers.ValidationError as e:
+                errors[path] = e.detail
+            continue
+
+        try:
+            method = payout_fields["method"].run_validation(method)
+            row = payouts.setdefault(method, {"method": method})
+            if kind == "remove":
+                row[payout_field] = FundraiserPayout._meta.get_field(payout_field).get_default()
+            else:
+                row[payout_field] = payout_fields[payout_field].run_validation(op.get("value"))
+        except serializers.ValidationError as e:
+            errors[path] = e.detail
+
+    if errors:
+        return errors, []
+
+    if "description" in changes:
+        # .update() skips Fundraiser.save()
+        changes["description_excerpt"] = make_excerpt(changes["description"])
+
+    with transaction.atomic():
+        if changes:
+            Fundraiser.objects.filter(pk=fundraiser.pk).update(**changes)
+        if payouts:
+            save_payout_methods(fundraiser, list(payouts.values()), partial=True)
+
+    return {}, [op["path"] for op in ops]
@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests under /api/stream/ are long-lived Server-Sent Event streams handled by
+accounts.realtime; everything else goes to Django. Run it with an ASGI server,
+e.g. ``gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -13,4 +17,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from accounts.realtime import STREAM_PREFIX, stream_application  # noqa: E402 (needs apps loaded)
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"].startswith(STREAM_PREFIX):
+        return await stream_application(scope, receive, send)
+    return await django_application(scope, receive, send)
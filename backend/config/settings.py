@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 # Middleware
 # ----------------------------
 MIDDLEWARE = [
+    "accounts.metrics.MetricsMiddleware",  # first, so it times everything below
+    "accounts.profiling.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # serve static
@@ -89,6 +92,68 @@ DATABASES = {
 }
 
 
+# ----------------------------
+# Cache (shared between workers)
+# ----------------------------
+# CACHE_BACKEND picks the tier:
+#   "redis"  -> any Redis-compatible server at CACHE_URL (production)
+#   "db"     -> table CACHE_TABLE (run `python manage.py createcachetable` once)
+#   "file"   -> directory CACHE_DIR (single host, several workers)
+#   "locmem" -> per-process memory (local dev / tests only, NOT shared between workers)
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem").strip().lower()
+CACHE_URL = os.environ.get("CACHE_URL", "redis://localhost:6379/0")
+CACHE_TABLE = os.environ.get("CACHE_TABLE", "miraj_cache")
+CACHE_DIR = os.environ.get("CACHE_DIR", "/tmp/miraj_cache")
+
+_cache_tiers = {
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CACHE_URL,
+    },
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": CACHE_TABLE,
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": CACHE_DIR,
+    },
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "miraj-local",
+        # default of 300 entries culls rate-limit counters under any real load
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+if CACHE_BACKEND not in _cache_tiers:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND must be one of {sorted(_cache_tiers)}, got {CACHE_BACKEND!r}"
+    )
+
+CACHES = {
+    "default": {
+        **_cache_tiers[CACHE_BACKEND],
+        # every key is namespaced per deployment, so staging/prod can share one Redis
+        "KEY_PREFIX": os.environ.get("CACHE_KEY_PREFIX", "miraj"),
+        "TIMEOUT": int(os.environ.get("CACHE_DEFAULT_TIMEOUT", "300")),
+    }
+}
+
+# values whose pickle is bigger than this are zlib-compressed by accounts.cache
+CACHE_COMPRESS_MIN_BYTES = int(os.environ.get("CACHE_COMPRESS_MIN_BYTES", "1024"))
+
+
+# ----------------------------
+# Realtime donation stream (SSE, served by config/asgi.py)
+# ----------------------------
+# "memory" only reaches streams in the same process (local dev / single worker).
+# With several workers use "redis" so a donation saved on one worker reaches all.
+REALTIME_BROKER = os.environ.get("REALTIME_BROKER", "memory").strip().lower()
+REALTIME_REDIS_URL = os.environ.get("REALTIME_REDIS_URL", CACHE_URL)
+REALTIME_CHANNEL_PREFIX = os.environ.get("REALTIME_CHANNEL_PREFIX", "miraj:rt:")
+
+
 # ----------------------------
 # Auth / DRF
 # ----------------------------
@@ -97,9 +162,95 @@ AUTH_USER_MODEL = "accounts.User"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+    ),
+    # Used by accounts.throttling (views set `throttle_scope`).
+    # "<scope>" is per client IP, "<scope>_user" per logged-in user.
+    # Override any of them with THROTTLE_<SCOPE>, e.g. THROTTLE_LOGIN=20/min
+    # Proxies in front of the app that append to X-Forwarded-For (Render: one).
+    # Throttles key on the address the last of them saw, never on what the
+    # client sent; set 0 when the app is reached directly (REMOTE_ADDR).
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", "1")),
+    "DEFAULT_THROTTLE_RATES": {
+        scope: os.environ.get(f"THROTTLE_{scope.upper()}", rate)
+        for scope, rate in {
+            "login": "10/min",
+            "signup": "5/min",
+            "password_reset": "5/min",
+            "password_reset_verify": "10/min",
+            "public_read": "120/min",
+            "suggest": "600/min",
+            "donate": "20/min",
+            "donate_user": "10/min",
+        }.items()
+    },
 }
 
+# Master switch for accounts.throttling (e.g. off for load tests)
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "True") == "True"
+
+
+# ----------------------------
+# Metrics (Prometheus, accounts.metrics)
+# ----------------------------
+# GET /metrics is open to staff users and to "Authorization: Bearer <METRICS_TOKEN>"
+# (the scraper). With several gunicorn workers also set PROMETHEUS_MULTIPROC_DIR
+# to an empty shared directory, cleared on each deploy.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+
+# ----------------------------
+# Request profiling (accounts.profiling)
+# ----------------------------
+# Staff mint a token at /api/auth/profiles/token/; a request sent with it
+# ("X-Profile" header or "_profile" query param) is profiled and the report
+# kept in the cache for PROFILE_TTL seconds. A token profiles at most
+# PROFILE_TOKEN_USES requests; reports are capped at PROFILE_MAX_REPORT_BYTES.
+PROFILE_TOKEN_MAX_AGE = int(os.environ.get("PROFILE_TOKEN_MAX_AGE", "900"))
+PROFILE_TOKEN_USES = int(os.environ.get("PROFILE_TOKEN_USES", "3"))
+PROFILE_TTL = int(os.environ.get("PROFILE_TTL", str(24 * 3600)))
+PROFILE_MAX_REPORT_BYTES = int(os.environ.get("PROFILE_MAX_REPORT_BYTES", str(256 * 1024)))
+
+
+# ----------------------------
+# Notifications (accounts.notifications, worker: manage.py send_notifications)
+# ----------------------------
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "Miraj <no-reply@miraj.pk>")
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", "587"))
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "True") == "True"
+
+# dotted paths; see the backends in accounts.notifications
+NOTIFY_EMAIL_BACKEND = os.environ.get("NOTIFY_EMAIL_BACKEND", "accounts.notifications.EmailBackend")
+NOTIFY_SMS_BACKEND = os.environ.get("NOTIFY_SMS_BACKEND", "accounts.notifications.ConsoleBackend")
+NOTIFY_SMS_URL = os.environ.get("NOTIFY_SMS_URL", "")
+NOTIFY_SMS_TOKEN = os.environ.get("NOTIFY_SMS_TOKEN", "")
+NOTIFY_FILE_PATH = os.environ.get("NOTIFY_FILE_PATH", str(BASE_DIR / "notifications.jsonl"))
+# donation notifications wait this long and merge into one digest per owner and fundraiser
+NOTIFY_DIGEST_WINDOW = int(os.environ.get("NOTIFY_DIGEST_WINDOW", "60"))
+# processed events and sent notifications are purged after this many days
+NOTIFY_KEEP_DAYS = int(os.environ.get("NOTIFY_KEEP_DAYS", "30"))
+
+
+# ----------------------------
+# Receipts / annual statements (accounts.receipts)
+# ----------------------------
+# threads per process that render documents requested through the API
+RECEIPT_WORKERS = int(os.environ.get("RECEIPT_WORKERS", "2"))
+
+
+# ----------------------------
+# Personal data exports (accounts.exports, worker: manage.py run_data_exports)
+# ----------------------------
+# where the emailed download link points (this API's public origin)
+EXPORT_LINK_BASE_URL = os.environ.get("EXPORT_LINK_BASE_URL", "http://localhost:8000")
+# finished exports (and their links) are deleted after this many days
+EXPORT_KEEP_DAYS = int(os.environ.get("EXPORT_KEEP_DAYS", "7"))
+# a job left "running" this many seconds (crashed worker) is picked up again
+EXPORT_LEASE = int(os.environ.get("EXPORT_LEASE", "1800"))
+
 
 # ----------------------------
 # CORS / CSRF
@@ -165,6 +316,12 @@ STORAGES = {
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# uploads are hashed while they are received, for content-addressed blobs (accounts.blobs)
+FILE_UPLOAD_HANDLERS = [
+    "accounts.blobs.HashingMemoryFileUploadHandler",
+    "accounts.blobs.HashingTemporaryFileUploadHandler",
+]
+
 
 # ----------------------------
 # Internationalization
@@ -2,6 +2,7 @@ import Card from "../common/Card";
 import { Users, Clock, Heart, ChevronLeft, ChevronRight } from "lucide-react";
 import { useState, useEffect, useMemo } from "react";
 import { apiJson } from "../../services/apiAuth";
+import { subscribeDonations } from "../../services/donationStream";
 
 export default function FeaturedFundraisers() {
   const [currentIndex, setCurrentIndex] = useState(0);
@@ -44,6 +45,23 @@ export default function FeaturedFundraisers() {
     })();
   }, []);
 
+  // live totals: apply donation deltas pushed by the server instead of refetching
+  useEffect(() => {
+    return subscribeDonations("/api/stream/donations/", (ev) => {
+      setFundraisers((prev) =>
+        prev.map((f) =>
+          f.id === ev.fundraiser_id
+            ? {
+                ...f,
+                collected_amount: Number(f.collected_amount || 0) + Number(ev.raised_delta || 0),
+                donations_count: (f.donations_count ?? 0) + (ev.supporters_delta || 0),
+              }
+            : f
+        )
+      );
+    });
+  }, []);
+
   const maxIndex = useMemo(() => {
     const len = fundraisers.length;
     return Math.max(0, len - slidesToShow);
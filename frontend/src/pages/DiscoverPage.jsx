@@ -122,7 +122,7 @@ function FundraiserCard({ f, onClick, onDonate }) {
           {f.title}
         </h3>
         <p className="mt-2 text-[13px] text-gray-600 leading-relaxed text-center">
-          {clampText(f.description || "", 120)}
+          {clampText(f.excerpt || "", 120)}
         </p>
       </div>
 
@@ -351,11 +351,60 @@ export default function DiscoverPage() {
   }, [activeCategory]);
 
   const onSearch = () => {
+    setSuggestions([]);
     setOffset(0);
     fetchMain({ reset: true });
     fetchTopSections();
   };
 
+  // autocomplete from the lightweight suggest endpoint (debounced, no discover query per keystroke)
+  const [suggestions, setSuggestions] = useState([]);
+  useEffect(() => {
+    const q = searchQuery.trim();
+    if (!q) {
+      setSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const t = setTimeout(async () => {
+      try {
+        const data = await apiJson(
+          `/api/auth/fundraisers/suggest/?q=${encodeURIComponent(q)}&limit=8`,
+          { method: "GET", auth: false }
+        );
+        if (!cancelled) setSuggestions(data?.results || []);
+      } catch (e) {
+        if (!cancelled) setSuggestions([]);
+      }
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(t);
+    };
+  }, [searchQuery]);
+
+  const onPickSuggestion = (s) => {
+    setSuggestions([]);
+    if (s.type === "fundraiser") {
+      navigate(`/donate/${s.id}`);
+      return;
+    }
+    if (s.type === "category") {
+      const found = categories.find((c) => c.label.toLowerCase() === s.label.toLowerCase());
+      if (found) {
+        setSearchQuery("");
+        setActiveCategory(found.id);
+        return;
+      }
+    }
+    setSearchQuery(s.label);
+    setOffset(0);
+    setTimeout(() => {
+      fetchMain({ reset: true });
+      fetchTopSections();
+    }, 0);
+  };
+
   const onChangeSort = (v) => {
     setSortBy(v);
     setOffset(0);
@@ -399,6 +448,23 @@ export default function DiscoverPage() {
                 className="w-full h-12 pl-12 pr-4 rounded-full border border-emerald-200 bg-white
                            focus:outline-none focus:ring-2 focus:ring-emerald-200 text-sm"
               />
+
+              {suggestions.length ? (
+                <ul className="absolute z-20 mt-2 w-full rounded-xl border border-emerald-100 bg-white shadow-lg overflow-hidden">
+                  {suggestions.map((s) => (
+                    <li key={`${s.type}-${s.id ?? s.label}`}>
+                      <button
+                        type="button"
+                        onClick={() => onPickSuggestion(s)}
+                        className="w-full flex items-center justify-between px-4 py-2 text-left text-sm hover:bg-emerald-50"
+                      >
+                        <span className="text-gray-800">{s.label}</span>
+                        <span className="text-xs text-gray-400 capitalize">{s.type}</span>
+                      </button>
+                    </li>
+                  ))}
+                </ul>
+              ) : null}
             </div>
 
             <div className="mt-3 flex items-center justify-between flex-wrap gap-3">
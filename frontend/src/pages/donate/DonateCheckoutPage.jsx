@@ -24,7 +24,7 @@ export default function DonateCheckoutPage() {
   const [fundraiser, setFundraiser] = useState(null);
 
   // form state
-  const [frequency, setFrequency] = useState("monthly");
+  const [frequency, setFrequency] = useState("one_time");
   const [amount, setAmount] = useState("");
   const [customAmount, setCustomAmount] = useState("");
   const [tipAmount, setTipAmount] = useState("");
@@ -94,8 +94,8 @@ export default function DonateCheckoutPage() {
                     className="w-full h-11 rounded-xl border border-emerald-200 px-4 text-sm
                                outline-none focus:ring-2 focus:ring-emerald-200"
                   >
-                    <option value="monthly">Monthly</option>
                     <option value="one_time">One Time</option>
+                    <option value="monthly">Monthly</option>
                   </select>
                 </div>
 
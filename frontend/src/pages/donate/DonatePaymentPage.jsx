@@ -194,7 +194,7 @@ export default function DonatePaymentPage() {
   // values from previous screen
   const amount = Number(location.state?.amount || 0);
   const tip = Number(location.state?.tip || 0);
-  const frequency = location.state?.frequency || "monthly";
+  const frequency = location.state?.frequency || "one_time";
 
   const [loading, setLoading] = useState(true);
   const [fundraiser, setFundraiser] = useState(null);
@@ -282,6 +282,7 @@ export default function DonatePaymentPage() {
           amount,
           tip_amount: tip,
           frequency_label: frequency,
+          recurring: frequency !== "one_time",
 
           payment_method: paymentMethod,
           is_anonymous: donateMode === "anonymous",
@@ -7,6 +7,7 @@ import Footer from "../../components/common/Footer";
 import Card from "../../components/common/Card";
 import Button from "../../components/common/Button";
 import { apiJson } from "../../services/apiAuth";
+import { subscribeDonations } from "../../services/donationStream";
 
 const FALLBACK_IMG = "https://via.placeholder.com/1200x700?text=Fundraiser";
 
@@ -92,6 +93,39 @@ export default function FundraiserPublicPage({ openAuthModal }) {
     })();
   }, [fundraiserId]);
 
+  // precomputed "similar fundraisers" (co-donations + category/location)
+  const [similar, setSimilar] = useState([]);
+  useEffect(() => {
+    (async () => {
+      try {
+        const res = await apiJson(`/api/auth/fundraisers/${fundraiserId}/similar/?limit=4`, {
+          method: "GET",
+          auth: false,
+        });
+        setSimilar(Array.isArray(res) ? res : []);
+      } catch (e) {
+        setSimilar([]);
+      }
+    })();
+  }, [fundraiserId]);
+
+  // live donations for this fundraiser (no refetch of the whole page payload)
+  useEffect(() => {
+    return subscribeDonations(`/api/stream/fundraisers/${fundraiserId}/`, (ev) => {
+      setData((prev) => {
+        if (!prev) return prev;
+        const donors = prev.donors || [];
+        if (donors.some((d) => d.id === ev.donation?.id)) return prev;
+        return {
+          ...prev,
+          raised: Number(prev.raised || 0) + Number(ev.raised_delta || 0),
+          supporters: (prev.supporters ?? 0) + (ev.supporters_delta || 0),
+          donors: ev.donation ? [ev.donation, ...donors].slice(0, 30) : donors,
+        };
+      });
+    });
+  }, [fundraiserId]);
+
   const msLeft = useMemo(() => {
     if (!data?.deadline_at) return NaN;
     const d = Date.parse(data.deadline_at);
@@ -288,6 +322,30 @@ export default function FundraiserPublicPage({ openAuthModal }) {
               </Card>
             </div>
           </div>
+
+          {similar.length ? (
+            <div className="mt-10">
+              <h2 className="text-lg font-bold text-gray-800 mb-4">Similar fundraisers</h2>
+              <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-4">
+                {similar.map((f) => (
+                  <button
+                    key={f.id}
+                    type="button"
+                    onClick={() => navigate(`/donate/${f.id}`)}
+                    className="text-left bg-white rounded-xl border border-emerald-100 p-4 hover:border-emerald-300"
+                  >
+                    <div className="text-sm font-semibold text-gray-800 line-clamp-2">{f.title}</div>
+                    <div className="mt-1 text-xs text-gray-500">
+                      {[f.category, f.location].filter(Boolean).join(" · ") || "—"}
+                    </div>
+                    <div className="mt-2 text-xs text-gray-600">
+                      {f.supporters ?? 0} donors · Target Rs {formatMoney(f.target_amount)}
+                    </div>
+                  </button>
+                ))}
+              </div>
+            </div>
+          ) : null}
         </div>
       )}
 
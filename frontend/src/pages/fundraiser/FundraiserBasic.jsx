@@ -1,6 +1,7 @@
-import { useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import { apiJson } from "../../services/apiAuth";
+import { createDraftAutosave } from "../../services/fundraiserWizard";
 
 const LOCATIONS = ["Lahore", "Islamabad", "Karachi", "Multan"];
 const CATEGORIES = [
@@ -30,9 +31,28 @@ export default function FundraiserBasic() {
     return Number.isFinite(n) ? n : null;
   }, [targetAmount]);
 
+  // debounced autosave of the draft: only filled-in, changed fields are sent
+  const autosave = useRef(null);
+  useEffect(() => {
+    const saver = createDraftAutosave(fundraiserId);
+    autosave.current = saver;
+    return () => saver.flush();
+  }, [fundraiserId]);
+
+  useEffect(() => {
+    const fields = {};
+    if (title.trim()) fields.title = title.trim();
+    if (location) fields.location = location;
+    if (category) fields.category = category;
+    if (targetAmount !== "" && targetNumber !== null) fields.target_amount = targetNumber;
+    if (deadline) fields.deadline = deadline;
+    if (Object.keys(fields).length) autosave.current?.update(fields);
+  }, [title, location, category, targetAmount, targetNumber, deadline]);
+
   const onNext = async () => {
     setErrors({});
     setLoading(true);
+    autosave.current?.cancel();
 
     try {
       const payload = {
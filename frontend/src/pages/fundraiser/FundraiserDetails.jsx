@@ -264,7 +264,7 @@ export default function FundraiserDetails() {
                   rel="noreferrer"
                   className="text-xs text-emerald-700 hover:underline truncate max-w-[70%]"
                 >
-                  {d.file}
+                  {d.name || d.file}
                 </a>
 
                 <button
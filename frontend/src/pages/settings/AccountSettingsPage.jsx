@@ -30,6 +30,7 @@ export default function AccountSettingsPage() {
   const [mode, setMode] = useState("deactivate"); // "deactivate" | "close"
   const [confirmPassword, setConfirmPassword] = useState("");
   const [allocation, setAllocation] = useState("return_bank");
+  const [exportData, setExportData] = useState(true);
   const [working, setWorking] = useState(false);
 
   const allocationOptions = [
@@ -60,9 +61,13 @@ export default function AccountSettingsPage() {
       await apiJson(endpoint, {
         method: "POST",
         auth: true,
-        body: { password: confirmPassword, funds_allocation_choice: allocation },
+        body: { password: confirmPassword, funds_allocation_choice: allocation, export_data: exportData },
+      });
+      const done = mode === "deactivate" ? "Account deactivated." : "Account closed.";
+      setToast({
+        type: "success",
+        message: exportData ? `${done} We'll email you a link to download your data.` : done,
       });
-      setToast({ type: "success", message: mode === "deactivate" ? "Account deactivated." : "Account closed." });
       setTimeout(() => logout(), 800);
     } catch (e) {
       setToast({ type: "error", message: e?.message || "Request failed." });
@@ -180,6 +185,16 @@ export default function AccountSettingsPage() {
             </div>
           </div>
 
+          <label className="mt-4 flex items-center gap-2 text-xs text-slate-700">
+            <input
+              type="checkbox"
+              checked={exportData}
+              onChange={(e) => setExportData(e.target.checked)}
+              className="accent-emerald-600"
+            />
+            Email me a copy of my data (profile, fundraisers and donations) before I go
+          </label>
+
           <div className="mt-6 flex justify-center">
             <button
               onClick={submitDeactivateOrClose}
@@ -0,0 +1,23 @@
+const API_BASE = import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:8000";
+
+// Subscribe to the server-sent donation stream.
+// path: "/api/stream/donations/" (all) or "/api/stream/fundraisers/<id>/"
+// Returns an unsubscribe function. EventSource reconnects on its own.
+export function subscribeDonations(path, onDonation) {
+  if (typeof window === "undefined" || !window.EventSource) return () => {};
+
+  const source = new EventSource(`${API_BASE}${path}`);
+  const handler = (e) => {
+    try {
+      onDonation(JSON.parse(e.data));
+    } catch (err) {
+      console.error("Bad donation event:", err);
+    }
+  };
+
+  source.addEventListener("donation", handler);
+  return () => {
+    source.removeEventListener("donation", handler);
+    source.close();
+  };
+}
@@ -0,0 +1,57 @@
+import { apiJson } from "./apiAuth";
+
+// Send any subset of wizard steps in one request.
+// steps: { start, start_details, basic, details, link_previous, payout_setup, publish }
+// Without fundraiserId a new draft is created (steps.start is required).
+export function saveWizard(fundraiserId, steps) {
+  return apiJson(
+    fundraiserId ? `/api/auth/fundraisers/${fundraiserId}/wizard/` : "/api/auth/fundraisers/wizard/",
+    { method: fundraiserId ? "PATCH" : "POST", auth: true, body: steps }
+  );
+}
+
+// Debounced draft autosave: call update(fields) on every change; after `delay`
+// ms of quiet only the fields that differ from the last saved values are sent
+// as JSON-patch "replace" ops. Returns { update, flush, cancel }.
+export function createDraftAutosave(fundraiserId, { delay = 1500, onError } = {}) {
+  let saved = {};
+  let pending = {};
+  let timer = null;
+
+  const flush = async () => {
+    clearTimeout(timer);
+    timer = null;
+
+    const ops = Object.keys(pending)
+      .filter((k) => pending[k] !== saved[k])
+      .map((k) => ({ op: "replace", path: `/${k}`, value: pending[k] }));
+    const sent = pending;
+    pending = {};
+    if (!ops.length) return;
+
+    try {
+      await apiJson(`/api/auth/fundraisers/${fundraiserId}/draft/`, {
+        method: "PATCH",
+        auth: true,
+        body: ops,
+      });
+      saved = { ...saved, ...sent };
+    } catch (e) {
+      if (onError) onError(e);
+    }
+  };
+
+  const update = (fields) => {
+    pending = { ...pending, ...fields };
+    clearTimeout(timer);
+    timer = setTimeout(flush, delay);
+  };
+
+  const cancel = () => {
+    clearTimeout(timer);
+    timer = null;
+    pending = {};
+  };
+
+  return { update, flush, cancel };
+}